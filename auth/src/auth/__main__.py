@@ -2,7 +2,6 @@ import os
 from collections.abc import Iterator
 from typing import Optional
 
-import requests
 import click
 import serial
 import zmq
@@ -15,7 +14,7 @@ import auth.model_prediction as mp
 import common
 from common.env import load_dotenv
 from common.logging import logger
-from leaderboard.submit import submit
+from leaderboard.client import SubmissionClient
 
 from . import PRINT_PREFIX, packet
 from . import custom_gui2_interface  # new module import
@@ -190,6 +189,20 @@ def main(
                 msg = socket.recv(2 * melvec_length * n_melvecs)
                 yield msg
 
+    # Load the models before reading the first packet
+    mp.load_models()
+
+    if REMOTE:
+        hostname = remote_hostname
+        key = remote_key
+    else:
+        hostname = local_hostname
+        key = local_key
+
+    # Keeps the connection to the leaderboard open, and sends the guesses
+    # in the background, so that reading packets is not delayed
+    client = SubmissionClient(hostname, key, coalesce=True)
+
     if gui:
         gui_process = custom_gui2_interface.launch_gui_process()
         logger.info("GUI process launched.")
@@ -229,13 +242,6 @@ def main(
                 myClass = None
 
 
-            if REMOTE:
-                hostname = remote_hostname
-                key = remote_key
-            else:
-                hostname = local_hostname
-                key = local_key
-
             if gui:
                 # Prepare the payload for the GUI interface.
                 # Note: custom_gui2_interface.send_packet expects current_packet_data as a base64 string.
@@ -255,7 +261,7 @@ def main(
 
             # Checking the threshold and submitting results.
             if myClass is not None:
-                response = requests.post(f'{hostname}/lelec210x/leaderboard/submit/{key}/{myClass}', timeout=1)
+                client.submit_background(myClass)
                 output.write(f'my class is {myClass} (based on {len(proba_memory)} probas)\n')
             output.flush()
 
@@ -0,0 +1,141 @@
+"""
+Export the CNN and OCSVM models to a compact NumPy bundle.
+
+The bundle is a single `.npz` file that :mod:`auth.runtime` can evaluate
+without TensorFlow, Keras or scikit-learn, which makes `rye run auth`
+start (and restart) almost instantly.
+"""
+
+import json
+import pickle
+from pathlib import Path
+
+import click
+import numpy as np
+
+import common
+from common.logging import logger
+
+from .runtime import FORMAT_VERSION
+
+root = Path(__file__).parent
+
+CNN_PATH = root / "CNN_model.keras"
+OCSVM_PATH = root / "ocsvm_model.pkl"
+EXPORT_PATH = root / "model_export.npz"
+
+SUPPORTED_LAYERS = (
+    "InputLayer",
+    "Conv2D",
+    "MaxPooling2D",
+    "Flatten",
+    "Dense",
+    "Dropout",
+)
+
+
+def export_models(
+    cnn_path: Path = CNN_PATH,
+    ocsvm_path: Path = OCSVM_PATH,
+    output: Path = EXPORT_PATH,
+) -> Path:
+    """
+    Convert the Keras CNN and the scikit-learn OCSVM into a NumPy bundle.
+
+    This is the only place where TensorFlow is needed, and it is
+    imported lazily.
+
+    :param cnn_path: Path to the Keras model.
+    :param ocsvm_path: Path to the pickled `OneClassSVM`.
+    :param output: Where to write the `.npz` bundle.
+    :return: The output path.
+    """
+    from tensorflow.keras.models import load_model
+
+    cnn = load_model(cnn_path)
+    with open(ocsvm_path, "rb") as file:
+        ocsvm = pickle.load(file)
+
+    layers = []
+    arrays = {}
+
+    for i, layer in enumerate(cnn.layers):
+        kind = type(layer).__name__
+        if kind not in SUPPORTED_LAYERS:
+            raise ValueError(f"Cannot export layer {layer.name!r} of type {kind}.")
+
+        config = layer.get_config()
+        description = {"type": kind}
+        if kind == "Conv2D":
+            description["strides"] = list(config["strides"])
+            description["padding"] = config["padding"]
+        elif kind == "MaxPooling2D":
+            description["pool_size"] = list(config["pool_size"])
+            description["strides"] = list(config["strides"] or config["pool_size"])
+            description["padding"] = config["padding"]
+        if "activation" in config:
+            description["activation"] = config["activation"]
+        if config.get("data_format", "channels_last") != "channels_last":
+            raise ValueError(f"Layer {layer.name!r} must use channels_last format.")
+        layers.append(description)
+
+        weights = layer.get_weights()
+        if weights:
+            arrays[f"layer{i}/kernel"] = weights[0].astype(np.float32)
+            if len(weights) > 1:
+                arrays[f"layer{i}/bias"] = weights[1].astype(np.float32)
+            else:
+                arrays[f"layer{i}/bias"] = np.zeros(weights[0].shape[-1], np.float32)
+
+    if ocsvm.kernel != "rbf":
+        raise ValueError(f"Only RBF OCSVM can be exported, got {ocsvm.kernel!r}.")
+
+    arrays["ocsvm/support_vectors"] = ocsvm.support_vectors_
+    arrays["ocsvm/dual_coef"] = ocsvm.dual_coef_.ravel()
+    arrays["ocsvm/intercept"] = np.asarray(ocsvm.intercept_).ravel()[0]
+    arrays["ocsvm/gamma"] = np.asarray(ocsvm._gamma)
+    arrays["architecture"] = np.asarray(json.dumps(layers))
+    arrays["format_version"] = np.asarray(FORMAT_VERSION)
+
+    np.savez(output, **arrays)
+    return output
+
+
+@click.command()
+@click.option(
+    "--cnn",
+    default=CNN_PATH,
+    show_default=True,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Path to the Keras CNN model.",
+)
+@click.option(
+    "--ocsvm",
+    default=OCSVM_PATH,
+    show_default=True,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Path to the pickled OCSVM model.",
+)
+@click.option(
+    "-o",
+    "--output",
+    default=EXPORT_PATH,
+    show_default=True,
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Where to write the exported bundle.",
+)
+@common.click.verbosity
+def main(cnn: Path, ocsvm: Path, output: Path) -> None:
+    """
+    Export the models used by `auth` into a NumPy-only bundle.
+
+    Once exported, `rye run auth` loads the bundle instead of importing
+    TensorFlow and scikit-learn.
+    """
+    logger.info(f"Exporting {cnn} and {ocsvm}...")
+    export_models(cnn, ocsvm, output)
+    logger.info(f"Models exported to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 import os
-import matplotlib.pyplot as plt
-import numpy as np
 import pickle
-import sklearn
-import tensorflow as tf
+from functools import lru_cache
+
+import numpy as np
+
+from .runtime import load_exported
 
 classnames = ['chainsaw', 'fire', 'fireworks', 'gun']
 def decision_maxlikelihood(probs):
@@ -18,28 +19,45 @@ def decision_weighted(probs):
     return classnames[np.argmax(sum_probs)]
 
 
-import numpy as np
-import pickle
-from tensorflow.keras.models import load_model
-
 root = os.path.dirname(os.path.abspath(__file__))
 
+ocsvm_filename = root + "/ocsvm_model.pkl"
+cnn_filename = root + "/CNN_model.keras"
+export_filename = os.environ.get("AUTH_MODEL_EXPORT", root + "/model_export.npz")
+
+
+@lru_cache(maxsize=None)
+def load_models():
+    """
+    Load the (ocsvm, cnn) pair once.
+
+    The NumPy bundle written by `rye run auth-export` is used
+    when present. Otherwise, TensorFlow and scikit-learn are only imported
+    here, on first use, instead of when this module is imported.
+    """
+    if os.path.exists(export_filename):
+        return load_exported(export_filename)
+
+    from tensorflow.keras.models import load_model
+
+    with open(ocsvm_filename, "rb") as file:
+        ocsvm_model = pickle.load(file)
+    cnn_model = load_model(cnn_filename)
+    return ocsvm_model, cnn_model
+
+
 def old_model_prediction(payload):
     this_fv = np.frombuffer(payload, dtype=np.uint16)
-    
-    ocsvm_filename = root + "/ocsvm_model.pkl"
-    cnn_filename = root + "/CNN_model.keras"
-    
-    ocsvm_model = pickle.load(open(ocsvm_filename, "rb"))
-    cnn_model = load_model(cnn_filename)
-    
+
+    ocsvm_model, cnn_model = load_models()
+
     my_little_norm = np.linalg.norm(this_fv)
     this_fv = this_fv / my_little_norm
-    
+
     ocsvm_prediction = ocsvm_model.predict([this_fv])
     # if ocsvm_prediction[0] == -1:
     #     return None, None
-    
+
     demo_fv = this_fv.reshape((1, 20, 20, 1))
     prediction = cnn_model.predict(demo_fv)
 
@@ -48,8 +66,8 @@ def old_model_prediction(payload):
 
 
 old_predictions = []
-model = tf.keras.models.load_model(root + "/CNN_model.keras")
 def model_prediction(payload):
+    _, model = load_models()
     this_fv = np.frombuffer(payload, dtype=np.uint16)
     mat = np.zeros((2, len(this_fv)))
     this_fv = this_fv / np.linalg.norm(this_fv)
@@ -61,4 +79,3 @@ def model_prediction(payload):
         old_predictions.pop(0)
         old_predictions.append(prediction[0])
     return decision_maxlikelihood(old_predictions), this_fv, prediction[0]
-        
\ No newline at end of file
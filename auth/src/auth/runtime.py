@@ -0,0 +1,176 @@
+"""
+NumPy-only runtime for the models exported by :mod:`auth.export`.
+
+Nothing in here imports TensorFlow, Keras or scikit-learn, so loading an
+exported bundle only costs reading a small `.npz` file.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+FORMAT_VERSION = 1
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": lambda x: 1 / (1 + np.exp(-x)),
+    "softmax": lambda x: _softmax(x),
+}
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e / np.sum(e, axis=-1, keepdims=True)
+
+
+def _same_padding(
+    x: np.ndarray, kernel_size, strides, value: float = 0.0
+) -> np.ndarray:
+    """
+    Pad (N, H, W, C) inputs the way TensorFlow does for `padding="same"`.
+
+    Convolutions pad with zeros, but max pooling ignores the padding,
+    i.e., pads with `-inf`.
+    """
+    pads = [(0, 0)]
+    for size, k, s in zip(x.shape[1:3], kernel_size, strides):
+        out = -(-size // s)
+        total = max((out - 1) * s + k - size, 0)
+        pads.append((total // 2, total - total // 2))
+    pads.append((0, 0))
+    return np.pad(x, pads, constant_values=value)
+
+
+def conv2d(x, kernel, bias, strides=(1, 1), padding="valid") -> np.ndarray:
+    """2D convolution (cross-correlation) in channels-last layout."""
+    kh, kw = kernel.shape[:2]
+    if padding == "same":
+        x = _same_padding(x, (kh, kw), strides)
+    windows = sliding_window_view(x, (kh, kw), axis=(1, 2))
+    windows = windows[:, :: strides[0], :: strides[1]]
+    # windows: (N, H', W', C, kh, kw), kernel: (kh, kw, C, F)
+    return np.tensordot(windows, kernel, axes=([4, 5, 3], [0, 1, 2])) + bias
+
+
+def max_pool2d(x, pool_size=(2, 2), strides=None, padding="valid") -> np.ndarray:
+    """2D max pooling in channels-last layout."""
+    strides = strides or pool_size
+    if padding == "same":
+        x = _same_padding(x, pool_size, strides, value=-np.inf)
+    windows = sliding_window_view(x, tuple(pool_size), axis=(1, 2))
+    windows = windows[:, :: strides[0], :: strides[1]]
+    return windows.max(axis=(4, 5))
+
+
+class NumpySequential:
+    """
+    Forward pass of a Keras `Sequential` model made of Conv2D, MaxPooling2D,
+    Flatten, Dense and Dropout layers.
+
+    :param layers: The layer descriptions, as written by :mod:`auth.export`.
+    :param weights: The layer weights, keyed by `"layer{i}/{name}"`.
+    """
+
+    def __init__(self, layers: List[Dict], weights: Dict[str, np.ndarray]):
+        self.layers = layers
+        self.weights = weights
+
+    def predict(self, x: np.ndarray, **kwargs) -> np.ndarray:
+        """Return the model output for a batch of inputs, like Keras does."""
+        x = np.asarray(x, dtype=np.float32)
+        for i, layer in enumerate(self.layers):
+            kind = layer["type"]
+            if kind == "Conv2D":
+                x = conv2d(
+                    x,
+                    self.weights[f"layer{i}/kernel"],
+                    self.weights[f"layer{i}/bias"],
+                    layer["strides"],
+                    layer["padding"],
+                )
+            elif kind == "MaxPooling2D":
+                x = max_pool2d(
+                    x, layer["pool_size"], layer["strides"], layer["padding"]
+                )
+            elif kind == "Flatten":
+                x = x.reshape(x.shape[0], -1)
+            elif kind == "Dense":
+                x = (
+                    x @ self.weights[f"layer{i}/kernel"]
+                    + self.weights[f"layer{i}/bias"]
+                )
+            elif kind in ("Dropout", "InputLayer"):
+                continue
+            else:
+                raise ValueError(f"Unsupported layer type: {kind}")
+
+            x = ACTIVATIONS[layer.get("activation", "linear")](x)
+
+        return x
+
+    __call__ = predict
+
+
+class NumpyOneClassSVM:
+    """
+    Decision function of a scikit-learn `OneClassSVM` with an RBF kernel.
+
+    :param support_vectors: The support vectors, shape (n_sv, n_features).
+    :param dual_coef: The dual coefficients, shape (n_sv,).
+    :param intercept: The intercept (i.e., `-rho`).
+    :param gamma: The RBF kernel coefficient.
+    """
+
+    def __init__(self, support_vectors, dual_coef, intercept, gamma):
+        self.support_vectors = np.asarray(support_vectors, dtype=float)
+        self.dual_coef = np.asarray(dual_coef, dtype=float).ravel()
+        self.intercept = float(intercept)
+        self.gamma = float(gamma)
+        self._sv_sq_norms = np.sum(self.support_vectors**2, axis=1)
+
+    def decision_function(self, X) -> np.ndarray:
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        sq_dists = (
+            np.sum(X**2, axis=1)[:, None]
+            + self._sv_sq_norms[None, :]
+            - 2 * X @ self.support_vectors.T
+        )
+        kernel = np.exp(-self.gamma * np.maximum(sq_dists, 0))
+        return kernel @ self.dual_coef + self.intercept
+
+    def predict(self, X) -> np.ndarray:
+        """Return +1 for inliers and -1 for outliers, like scikit-learn does."""
+        return np.where(self.decision_function(X) > 0, 1, -1)
+
+
+def load_exported(
+    path: Union[str, Path],
+) -> Tuple[NumpyOneClassSVM, NumpySequential]:
+    """
+    Load an exported bundle.
+
+    :param path: Path to the `.npz` file written by :func:`auth.export.export_models`.
+    :return: The (ocsvm, cnn) pair.
+    """
+    with np.load(path, allow_pickle=False) as bundle:
+        arrays = {name: bundle[name] for name in bundle.files}
+
+    version = int(arrays.pop("format_version"))
+    if version != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported export format version {version}, expected {FORMAT_VERSION}."
+        )
+
+    layers = json.loads(str(arrays.pop("architecture")))
+    ocsvm = NumpyOneClassSVM(
+        arrays.pop("ocsvm/support_vectors"),
+        arrays.pop("ocsvm/dual_coef"),
+        arrays.pop("ocsvm/intercept"),
+        arrays.pop("ocsvm/gamma"),
+    )
+    cnn = NumpySequential(layers, arrays)
+    return ocsvm, cnn
@@ -0,0 +1,89 @@
+from pathlib import Path
+
+import numpy as np
+
+from .runtime import NumpyOneClassSVM, NumpySequential, load_exported, max_pool2d
+
+TEST_DATA = Path(__file__).parent / "test_data"
+BUNDLE_PATH = TEST_DATA / "runtime_bundle.npz"
+REFERENCE_PATH = TEST_DATA / "runtime_reference.npz"
+
+
+def make_reference():
+    """
+    Write a small exported bundle, and the outputs of the Keras and
+    scikit-learn models it was exported from.
+
+    Needs TensorFlow and scikit-learn, run with `python -m auth.test_runtime`.
+    """
+    import pickle
+    import tempfile
+
+    from sklearn.svm import OneClassSVM
+    from tensorflow import keras
+
+    from .export import export_models
+
+    rng = np.random.default_rng(0)
+    keras.utils.set_random_seed(0)
+    cnn = keras.Sequential(
+        [
+            keras.Input((7, 7, 1)),
+            keras.layers.Conv2D(3, (3, 3), padding="same"),
+            # Odd input and negative activations: padding must be ignored
+            keras.layers.MaxPooling2D((2, 2), padding="same"),
+            keras.layers.Conv2D(2, (2, 2), strides=(2, 2), activation="relu"),
+            keras.layers.Flatten(),
+            keras.layers.Dropout(0.5),
+            keras.layers.Dense(4, activation="softmax"),
+        ]
+    )
+    ocsvm = OneClassSVM(gamma="scale", nu=0.2).fit(rng.standard_normal((30, 49)))
+
+    x = rng.standard_normal((5, 7, 7, 1)).astype(np.float32)
+    with tempfile.TemporaryDirectory() as tmp:
+        cnn_path = Path(tmp) / "cnn.keras"
+        ocsvm_path = Path(tmp) / "ocsvm.pkl"
+        cnn.save(cnn_path)
+        with open(ocsvm_path, "wb") as file:
+            pickle.dump(ocsvm, file)
+        TEST_DATA.mkdir(exist_ok=True)
+        export_models(cnn_path, ocsvm_path, BUNDLE_PATH)
+
+    np.savez(
+        REFERENCE_PATH,
+        x=x,
+        cnn=cnn.predict(x, verbose=0),
+        ocsvm_decision=ocsvm.decision_function(x.reshape(5, -1)),
+        ocsvm_predict=ocsvm.predict(x.reshape(5, -1)),
+    )
+
+
+def test_load_exported():
+    ocsvm, cnn = load_exported(BUNDLE_PATH)
+    assert isinstance(ocsvm, NumpyOneClassSVM)
+    assert isinstance(cnn, NumpySequential)
+
+    with np.load(REFERENCE_PATH) as reference:
+        x = reference["x"]
+        np.testing.assert_allclose(cnn.predict(x), reference["cnn"], atol=1e-6)
+        np.testing.assert_allclose(
+            ocsvm.decision_function(x.reshape(len(x), -1)),
+            reference["ocsvm_decision"],
+            atol=1e-9,
+        )
+        np.testing.assert_array_equal(
+            ocsvm.predict(x.reshape(len(x), -1)), reference["ocsvm_predict"]
+        )
+
+
+def test_max_pool2d_same_padding():
+    x = -np.arange(1, 10, dtype=float).reshape(1, 3, 3, 1)
+
+    pooled = max_pool2d(x, (2, 2), padding="same")
+
+    np.testing.assert_array_equal(pooled[0, :, :, 0], [[-1, -3], [-7, -9]])
+
+
+if __name__ == "__main__":
+    make_reference()
@@ -9,7 +9,8 @@ from auth import PRINT_PREFIX
 from common.env import load_dotenv
 from common.logging import logger
 
-from .utils import payload_to_melvecs
+from .streaming import StreamingClassifier
+from .utils import read_payloads
 
 load_dotenv()
 
@@ -30,12 +31,44 @@ load_dotenv()
     type=click.Path(exists=True, dir_okay=False, path_type=Path),
     help="Path to the trained classification model.",
 )
+@click.option(
+    "-o",
+    "--output",
+    default="-",
+    type=click.File("w"),
+    help="Where to write the decisions. Default to '-', a.k.a. stdout.",
+)
+@click.option(
+    "-b",
+    "--batch-size",
+    default=32,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Maximum number of packets classified at once.",
+)
+@click.option(
+    "--max-latency",
+    default=0.05,
+    type=click.FloatRange(min=0),
+    show_default=True,
+    help="Maximum time (in seconds) a packet waits for its batch to be full.",
+)
+@click.option(
+    "--normalize/--no-normalize",
+    default=False,
+    show_default=True,
+    help="Normalize the feature vectors, as done by Feature_vector_DS.",
+)
 @common.click.melvec_length
 @common.click.n_melvecs
 @common.click.verbosity
 def main(
     _input: Optional[click.File],
     model: Optional[Path],
+    output: click.File,
+    batch_size: int,
+    max_latency: float,
+    normalize: bool,
     melvec_length: int,
     n_melvecs: int,
 ) -> None:
@@ -50,6 +83,10 @@ def main(
 
     This way, you will directly receive the authentified packets from STDIN
     (standard input, i.e., the terminal).
+
+    Packets are classified by batches of at most BATCH_SIZE packets,
+    and no packet waits more than MAX_LATENCY seconds for its batch.
+    Each decision is written on one line, prefixed by its timestamp.
     """
     if model:
         with open(model, "rb") as file:
@@ -57,13 +94,12 @@ def main(
     else:
         m = None
 
-    for payload in _input:
-        if PRINT_PREFIX in payload:
-            payload = payload[len(PRINT_PREFIX) :]
-
-            melvecs = payload_to_melvecs(payload, melvec_length, n_melvecs)
-            logger.info(f"Parsed payload into Mel vectors: {melvecs}")
-
-            if m:
-                # TODO: perform classification
-                pass
+    classifier = StreamingClassifier(
+        m, melvec_length, n_melvecs, batch_size, max_latency, normalize
+    )
+    try:
+        classifier.run(read_payloads(_input, PRINT_PREFIX), output)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info(classifier.stats.report())
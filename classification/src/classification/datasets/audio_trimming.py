@@ -1,150 +1,241 @@
+import hashlib
+import json
 import os
-import librosa
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import click
 import numpy as np
 import soundfile as sf
-import random
-import scipy.signal
-
-# Input and output folders
-input_folder = "soundfiles"
-output_folder = "soundfiles_augmented"
-os.makedirs(output_folder, exist_ok=True)
-
-# Parameter: window size (in seconds)
-frame_duration = 0.03  # 30 ms
-
-# Iterate over all .wav files containing specific keywords
-keywords = ['chainsaw', 'fire', 'fireworks', 'gun']
-
-for file_name in os.listdir(input_folder):
-    if file_name.endswith(".wav") and any(keyword in file_name for keyword in keywords):
-        input_path = os.path.join(input_folder, file_name)
-        
-        # Load audio
-        audio, sr = librosa.load(input_path, sr=None)
-
-        # Compute window size in samples
-        frame_size = int(sr * frame_duration)
-
-        # Compute the absolute mean of the entire signal
-        global_mean = np.mean(np.abs(audio))
-
-        # Store relevant frames
-        trimmed_audio = []
-
-        for i in range(len(audio) // frame_size):
-            start = i * frame_size
-            end = start + frame_size
-            frame = audio[start:end]
-
-            # Absolute mean of the frame
-            frame_mean = np.mean(np.abs(frame))
-
-            # Keep the frame if it is "significant"
-            if frame_mean > (global_mean * 0.4):  # Adjustable threshold
-                trimmed_audio.append(frame)
-
-        # Reassemble the kept frames
-        if trimmed_audio:
-            final_audio = np.concatenate(trimmed_audio)
-        else:
-            final_audio = np.array([])  # Silence if everything was noise
-
-        # Save the processed file
-        if len(final_audio) > 0:
-            sf.write(os.path.join(output_folder, file_name), final_audio, sr)
-            print(f"✔ {file_name} processed")
-        else:
-            print(f"✖ {file_name} ignored")
-
-print("✅ Every file processed")
-
-# Data augmentation
-def augment_audio(audio, sr, type='pitch', factor=1.5):
-    if type == 'pos_pitch' or type == 'neg_pitch':
-        return librosa.effects.pitch_shift(y=audio, sr=sr, n_steps=factor)
-    elif type == 'noise':
-        signal_power = np.mean(audio ** 2)
-        noise_power = signal_power / 10
-        noise_std = np.sqrt(noise_power)
-        noise = np.random.normal(0, noise_std, len(audio))
-        return audio + noise
-    elif type == 'shift':
-        return np.roll(audio, int(len(audio) * random.uniform(0, factor) / 1000))
-    elif type == 'slow_stretch' or type == 'fast_stretch':
-        return librosa.effects.time_stretch(y=audio, rate=factor)
-    else:
-        return audio
-
-# Augmentation
-augmentation_types = ['pos_pitch', 'neg_pitch', 'noise', 'shift', 'fast_stretch', 'slow_stretch']
-augmentation_factors = [2, -2, 0.05, 1, 1.2, 0.7]
-
-for file_name in os.listdir(output_folder):
-    if file_name.endswith(".wav"):
-        input_path = os.path.join(output_folder, file_name)
-        
-        # Load audio
-        audio, sr = librosa.load(input_path, sr=None)
-        
-        for type, factor in zip(augmentation_types, augmentation_factors):
-            augmented_audio = augment_audio(audio, sr, type, factor)
-            new_name = f"{os.path.splitext(file_name)[0]}_{type}.wav"
-            sf.write(os.path.join(output_folder, new_name), augmented_audio, sr)
-            print(f"✔ {file_name} augmented with {type}")
-
-print("✅ All files have been augmented.")
-
-# # Convolution with impulse response
-# impulse_response_path = "Impulse_response.wav"
-# impulse_response, sr_ir = librosa.load(impulse_response_path, sr=None)
-# 
-# for file_name in os.listdir(output_folder):
-#     if file_name.endswith(".wav"):
-#         input_path = os.path.join(output_folder, file_name)
-#         
-#         # Load audio
-#         audio, sr = librosa.load(input_path, sr=None)
-# 
-#         # Resample impulse response if necessary
-#         if sr != sr_ir:
-#             impulse_response = librosa.resample(impulse_response, orig_sr=sr_ir, target_sr=sr)
-#             sr_ir = sr
-# 
-#         # Convolve audio with impulse response
-#         convolved_audio = scipy.signal.fftconvolve(audio, impulse_response, mode='full')
-# 
-#         # Save convolved audio with a clean name
-#         clean_name = f"{os.path.splitext(file_name)[0]}_convolved.wav"
-#         sf.write(os.path.join(output_folder, clean_name), convolved_audio, sr)
-#         
-#         # Remove original non-convolved files
-#         os.remove(input_path)
-#         print(f"✔ {file_name} convolved and saved as {clean_name}")
-# 
-# print("✅ All files have been convolved and cleaned.")
-
-
-# Directory containing the audio files
-directory = "soundfiles_augmented"
-
-# File categories
-classes = ['chainsaw', 'fireworks', 'fire', 'gun']
-
-# Retrieve and sort the files
-files = sorted(f for f in os.listdir(directory) if f.endswith(".wav"))
-
-# Dictionary to store the counter for each class
-counters = {cls: 0 for cls in classes}
-
-# Rename the files
-for file in files:
-    for cls in classes:
-        if file.startswith(cls):
-            new_name = f"{cls}_{counters[cls]:03d}.wav"
-            old_path = os.path.join(directory, file)
-            new_path = os.path.join(directory, new_name)
-            os.rename(old_path, new_path)
-            counters[cls] += 1
-            print(f"Renamed: {file} -> {new_name}")
-            break
+from numpy import ndarray
+from tqdm import tqdm
+
+import common
+from common.logging import logger
+
+# -----------------------------------------------------------------------------
+"""
+Synthesis of the functions in :
+- trim_silence : remove the frames of a signal that are quieter than the whole signal.
+- trim_file : trim one audio file.
+- trim_folder : trim all matching audio files of a folder, skipping unchanged files.
+"""
+# -----------------------------------------------------------------------------
+
+INPUT_FOLDER = Path(__file__).parent / "soundfiles"
+OUTPUT_FOLDER = Path(__file__).parent / "soundfiles_augmented"
+KEYWORDS = ("chainsaw", "fire", "fireworks", "gun")
+MANIFEST = ".trimmed.json"
+
+
+def trim_silence(audio: ndarray, frame_size: int, threshold: float = 0.4) -> ndarray:
+    """
+    Keep only the frames whose absolute mean is above `threshold` times
+    the absolute mean of the whole signal.
+
+    :param audio: The signal.
+    :param frame_size: The number of samples per frame. The trailing samples
+        that do not fill a frame are dropped.
+    :param threshold: The relative threshold.
+    :return: The concatenation of the kept frames (possibly empty).
+    """
+    global_mean = np.mean(np.abs(audio))
+    n_frames = len(audio) // frame_size
+    frames = audio[: n_frames * frame_size].reshape(n_frames, frame_size)
+    keep = np.mean(np.abs(frames), axis=1) > global_mean * threshold
+    return frames[keep].ravel()
+
+
+def trim_file(
+    input_path: Path, output_path: Path, frame_duration: float, threshold: float
+) -> bool:
+    """
+    Trim an audio file, see :func:`trim_silence`.
+
+    :param input_path: The audio file to trim.
+    :param output_path: Where to write the trimmed audio file.
+    :param frame_duration: The duration of a frame, in seconds.
+    :param threshold: The relative threshold.
+    :return: Whether some audio was kept (otherwise, nothing is written).
+    """
+    audio, sr = sf.read(input_path, dtype="float32")
+    if audio.ndim > 1:
+        audio = np.mean(audio, axis=1)
+
+    frame_size = max(int(sr * frame_duration), 1)
+    trimmed = trim_silence(audio, frame_size, threshold)
+    if len(trimmed) == 0:
+        return False
+
+    tmp = output_path.with_suffix(f".{os.getpid()}.tmp")
+    sf.write(tmp, trimmed, sr, format="WAV")
+    os.replace(tmp, output_path)
+    return True
+
+
+def file_digest(path: Path) -> str:
+    """
+    Return the SHA-256 digest of a file's content.
+
+    :param path: The path to the file.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(2**20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def trim_folder(
+    input_folder: Path = INPUT_FOLDER,
+    output_folder: Path = OUTPUT_FOLDER,
+    keywords: Sequence[str] = KEYWORDS,
+    frame_duration: float = 0.03,
+    threshold: float = 0.4,
+    n_workers: Optional[int] = None,
+    force: bool = False,
+) -> Dict[str, bool]:
+    """
+    Trim all the .wav files of a folder whose name contains one of the keywords.
+
+    Trimmed files are written with the same name in the output folder, along
+    with a manifest of the input digests and parameters, so that files that
+    did not change since the last run are skipped.
+
+    :param input_folder: The folder containing the audio files.
+    :param output_folder: Where to write the trimmed audio files.
+    :param keywords: Only the files containing one of them are trimmed.
+    :param frame_duration: The duration of a frame, in seconds.
+    :param threshold: The relative threshold, see :func:`trim_silence`.
+    :param n_workers: The number of processes, defaults to the number of CPUs.
+    :param force: Whether to trim all files, even unchanged ones.
+    :return: For each trimmed file (skipped ones excluded), whether some
+        audio was kept.
+    """
+    output_folder.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_folder / MANIFEST
+    manifest = {}
+    if manifest_path.exists() and not force:
+        manifest = json.loads(manifest_path.read_text())
+
+    params = {"frame_duration": frame_duration, "threshold": threshold}
+    todo: List[str] = []
+    for input_path in sorted(input_folder.glob("*.wav")):
+        name = input_path.name
+        if not any(keyword in name for keyword in keywords):
+            continue
+
+        entry = {"input": file_digest(input_path), **params}
+        previous = manifest.get(name, {})
+        if all(previous.get(key) == value for key, value in entry.items()) and (
+            output_folder / name
+        ).exists() == previous.get("kept"):
+            continue
+        manifest[name] = entry
+        todo.append(name)
+
+    logger.info(f"Trimming {len(todo)} files, skipping unchanged ones.")
+
+    results = {}
+    with ProcessPoolExecutor(n_workers) as executor:
+        futures = {
+            name: executor.submit(
+                trim_file,
+                input_folder / name,
+                output_folder / name,
+                frame_duration,
+                threshold,
+            )
+            for name in todo
+        }
+        for name, future in tqdm(futures.items(), desc="Trimming", leave=False):
+            kept = future.result()
+            if not kept:
+                (output_folder / name).unlink(missing_ok=True)
+                logger.info(f"{name} ignored, only silence")
+            manifest[name]["kept"] = kept
+            results[name] = kept
+
+    manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    return results
+
+
+@click.command()
+@click.option(
+    "-i",
+    "--input-folder",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    default=INPUT_FOLDER,
+    show_default=True,
+    help="Folder containing the audio files to trim.",
+)
+@click.option(
+    "-o",
+    "--output-folder",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=OUTPUT_FOLDER,
+    show_default=True,
+    help="Output folder for the trimmed audio files.",
+)
+@click.option(
+    "-k",
+    "--keyword",
+    "keywords",
+    multiple=True,
+    default=KEYWORDS,
+    show_default=True,
+    help="Only trim files whose name contains one of the keywords.",
+)
+@click.option(
+    "--frame-duration",
+    default=0.03,
+    show_default=True,
+    type=click.FloatRange(min=0.0, min_open=True),
+    help="Duration (in seconds) of the frames.",
+)
+@click.option(
+    "-t",
+    "--threshold",
+    default=0.4,
+    show_default=True,
+    type=click.FloatRange(min=0.0),
+    help="Frames quieter than this fraction of the file's mean amplitude are removed.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Number of processes. Defaults to the number of CPUs.",
+)
+@click.option(
+    "-f",
+    "--force",
+    is_flag=True,
+    help="Trim all files, even those that did not change since the last run.",
+)
+@common.click.verbosity
+def main(
+    input_folder: Path,
+    output_folder: Path,
+    keywords: Tuple[str, ...],
+    frame_duration: float,
+    threshold: float,
+    jobs: Optional[int],
+    force: bool,
+) -> None:
+    """
+    Remove the silent parts of audio files.
+
+    Files are trimmed in parallel, and files that did not change since
+    the last run (same content and same parameters) are skipped.
+    """
+    results = trim_folder(
+        input_folder, output_folder, keywords, frame_duration, threshold, jobs, force
+    )
+    logger.info(f"{sum(results.values())} files trimmed.")
+
+
+if __name__ == "__main__":
+    main()
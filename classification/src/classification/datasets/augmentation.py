@@ -0,0 +1,333 @@
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import click
+import librosa
+import numpy as np
+import soundfile as sf
+from numpy import ndarray
+from tqdm import tqdm
+
+import common
+from common.logging import logger
+
+from .audio_trimming import OUTPUT_FOLDER, file_digest
+
+# -----------------------------------------------------------------------------
+"""
+Synthesis of the functions in :
+- recipe_operations : list the (name, operation, value) augmentations of a recipe.
+- augment : apply one augmentation to a signal.
+- augment_file : apply many augmentations to one audio file.
+- plan_augmentations : list the augmented files that are missing or out of date.
+- build_augmented : augment all the audio files of a folder, skipping work already done.
+"""
+# -----------------------------------------------------------------------------
+
+AUGMENT_VERSION = 1
+"""Bump when the output of :func:`augment` changes, to rebuild the store."""
+
+DEFAULT_RECIPE: Dict[str, List[float]] = {
+    "pitch": [2, -2],  # in semitones
+    "stretch": [1.2, 0.7],  # speed-up rates
+    "noise": [10],  # SNRs in dB
+    "shift": [0.005],  # maximum circular shifts in seconds
+}
+MANIFEST = "manifest.json"
+
+
+def recipe_operations(recipe: Dict[str, List[float]]) -> List[Tuple[str, str, float]]:
+    """
+    List the augmentations described by a recipe.
+
+    :param recipe: For each operation ("pitch", "stretch", "noise" or "shift"),
+        the list of values to apply, one augmented file per value.
+    :return: The (name, operation, value) tuples, where name is used
+        as the suffix of the augmented files.
+    """
+    operations = []
+    for operation, values in sorted(recipe.items()):
+        if operation not in DEFAULT_RECIPE:
+            raise ValueError(
+                f"Unknown operation {operation!r}, "
+                f"expected one of {sorted(DEFAULT_RECIPE)}."
+            )
+        for value in values:
+            operations.append((f"{operation}{value:+g}", operation, float(value)))
+    return operations
+
+
+def augment(
+    audio: ndarray, sr: int, operation: str, value: float, seed: int = 0
+) -> ndarray:
+    """
+    Apply one augmentation to a signal.
+
+    :param audio: The signal.
+    :param sr: The sampling frequency.
+    :param operation: "pitch" (shift by `value` semitones), "stretch"
+        (speed up by a factor `value`), "noise" (add white noise with an SNR
+        of `value` dB) or "shift" (roll by at most `value` seconds).
+    :param value: The parameter of the operation.
+    :param seed: The seed of the random operations.
+    :return: The augmented signal.
+    """
+    rng = np.random.default_rng(seed)
+    if operation == "pitch":
+        return librosa.effects.pitch_shift(y=audio, sr=sr, n_steps=value)
+    if operation == "stretch":
+        return librosa.effects.time_stretch(y=audio, rate=value)
+    if operation == "noise":
+        noise_power = np.mean(audio**2) / 10 ** (value / 10)
+        return audio + rng.normal(0, np.sqrt(noise_power), len(audio))
+    if operation == "shift":
+        return np.roll(audio, rng.integers(0, int(value * sr) + 1))
+    raise ValueError(f"Unknown operation {operation!r}.")
+
+
+def augment_file(
+    input_path: Path, output_folder: Path, tasks: List[Tuple[str, str, float, int]]
+) -> List[str]:
+    """
+    Load an audio file once and write its augmented versions.
+
+    :param input_path: The audio file.
+    :param output_folder: Where to write the augmented files.
+    :param tasks: The (output name, operation, value, seed) tuples.
+    :return: The names of the written files.
+    """
+    audio, sr = sf.read(input_path, dtype="float32")
+    if audio.ndim > 1:
+        audio = np.mean(audio, axis=1)
+
+    written = []
+    for name, operation, value, seed in tasks:
+        augmented = augment(audio, sr, operation, value, seed)
+        tmp = output_folder / f"{name}.{os.getpid()}.tmp"
+        sf.write(tmp, augmented, sr, format="WAV")
+        os.replace(tmp, output_folder / name)
+        written.append(name)
+    return written
+
+
+def read_manifest(store: Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Read the entries of a store's manifest.
+
+    :param store: The folder of the augmented files.
+    :return: For each augmented file, the digest of its input and the
+        augmentation applied. Empty if there is no manifest, or if it was
+        written by another version of :func:`augment`.
+    """
+    manifest_path = store / MANIFEST
+    if not manifest_path.exists():
+        return {}
+    manifest = json.loads(manifest_path.read_text())
+    if manifest.get("version") != AUGMENT_VERSION:
+        return {}
+    return manifest["entries"]
+
+
+def write_manifest(store: Path, entries: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Write the manifest of a store.
+
+    :param store: The folder of the augmented files.
+    :param entries: See :func:`read_manifest`.
+    """
+    manifest = {"version": AUGMENT_VERSION, "entries": entries}
+    (store / MANIFEST).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+
+
+def plan_augmentations(
+    input_folder: Path,
+    operations: List[Tuple[str, str, float]],
+    store: Path,
+    entries: Dict[str, Dict[str, Any]],
+) -> Tuple[
+    Dict[Path, List[Tuple[str, str, float, int]]], Dict[str, Dict[str, Any]]
+]:
+    """
+    List the augmented files that are missing or out of date.
+
+    Entries of files that are out of date, or not expected anymore, are
+    removed from `entries`, and files that are not expected anymore are
+    deleted from the store.
+
+    :param input_folder: The folder containing the audio files to augment.
+    :param operations: See :func:`recipe_operations`.
+    :param store: The folder of the augmented files.
+    :param entries: The manifest entries, see :func:`read_manifest`.
+    :return: The tasks of each input file (see :func:`augment_file`), and
+        the manifest entries of the files to write.
+    """
+    jobs: Dict[Path, List[Tuple[str, str, float, int]]] = {}
+    pending: Dict[str, Dict[str, Any]] = {}
+    expected = set()
+    for input_path in sorted(input_folder.glob("*.wav")):
+        digest = file_digest(input_path)
+        for suffix, operation, value in operations:
+            name = f"{input_path.stem}_{suffix}.wav"
+            entry = {"input": digest, "operation": operation, "value": value}
+            expected.add(name)
+            if entries.get(name) == entry and (store / name).exists():
+                continue
+            seed = int(hashlib.sha256(f"{digest}:{suffix}".encode()).hexdigest(), 16)
+            entries.pop(name, None)
+            pending[name] = entry
+            jobs.setdefault(input_path, []).append((name, operation, value, seed))
+
+    # Remove what is not in the recipe (or the input folder) anymore
+    for name in set(entries) - expected:
+        del entries[name]
+        (store / name).unlink(missing_ok=True)
+
+    return jobs, pending
+
+
+def outdated_stores(input_folder: Path, prune: bool = False) -> List[Path]:
+    """
+    Find the stores written by other versions of :func:`augment`.
+
+    :param input_folder: The folder containing the audio files to augment.
+    :param prune: Whether to remove the outdated stores.
+    :return: The outdated stores (that were removed, if `prune` is set).
+    """
+    store = input_folder / f"augmented_v{AUGMENT_VERSION}"
+    old_stores = [
+        old_store
+        for old_store in sorted(input_folder.glob("augmented_v*"))
+        if old_store != store and old_store.is_dir()
+    ]
+    for old_store in old_stores:
+        if prune:
+            logger.info(f"Removing outdated store {old_store}.")
+            shutil.rmtree(old_store)
+        else:
+            logger.warning(
+                f"Keeping outdated store {old_store}, whose files are also "
+                "found by Dataset_augmented. Remove it, or use --prune."
+            )
+    return old_stores
+
+
+def build_augmented(
+    input_folder: Path = OUTPUT_FOLDER,
+    recipe: Optional[Dict[str, List[float]]] = None,
+    store: Optional[Path] = None,
+    n_workers: Optional[int] = None,
+    prune: bool = False,
+) -> int:
+    """
+    Augment all the .wav files of a folder, following a recipe.
+
+    Augmented files are written in a versioned store, by default the
+    `augmented_v{AUGMENT_VERSION}` subfolder of the input folder, so that
+    they are found by :class:`Dataset`. A manifest records, for each
+    augmented file, the digest of its input and the augmentation applied,
+    and augmented files that are already up to date are not recomputed.
+
+    :param input_folder: The folder containing the audio files to augment.
+    :param recipe: The augmentations, see :func:`recipe_operations`.
+        Defaults to :data:`DEFAULT_RECIPE`.
+    :param store: Where to write the augmented files.
+    :param n_workers: The number of processes, defaults to the number of CPUs.
+    :param prune: Whether to remove the stores of other versions,
+        when using the default store. Otherwise, they are only reported.
+    :return: The number of augmented files written.
+    """
+    operations = recipe_operations(recipe or DEFAULT_RECIPE)
+    if store is None:
+        store = input_folder / f"augmented_v{AUGMENT_VERSION}"
+        outdated_stores(input_folder, prune)
+    store.mkdir(parents=True, exist_ok=True)
+
+    entries = read_manifest(store)
+    jobs, pending = plan_augmentations(input_folder, operations, store, entries)
+
+    n_tasks = len(pending)
+    logger.info(f"Writing {n_tasks} augmented files, {len(entries)} up to date.")
+
+    try:
+        with ProcessPoolExecutor(n_workers) as executor:
+            futures = [
+                executor.submit(augment_file, input_path, store, tasks)
+                for input_path, tasks in jobs.items()
+            ]
+            for future in tqdm(
+                as_completed(futures), total=len(futures), desc="Augmenting"
+            ):
+                for name in future.result():
+                    entries[name] = pending[name]
+    finally:
+        # Only record the files that were written, so the others are redone
+        write_manifest(store, entries)
+
+    return n_tasks
+
+
+@click.command()
+@click.option(
+    "-i",
+    "--input-folder",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    default=OUTPUT_FOLDER,
+    show_default=True,
+    help="Folder containing the audio files to augment.",
+)
+@click.option(
+    "-r",
+    "--recipe",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="JSON file mapping each operation (pitch, stretch, noise or shift) "
+    "to the list of values to apply. Defaults to "
+    + json.dumps(DEFAULT_RECIPE).replace("%", "%%")
+    + ".",
+)
+@click.option(
+    "-o",
+    "--store",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Output folder for the augmented files. "
+    "Defaults to a versioned subfolder of the input folder.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Number of processes. Defaults to the number of CPUs.",
+)
+@click.option(
+    "--prune",
+    is_flag=True,
+    help="Remove the stores written by other versions of the augmentations. "
+    "Otherwise, they are kept and reported.",
+)
+@common.click.verbosity
+def main(
+    input_folder: Path,
+    recipe: Optional[Path],
+    store: Optional[Path],
+    jobs: Optional[int],
+    prune: bool,
+) -> None:
+    """
+    Build an augmented dataset from audio files, e.g., trimmed with `trim-audio`.
+
+    Only the augmented files that are missing or out of date are computed.
+    """
+    build_augmented(
+        input_folder,
+        json.loads(recipe.read_text()) if recipe else None,
+        store,
+        jobs,
+        prune,
+    )
@@ -0,0 +1,243 @@
+import queue
+import string
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Iterable, List, TextIO, Tuple
+
+import numpy as np
+
+from common.logging import logger
+
+from .utils import payloads_to_melvecs
+
+# -----------------------------------------------------------------------------
+"""
+Synthesis of the classes in :
+- StreamStats : throughput and latency statistics of a stream.
+- StreamingClassifier : classify payloads from a stream, by micro-batches.
+"""
+# -----------------------------------------------------------------------------
+
+_EOF = object()
+_HEX_DIGITS = frozenset(string.hexdigits)
+
+
+def _read(
+    payloads: Iterable[str], pending: "queue.Queue[Any]", errors: List[Exception]
+) -> None:
+    """
+    Put the payloads in a queue, with their arrival times, then `_EOF`.
+
+    An error raised while reading is added to `errors` before `_EOF`.
+    """
+    try:
+        for payload in payloads:
+            pending.put((payload, time.perf_counter()))
+    except Exception as e:
+        errors.append(e)
+    finally:
+        pending.put(_EOF)
+
+
+@dataclass
+class StreamStats:
+    """
+    Throughput and latency statistics of a stream.
+
+    Latencies are measured from the time a payload is read to the time
+    its decision is written.
+    """
+
+    packets: int = 0
+    batches: int = 0
+    start: float = field(default_factory=time.perf_counter)
+    latencies: List[float] = field(default_factory=list)
+
+    def add_batch(self, arrivals: List[float], done: float) -> None:
+        """
+        Record a processed batch.
+
+        :param arrivals: The arrival times of the payloads in the batch.
+        :param done: The time at which the batch was processed.
+        """
+        self.packets += len(arrivals)
+        self.batches += 1
+        self.latencies.extend(done - arrival for arrival in arrivals)
+
+    def report(self) -> str:
+        """
+        Return a one-line summary of the statistics.
+        """
+        elapsed = time.perf_counter() - self.start
+        if not self.packets:
+            return f"No packet classified in {elapsed:.2f} s."
+
+        p50, p95 = np.percentile(self.latencies, [50, 95]) * 1000
+        return (
+            f"Classified {self.packets} packets in {self.batches} batches "
+            f"({self.packets / self.batches:.1f} per batch) in {elapsed:.2f} s: "
+            f"{self.packets / elapsed:.1f} packets/s, latency "
+            f"p50={p50:.1f} ms, p95={p95:.1f} ms, "
+            f"max={max(self.latencies) * 1000:.1f} ms."
+        )
+
+
+class StreamingClassifier:
+    """
+    Classify payloads read from a stream, by micro-batches.
+
+    Payloads are accumulated until either `batch_size` payloads are pending,
+    or the oldest pending payload has waited for `max_latency` seconds.
+    The whole batch is then decoded at once and the model is run once.
+
+    :param model: A trained model with a `predict` method (e.g., scikit-learn),
+        or None to only decode the payloads.
+    :param melvec_length: The length of one Mel vector.
+    :param n_melvecs: The number of Mel vectors per payload.
+    :param batch_size: The maximum number of payloads per batch.
+    :param max_latency: The maximum time (in seconds) a payload can wait
+        for its batch to be full.
+    :param normalize: Whether to normalize the feature vectors,
+        as done by `Feature_vector_DS`.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        melvec_length: int,
+        n_melvecs: int,
+        batch_size: int = 32,
+        max_latency: float = 0.05,
+        normalize: bool = False,
+    ):
+        self.model = model
+        self.melvec_length = melvec_length
+        self.n_melvecs = n_melvecs
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.normalize = normalize
+        self.stats = StreamStats()
+
+    def is_valid(self, payload: str) -> bool:
+        """
+        Check that a payload is hex and has the expected length,
+        logging a warning otherwise.
+
+        :param payload: The hex payload.
+        """
+        n_bytes = 2 * self.melvec_length * self.n_melvecs
+        # Checked without decoding, as payloads_to_melvecs decodes them again
+        text = payload.strip() if isinstance(payload, str) else ""
+        if not text or not _HEX_DIGITS.issuperset(text):
+            logger.warning(f"Skipping invalid payload {payload!r}: not hex")
+            return False
+        if len(text) != 2 * n_bytes:
+            logger.warning(
+                f"Skipping payload of {len(text) / 2:g} bytes, expected {n_bytes}: "
+                f"{payload!r}"
+            )
+            return False
+        return True
+
+    def features(self, payloads: List[str]) -> np.ndarray:
+        """
+        Decode payloads into feature vectors, one per row.
+
+        Feature vectors are the flattened (melvec_length, n_melvecs)
+        spectrograms, like those used for training.
+
+        :param payloads: The hex payloads.
+        """
+        melvecs = payloads_to_melvecs(payloads, self.melvec_length, self.n_melvecs)
+        X = np.swapaxes(melvecs, 1, 2).reshape(len(payloads), -1)
+        if self.normalize:
+            norms = np.linalg.norm(X, axis=1, keepdims=True)
+            X /= np.where(norms == 0, 1, norms)
+        return X
+
+    def classify(self, payloads: List[str]) -> List[Any]:
+        """
+        Classify a batch of payloads.
+
+        :param payloads: The hex payloads.
+        :return: One decision per payload (None without a model).
+        """
+        X = self.features(payloads)
+        logger.debug(f"Parsed {len(payloads)} payloads into features: {X.shape}")
+        if self.model is None:
+            return [None] * len(payloads)
+        return list(self.model.predict(X))
+
+    def batches(
+        self, payloads: Iterable[str]
+    ) -> Iterable[Tuple[List[str], List[float]]]:
+        """
+        Group payloads into micro-batches, as they arrive.
+
+        Payloads are read in a background thread, so that a batch can be
+        processed when its deadline is reached, even if the stream is idle.
+
+        :param payloads: The stream of payloads.
+        :return: The batches of payloads, with their arrival times.
+        :raise Exception: Any error raised while reading the stream,
+            after the pending payloads are yielded.
+        """
+        pending: "queue.Queue[Any]" = queue.Queue()
+        errors: List[Exception] = []
+        threading.Thread(
+            target=_read, args=(payloads, pending, errors), daemon=True
+        ).start()
+
+        batch: List[str] = []
+        arrivals: List[float] = []
+        while True:
+            timeout = None
+            if batch:
+                timeout = max(arrivals[0] + self.max_latency - time.perf_counter(), 0)
+            try:
+                item = pending.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is not None and item is not _EOF:
+                batch.append(item[0])
+                arrivals.append(item[1])
+                if len(batch) < self.batch_size:
+                    continue
+
+            if batch:
+                yield batch, arrivals
+                batch, arrivals = [], []
+            if item is _EOF:
+                if errors:
+                    raise errors[0]
+                return
+
+    def run(self, payloads: Iterable[str], output: TextIO) -> StreamStats:
+        """
+        Classify a stream of payloads and write one decision per line,
+        prefixed by its timestamp.
+
+        Invalid payloads are logged and skipped.
+
+        :param payloads: The stream of payloads.
+        :param output: Where to write the decisions.
+        :return: The statistics of the stream.
+        """
+        for batch, arrivals in self.batches(payloads):
+            valid = [i for i, payload in enumerate(batch) if self.is_valid(payload)]
+            if len(valid) < len(batch):
+                batch = [batch[i] for i in valid]
+                arrivals = [arrivals[i] for i in valid]
+            if not batch:
+                continue
+
+            decisions = self.classify(batch)
+            timestamp = datetime.now().isoformat(timespec="milliseconds")
+            output.writelines(f"{timestamp} {decision}\n" for decision in decisions)
+            output.flush()
+            self.stats.add_batch(arrivals, time.perf_counter())
+
+        return self.stats
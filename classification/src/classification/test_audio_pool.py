@@ -0,0 +1,38 @@
+import numpy as np
+
+from .datasets import Dataset
+from .utils import audio_pool
+from .utils.audio_pool import AudioPool
+from .utils.audio_student import AudioUtil
+
+
+def test_audio_pool_grows():
+    dataset = Dataset()
+    files = dataset.get_class_files("birds")[:3]
+    max_len = int(11025 * 200 / 1000)
+    pool = AudioPool(max_ms=200, max_bytes=2 * 4 * max_len)
+
+    assert len(pool.arena) == 0
+
+    clips = [pool.get(file).copy() for file in files[:2]]
+
+    assert len(pool.arena) == 2
+    np.testing.assert_array_equal(pool.get(files[0]), clips[0])
+
+    pool.get(files[2])  # Replaces the least recently used clip, files[1]
+
+    assert len(pool.arena) == 2
+    assert list(pool.slots) == [files[0], files[2]]
+
+
+def test_add_bg_explicit_pool():
+    dataset = Dataset()
+    pool = AudioPool(max_ms=200)
+    shared = audio_pool.get_pool(11025, 200)
+    n_shared = len(shared)
+    audio = (np.zeros(int(11025 * 0.2)), 11025)
+
+    AudioUtil.add_bg(audio, dataset, max_ms=200, pool=pool)
+
+    assert len(pool) == 1
+    assert len(shared) == n_shared
@@ -0,0 +1,19 @@
+import numpy as np
+
+from .datasets.audio_trimming import trim_silence
+
+
+def test_trim_silence():
+    loud = np.ones(4)
+    quiet = np.full(4, 0.01)
+    audio = np.concatenate([quiet, loud, quiet, loud, 0.5 * loud, [1.0, 1.0]])
+
+    trimmed = trim_silence(audio, 4, threshold=0.4)
+
+    # Quiet frames and the incomplete trailing frame are removed
+    np.testing.assert_array_equal(trimmed, np.concatenate([loud, loud, 0.5 * loud]))
+
+
+def test_trim_silence_only_silence():
+    assert len(trim_silence(np.zeros(100), 10)) == 0
+    assert len(trim_silence(np.ones(5), 10)) == 0
@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from .datasets.augmentation import (
+    AUGMENT_VERSION,
+    MANIFEST,
+    build_augmented,
+    plan_augmentations,
+    read_manifest,
+    recipe_operations,
+)
+
+RECIPE = {"shift": [0.005], "noise": [10, 20]}
+
+
+@pytest.fixture
+def input_folder(tmp_path):
+    rng = np.random.default_rng(0)
+    for name in ("fire_000.wav", "gun_000.wav"):
+        sf.write(tmp_path / name, rng.standard_normal(1000) * 0.1, 11025)
+    return tmp_path
+
+
+def test_recipe_operations():
+    assert recipe_operations(RECIPE) == [
+        ("noise+10", "noise", 10.0),
+        ("noise+20", "noise", 20.0),
+        ("shift+0.005", "shift", 0.005),
+    ]
+    with pytest.raises(ValueError, match="Unknown operation"):
+        recipe_operations({"echo": [1]})
+
+
+def test_build_augmented(input_folder):
+    store = input_folder / f"augmented_v{AUGMENT_VERSION}"
+
+    assert build_augmented(input_folder, RECIPE, n_workers=1) == 6
+    assert len(list(store.glob("*.wav"))) == 6
+    entries = read_manifest(store)
+    assert entries["fire_000_noise+10.wav"]["operation"] == "noise"
+
+    # Everything is up to date
+    assert build_augmented(input_folder, RECIPE, n_workers=1) == 0
+
+    # Only the files of a changed input are redone
+    sf.write(input_folder / "gun_000.wav", np.zeros(1000), 11025)
+    jobs, pending = plan_augmentations(
+        input_folder, recipe_operations(RECIPE), store, read_manifest(store)
+    )
+    assert list(jobs) == [input_folder / "gun_000.wav"]
+    assert len(pending) == 3
+
+    # Files not in the recipe anymore are removed
+    assert build_augmented(input_folder, {"noise": [10]}, n_workers=1) == 1
+    assert sorted(path.name for path in store.glob("*.wav")) == [
+        "fire_000_noise+10.wav",
+        "gun_000_noise+10.wav",
+    ]
+
+
+def test_build_augmented_other_version(input_folder):
+    store = input_folder / f"augmented_v{AUGMENT_VERSION}"
+    store.mkdir()
+    (store / MANIFEST).write_text(json.dumps({"version": -1, "entries": {}}))
+    old_store = input_folder / "augmented_v0"
+    old_store.mkdir()
+
+    assert read_manifest(store) == {}
+
+    build_augmented(input_folder, {"noise": [10]}, n_workers=1)
+    assert old_store.exists()
+
+    build_augmented(input_folder, {"noise": [10]}, n_workers=1, prune=True)
+    assert not old_store.exists()
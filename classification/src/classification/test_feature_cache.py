@@ -0,0 +1,88 @@
+import random
+
+import numpy as np
+import pytest
+
+from .datasets import Dataset
+from .utils.audio_student import Feature_vector_DS
+from .utils.feature_cache import FeatureCache, params_digest
+
+PARAMS = {"Nft": 512, "nmel": 20, "duration": 950}
+
+
+@pytest.fixture
+def audio_file(tmp_path):
+    file = tmp_path / "birds_00.wav"
+    file.write_bytes(b"not really a wav file")
+    return file
+
+
+def test_feature_cache_roundtrip(tmp_path, audio_file):
+    cache = FeatureCache(tmp_path / "cache")
+    fv = np.arange(400, dtype=float)
+
+    assert cache.get(audio_file, PARAMS, seed=0) is None
+
+    cache.put(audio_file, PARAMS, 0, fv)
+
+    np.testing.assert_array_equal(cache.get(audio_file, PARAMS, seed=0), fv)
+    assert cache.get(audio_file, PARAMS, seed=1) is None
+    assert cache.get(audio_file, {**PARAMS, "nmel": 16}, seed=0) is None
+
+    audio_file.write_bytes(b"another content")
+
+    assert cache.get(audio_file, PARAMS, seed=0) is None
+
+
+def test_feature_cache_eviction(tmp_path, audio_file):
+    fv = np.zeros(100)
+    entry_size = 128 + fv.nbytes  # .npy header + data
+    cache = FeatureCache(tmp_path / "cache", max_bytes=3 * entry_size)
+
+    for seed in range(4):
+        cache.put(audio_file, PARAMS, seed, fv)
+
+    assert cache.get(audio_file, PARAMS, seed=0) is None
+    assert cache.get(audio_file, PARAMS, seed=3) is not None
+
+
+def test_feature_cache_invalidate(tmp_path, audio_file):
+    cache = FeatureCache(tmp_path / "cache")
+    other_params = {**PARAMS, "Nft": 256}
+
+    cache.put(audio_file, PARAMS, 0, np.ones(10))
+    cache.put(audio_file, other_params, 0, np.ones(10))
+    cache.invalidate(PARAMS)
+
+    assert cache.get(audio_file, PARAMS, seed=0) is None
+    assert cache.get(audio_file, other_params, seed=0) is not None
+
+    cache.invalidate()
+
+    assert cache.get(audio_file, other_params, seed=0) is None
+
+
+def test_feature_cache_overwrite(tmp_path, audio_file):
+    cache = FeatureCache(tmp_path / "cache")
+    cache.put(audio_file, PARAMS, 0, np.ones(10))
+    size = cache._size
+
+    cache.put(audio_file, PARAMS, 0, np.ones(10))
+
+    assert cache._size == size
+
+
+def test_feature_vector_ds_seed():
+    myds = Feature_vector_DS(Dataset(), duration=200, data_aug=["noise"], seed=0)
+    state = random.getstate(), np.random.get_state()[1].copy()
+
+    fv = myds.compute_features(("birds", 0))
+
+    assert random.getstate() == state[0]
+    np.testing.assert_array_equal(np.random.get_state()[1], state[1])
+    np.testing.assert_array_equal(myds.compute_features(("birds", 0)), fv)
+
+    params = myds.dsp_params()
+    myds.aug_params["noise"] = {"sigma": 0.5}
+
+    assert params_digest(myds.dsp_params()) != params_digest(params)
@@ -0,0 +1,34 @@
+import numpy as np
+
+from .datasets import Dataset
+from .utils.feature_extraction import extract_features
+
+KWARGS = {
+    "classnames": ["birds", "fire"],
+    "indices": [0, 1],
+    "data_augs": ([], ["noise"]),
+    "duration": 200,
+}
+
+
+def test_extract_features_pooled():
+    dataset = Dataset()
+
+    X, y = extract_features(dataset, n_workers=1, **KWARGS)
+    X_pooled, y_pooled = extract_features(dataset, n_workers=2, chunksize=1, **KWARGS)
+
+    assert X.shape[0] == 2 * 2 * 2
+    np.testing.assert_array_equal(X_pooled, X)
+    np.testing.assert_array_equal(y_pooled, y)
+
+
+def test_extract_features_empty(tmp_path):
+    X, y = extract_features(Dataset(), indices=[], n_workers=1, duration=200)
+
+    assert X.shape == (0, 20 * int(200 * 11025 / (1e3 * 512)))
+    assert len(y) == 0
+
+    X, _ = extract_features(
+        Dataset(), indices=[], out=tmp_path / "X.npy", n_workers=1, duration=200
+    )
+    assert X.shape[0] == 0
@@ -0,0 +1,29 @@
+import numpy as np
+
+from .utils import payload_to_melvecs
+from .utils.mel_engine import melspectrogram_batch, to_mcu_layout
+
+
+def test_melspectrogram_batch():
+    sigs = np.random.default_rng(0).standard_normal((3, 11025))
+
+    melspecs = melspectrogram_batch(sigs, Nmel=20, Nft=512)
+
+    assert melspecs.shape == (3, 20, 11025 // 512)
+    for sig, melspec in zip(sigs, melspecs):
+        np.testing.assert_allclose(melspectrogram_batch(sig), melspec)
+
+    np.testing.assert_allclose(
+        melspectrogram_batch(sigs, dtype=np.float32), melspecs, rtol=1e-4
+    )
+
+
+def test_to_mcu_layout():
+    sig = np.random.default_rng(0).standard_normal(20 * 512)
+    melspec = melspectrogram_batch(sig, Nmel=16, mcu=True)
+    scale = np.max(melspec)
+
+    payload = to_mcu_layout(melspec, scale).astype(">i2").tobytes().hex()
+    melvecs = payload_to_melvecs(payload, melvec_length=16, n_melvecs=20)
+
+    np.testing.assert_allclose(melvecs * scale, melspec, atol=scale / 2**15)
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from .utils.quantization import mu_law_bins, quantize, uniform_bins
+
+
+def quantize_bruteforce(sig, bins):
+    xmin, xmax = np.min(sig), np.max(sig)
+    normed = (sig - xmin) / (xmax - xmin)
+    bests = np.argmin((normed[..., None] - bins) ** 2, axis=-1)
+    return xmin + (xmax - xmin) * bins[bests]
+
+
+@pytest.mark.parametrize("n", [1, 3, 8])
+@pytest.mark.parametrize("shape", [(1000,), (20, 50)], ids=("1D", "2D"))
+def test_quantize_uniform(n, shape):
+    rng = np.random.default_rng(n)
+    sig = rng.standard_normal(shape)
+
+    np.testing.assert_allclose(
+        quantize(sig, n), quantize_bruteforce(sig, uniform_bins(n)), atol=1e-12
+    )
+
+
+def test_quantize_custom_bins():
+    rng = np.random.default_rng(0)
+    sig = rng.standard_normal((20, 50))
+    bins = mu_law_bins(4)
+
+    np.testing.assert_allclose(
+        quantize(sig, bins=bins), quantize_bruteforce(sig, bins), atol=1e-12
+    )
+
+
+def test_quantize_constant():
+    sig = np.full(10, 3.0)
+
+    np.testing.assert_array_equal(quantize(sig), sig)
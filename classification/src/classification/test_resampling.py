@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from .utils.resampling import resample, resample_batch, resample_stream
+
+
+@pytest.mark.parametrize(
+    ("sr", "newsr"),
+    [(44100, 11025), (44100, 10200), (48000, 11025), (11025, 44100), (11025, 11025)],
+)
+def test_resample_stream(sr, newsr):
+    sig = np.random.default_rng(0).standard_normal(100_003)
+
+    expected = resample(sig, sr, newsr)
+    chunks = np.array_split(sig, 17)
+    streamed = np.concatenate(list(resample_stream(chunks, sr, newsr, min_block=1000)))
+
+    assert len(expected) == -(-len(sig) * newsr // sr)
+    np.testing.assert_allclose(streamed, expected)
+
+
+def test_resample_batch():
+    rng = np.random.default_rng(0)
+    sigs = [rng.standard_normal(n) for n in (1000, 5003, 777)]
+
+    for resampled, sig in zip(resample_batch(sigs, 44100, 10200), sigs):
+        np.testing.assert_allclose(resampled, resample(sig, 44100, 10200))
@@ -0,0 +1,56 @@
+import io
+
+import numpy as np
+import pytest
+
+from .streaming import StreamingClassifier
+from .test_utils import PAYLOAD_16_20
+from .utils import payload_to_melvecs
+
+
+class FirstFeatureModel:
+    def predict(self, X):
+        return X[:, 0]
+
+
+def test_streaming_classifier():
+    classifier = StreamingClassifier(
+        FirstFeatureModel(), 16, 20, batch_size=4, max_latency=10
+    )
+    output = io.StringIO()
+    stats = classifier.run([PAYLOAD_16_20] * 10, output)
+
+    assert stats.packets == 10
+    assert stats.batches == 3
+    expected = payload_to_melvecs(PAYLOAD_16_20, 16, 20).flatten()[0]
+    lines = output.getvalue().splitlines()
+    assert len(lines) == 10
+    assert all(np.isclose(float(line.split()[1]), expected) for line in lines)
+
+
+def test_streaming_classifier_invalid_payloads():
+    classifier = StreamingClassifier(
+        FirstFeatureModel(), 16, 20, batch_size=4, max_latency=10
+    )
+    output = io.StringIO()
+    payloads = [PAYLOAD_16_20, "zz", PAYLOAD_16_20[:-4], PAYLOAD_16_20]
+    stats = classifier.run(payloads, output)
+
+    assert stats.packets == 2
+    assert len(output.getvalue().splitlines()) == 2
+
+
+def test_streaming_classifier_reader_error():
+    def payloads():
+        yield PAYLOAD_16_20
+        raise OSError("stream closed")
+
+    classifier = StreamingClassifier(
+        FirstFeatureModel(), 16, 20, batch_size=4, max_latency=10
+    )
+    output = io.StringIO()
+    with pytest.raises(OSError, match="stream closed"):
+        classifier.run(payloads(), output)
+
+    # The pending payload is classified before the error is raised
+    assert len(output.getvalue().splitlines()) == 1
@@ -1,6 +1,7 @@
+import numpy as np
 import pytest
 
-from .utils import payload_to_melvecs
+from .utils import payload_to_melvecs, payloads_to_melvecs
 
 PAYLOAD_16_20 = "000a000d00150006000000010001000000000000000000000000000000000000000800190040001e00030009000a0004000000000000000000000000000000000005000f004e001d000300060009000500010000000000000000000000000000000900190033002700050008000b000300000000000000000000000000000000000a00170043002d0007000e000a000b00050001000000000000000000000000000c000e00230027000500060004000400090007000100020000000000000001000d00130038002e000600060001000100020005000300000000000000000000000800180020000b000100010001000000000000000300010000000000000000000b0017004a00220002000600020000000100000001000100000000000000000006000200010001000000000000000000010000000000000000000000000000000600020002000100000000000000000000000000000000000000000000000000060015003b0028000400060003000100000000000100010001000100000000000b0024002200380020001200110017000b000f000c000700050004000400000004000c003f0010000200020001000000000001000000000000000100000000000700090023002f0024001700070004000600030002000300020003000200030005001400310022000f000a00030000000300050004000600020002000100000006000b000f000d000200000000000000000000000100010000000000000000000b00040001000100000000000000000000000000000000000000000000000000050004000100010000000000000000000000020001000200000000000000000005000300010000000000000000000100010002000000000000000000000000"
 
@@ -19,3 +20,18 @@ def test_payload_to_melvecs(payload, melvec_length, n_melvecs):
     melvecs = payload_to_melvecs(payload, melvec_length, n_melvecs)
 
     assert melvecs.shape == (melvec_length, n_melvecs)
+
+
+def test_payloads_to_melvecs():
+    payloads = [PAYLOAD_16_20, PAYLOAD_16_20[::-1]]
+    melvecs = payloads_to_melvecs(payloads, 16, 20)
+
+    assert melvecs.shape == (2, 20, 16)
+    for payload, batch in zip(payloads, melvecs):
+        np.testing.assert_array_equal(batch, payload_to_melvecs(payload, 16, 20).T)
+        np.testing.assert_array_equal(
+            batch, payloads_to_melvecs([bytes.fromhex(payload)], 16, 20)[0]
+        )
+
+    with pytest.raises(ValueError):
+        payloads_to_melvecs([PAYLOAD_16_20, PAYLOAD_20_20], 16, 20)
@@ -1,19 +1,123 @@
-import struct
+from typing import Iterable, Optional, TextIO, Union
 
 import numpy as np
 
 from common.defaults import MELVEC_LENGTH, N_MELVECS
 
+Payload = Union[str, bytes]
+
+Q15_DTYPE = np.dtype(">i2")
+"""Data type of the Mel vectors sent by the MCU: big-endian Q15 integers."""
+
+
+def _to_bytes(payload: Payload) -> bytes:
+    if isinstance(payload, str):
+        return bytes.fromhex(payload.strip())
+    return payload
+
+
+def payload_to_q15(
+    payload: Payload, melvec_length: int = MELVEC_LENGTH, n_melvecs: int = N_MELVECS
+) -> np.ndarray:
+    """
+    Convert a payload (hex string or raw bytes) to its Q15 Mel vectors,
+    without copying the decoded bytes.
+
+    :return: A read-only (n_melvecs, melvec_length) view of big-endian int16.
+    """
+    q15 = np.frombuffer(_to_bytes(payload), dtype=Q15_DTYPE)
+    return q15.reshape(n_melvecs, melvec_length)
+
 
 def payload_to_melvecs(
-    payload: str, melvec_length: int = MELVEC_LENGTH, n_melvecs: int = N_MELVECS
+    payload: Payload, melvec_length: int = MELVEC_LENGTH, n_melvecs: int = N_MELVECS
 ) -> np.ndarray:
     """Convert a payload string to a melvecs array."""
-    fmt = f"!{melvec_length}h"
-    buffer = bytes.fromhex(payload.strip())
-    unpacked = struct.iter_unpack(fmt, buffer)
-    melvecs_q15int = np.asarray(list(unpacked), dtype=np.int16)
-    melvecs = melvecs_q15int.astype(float) / 32768  # 32768 = 2 ** 15
-    melvecs = np.rot90(melvecs, k=-1, axes=(0, 1))
-    melvecs = np.fliplr(melvecs)
+    melvecs = payload_to_q15(payload, melvec_length, n_melvecs) / 32768  # 2 ** 15
+    return melvecs.T
+
+
+def payloads_to_melvecs(
+    payloads: Iterable[Payload],
+    melvec_length: int = MELVEC_LENGTH,
+    n_melvecs: int = N_MELVECS,
+    dtype=np.float64,
+) -> np.ndarray:
+    """
+    Convert many payloads at once, with a single hex decoding pass.
+
+    Unlike :func:`payload_to_melvecs`, Mel vectors are kept frame-major,
+    as sent by the MCU.
+
+    :param payloads: The payloads, as hex strings or raw bytes.
+    :param melvec_length: The length of one Mel vector.
+    :param n_melvecs: The number of Mel vectors per payload.
+    :param dtype: The floating point type of the result.
+    :return: The (n_packets, n_melvecs, melvec_length) Mel vectors.
+    """
+    n_bytes = 2 * melvec_length * n_melvecs
+    payloads = list(payloads)
+    if all(isinstance(payload, str) for payload in payloads):
+        # One call to fromhex is much faster than one per payload
+        payloads = [payload.strip() for payload in payloads]
+        lengths = [len(payload) // 2 for payload in payloads]
+        blob = bytes.fromhex("".join(payloads))
+    else:
+        payloads = [_to_bytes(payload) for payload in payloads]
+        lengths = [len(payload) for payload in payloads]
+        blob = b"".join(payloads)
+
+    for i, length in enumerate(lengths):
+        if length != n_bytes:
+            raise ValueError(
+                f"Payload {i} has {length} bytes, expected {n_bytes} "
+                f"({n_melvecs} Mel vectors of length {melvec_length})."
+            )
+
+    q15 = np.frombuffer(blob, dtype=Q15_DTYPE)
+    q15 = q15.reshape(len(payloads), n_melvecs, melvec_length)
+    melvecs = q15.astype(dtype)
+    melvecs /= 32768
     return melvecs
+
+
+def read_payloads(file: TextIO, prefix: Optional[str] = None) -> Iterable[str]:
+    """
+    Yield the payloads contained in a text stream, e.g., a log file.
+
+    :param file: The stream, with one payload per line.
+    :param prefix: If given, only keep the lines containing this prefix,
+        and return what follows it.
+    """
+    for line in file:
+        if prefix is not None:
+            start = line.find(prefix)
+            if start < 0:
+                continue
+            line = line[start + len(prefix) :]
+        line = line.strip()
+        if line:
+            yield line
+
+
+def load_payload_log(
+    path,
+    melvec_length: int = MELVEC_LENGTH,
+    n_melvecs: int = N_MELVECS,
+    prefix: Optional[str] = None,
+    dtype=np.float64,
+) -> np.ndarray:
+    """
+    Decode all the payloads of a recorded session.
+
+    :param path: The path to the log file.
+    :param melvec_length: The length of one Mel vector.
+    :param n_melvecs: The number of Mel vectors per payload.
+    :param prefix: See :func:`read_payloads`.
+    :param dtype: The floating point type of the result.
+    :return: The (n_packets, n_melvecs, melvec_length) Mel vectors.
+    """
+    with open(path) as file:
+        return payloads_to_melvecs(
+            read_payloads(file, prefix), melvec_length, n_melvecs, dtype
+        )
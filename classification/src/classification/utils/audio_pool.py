@@ -0,0 +1,148 @@
+import random
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+from numpy import ndarray
+
+from . import resampling
+
+# -----------------------------------------------------------------------------
+"""
+Synthesis of the classes in :
+- AudioPool : in-memory pool of decoded and resampled clips, used by mixing augmentations.
+"""
+# -----------------------------------------------------------------------------
+
+
+class AudioPool:
+    """
+    Pool of decoded clips, resampled to `sr` and truncated to `max_ms`.
+
+    Clips are stored in a single float32 arena of fixed-size slots, and the
+    least recently used clip is replaced when the arena is full. This avoids
+    reading and resampling the same files again and again when mixing them
+    into other sounds.
+
+    The arena grows (doubling its number of slots) as clips are added,
+    up to `max_bytes`, so that it does not hold memory it does not use.
+
+    :param sr: The sampling frequency of the clips.
+    :param max_ms: The maximum duration of the clips, in milliseconds.
+    :param max_bytes: The maximum size of the arena.
+    """
+
+    def __init__(
+        self, sr: int = 11025, max_ms: float = 5000, max_bytes: int = 256 * 2**20
+    ):
+        self.sr = sr
+        self.max_ms = max_ms
+        self.max_len = int(sr * max_ms / 1000)
+        self.max_slots = max(max_bytes // (4 * max(self.max_len, 1)), 1)
+        self.arena = np.empty((0, self.max_len), dtype=np.float32)
+        self.lengths = np.zeros(0, dtype=np.int64)
+        self.slots: "OrderedDict[Path, int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """
+        Return the number of clips in the pool.
+        """
+        return len(self.slots)
+
+    def _grow(self) -> None:
+        n_slots = min(max(2 * len(self.arena), 16), self.max_slots)
+        arena = np.empty((n_slots, self.max_len), dtype=np.float32)
+        arena[: len(self.arena)] = self.arena
+        lengths = np.zeros(n_slots, dtype=np.int64)
+        lengths[: len(self.lengths)] = self.lengths
+        self.arena, self.lengths = arena, lengths
+
+    def _load(self, audio_file: Path) -> ndarray:
+        sig, sr = sf.read(audio_file, dtype="float32")
+        if sig.ndim > 1:
+            sig = sig[:, 0]
+        if sr != self.sr:
+            sig = resampling.resample(sig, sr, self.sr)
+        return sig[: self.max_len]
+
+    def get(self, audio_file: Path) -> ndarray:
+        """
+        Return the decoded, resampled and truncated clip, as a read-only view.
+
+        The view is only valid until the clip is replaced in the pool,
+        copy it if you need to keep it.
+
+        :param audio_file: The path to the audio file.
+        """
+        audio_file = Path(audio_file)
+        slot = self.slots.get(audio_file)
+
+        if slot is not None:
+            self.slots.move_to_end(audio_file)
+            self.hits += 1
+        else:
+            self.misses += 1
+            if len(self.slots) == len(self.arena) < self.max_slots:
+                self._grow()
+            if len(self.slots) < len(self.arena):
+                slot = len(self.slots)
+            else:
+                _, slot = self.slots.popitem(last=False)
+
+            sig = self._load(audio_file)
+            self.arena[slot, : len(sig)] = sig
+            self.lengths[slot] = len(sig)
+            self.slots[audio_file] = slot
+
+        view = self.arena[slot, : self.lengths[slot]]
+        view.flags.writeable = False
+        return view
+
+    def draw(self, dataset, rng: Optional[np.random.Generator] = None) -> ndarray:
+        """
+        Draw a clip uniformly at random from the dataset, and zero-pad it
+        at a random position to `max_ms`.
+
+        :param dataset: The dataset to sample from.
+        :param rng: The random generator, defaults to the global `random` module.
+        :return: The padded clip, as a new float64 array.
+        """
+
+        def choice(seq):
+            return random.choice(seq) if rng is None else seq[rng.integers(len(seq))]
+
+        cls = choice(dataset.list_classes())
+        file = choice(dataset.get_class_files(cls))
+        clip = self.get(file)
+
+        # Pad with 0s at a random position, as done by AudioUtil.pad_trunc
+        sig = np.zeros(self.max_len)
+        begin = 0
+        if len(clip) < self.max_len:
+            last = self.max_len - len(clip)
+            begin = (
+                random.randint(0, last) if rng is None else int(rng.integers(last + 1))
+            )
+        sig[begin : begin + len(clip)] = clip
+        return sig
+
+
+_pools: Dict[Tuple[int, float], AudioPool] = {}
+
+
+def get_pool(sr: int = 11025, max_ms: float = 5000) -> AudioPool:
+    """
+    Return the pool shared by all mixing augmentations of this process,
+    for a given sampling frequency and duration.
+
+    :param sr: The sampling frequency of the clips.
+    :param max_ms: The maximum duration of the clips, in milliseconds.
+    """
+    key = (sr, max_ms)
+    if key not in _pools:
+        _pools[key] = AudioPool(sr, max_ms)
+    return _pools[key]
@@ -1,15 +1,16 @@
+import copy
+import hashlib
 import random
-from typing import Tuple
+from typing import Optional, Tuple
 
-import librosa
 import matplotlib.pyplot as plt
 import numpy as np
-import sounddevice as sd
 import soundfile as sf
 from numpy import ndarray
 from scipy.signal import fftconvolve
-import scipy.signal as sg
 
+from . import audio_pool, mel_engine, resampling
+from .feature_cache import FeatureCache
 
 
 # -----------------------------------------------------------------------------
@@ -21,6 +22,18 @@ Synthesis of the classes in :
 # -----------------------------------------------------------------------------
 
 
+def _random(rng: Optional[np.random.Generator]) -> float:
+    """Uniform float in [0, 1), from `rng`, or the global `random` module if None."""
+    return random.random() if rng is None else rng.random()
+
+
+def _randint(rng: Optional[np.random.Generator], low: int, high: int) -> int:
+    """Integer in [low, high], from `rng`, or the global `random` module if None."""
+    if rng is None:
+        return random.randint(low, high)
+    return int(rng.integers(low, high + 1))
+
+
 class AudioUtil:
     """
     Define a new class with util functions to process an audio signal.
@@ -44,6 +57,9 @@ class AudioUtil:
 
         :param audio: The audio signal as a tuple (signal, sample_rate).
         """
+        # Imported here, as it needs an audio device library (PortAudio)
+        import sounddevice as sd
+
         sig, sr = audio
         sd.play(sig, sr)
 
@@ -62,21 +78,23 @@ class AudioUtil:
 
     def resample(audio, newsr=11025) -> Tuple[ndarray, int]:
         """
-        Resample to target sampling frequency.
+        Resample to target sampling frequency, with rational polyphase filtering.
 
         :param audio: The audio signal as a tuple (signal, sample_rate).
         :param newsr: The target sampling frequency.
         """
-        resig = sg.resample(audio[0], len(audio[0])//(audio[1]//newsr))
+        sig, sr = audio
+        resig = resampling.resample(sig, sr, newsr)
 
         return (resig, newsr)
 
-    def pad_trunc(audio, max_ms) -> Tuple[ndarray, int]:
+    def pad_trunc(audio, max_ms, rng=None) -> Tuple[ndarray, int]:
         """
         Pad (or truncate) the signal to a fixed length 'max_ms' in milliseconds.
 
         :param audio: The audio signal as a tuple (signal, sample_rate).
         :param max_ms: The target length in milliseconds.
+        :param rng: The random generator, defaults to the global one.
         """
         sig, sr = audio
         sig_len = len(sig)
@@ -90,7 +108,7 @@ class AudioUtil:
 
         elif sig_len < max_len:
             # Length of padding to add at the beginning and end of the signal
-            pad_begin_len = random.randint(0, max_len - sig_len)
+            pad_begin_len = _randint(rng, 0, max_len - sig_len)
             pad_end_len = max_len - sig_len - pad_begin_len
 
             # Pad with 0s
@@ -102,41 +120,44 @@ class AudioUtil:
 
         return (sig, sr)
 
-    def time_shift(audio, shift_limit=0.4) -> Tuple[ndarray, int]:
+    def time_shift(audio, shift_limit=0.4, rng=None) -> Tuple[ndarray, int]:
         """
         Shifts the signal to the left or right by some percent. Values at the end are 'wrapped around' to the start of the transformed signal.
 
         :param audio: The audio signal as a tuple (signal, sample_rate).
         :param shift_limit: The percentage (between 0.0 and 1.0) by which to circularly shift the signal.
+        :param rng: The random generator, defaults to the global one.
         """
         sig, sr = audio
         sig_len = len(sig)
-        shift_amt = int(random.random() * shift_limit * sig_len)
+        shift_amt = int(_random(rng) * shift_limit * sig_len)
         return (np.roll(sig, shift_amt), sr)
 
-    def scaling(audio, scaling_limit=5) -> Tuple[ndarray, int]:
+    def scaling(audio, scaling_limit=5, rng=None) -> Tuple[ndarray, int]:
         """
         Augment the audio signal by scaling it by a random factor.
 
         :param audio: The audio signal as a tuple (signal, sample_rate).
         :param scaling_limit: The maximum scaling factor.
+        :param rng: The random generator, defaults to the global one.
         """
         sig, sr = audio
         
-        scaling_factor = random.random()*scaling_limit
+        scaling_factor = _random(rng)*scaling_limit
         sig = sig * scaling_factor
         return (sig, sr)
 
-    def add_noise(audio, sigma=0.05) -> Tuple[ndarray, int]:
+    def add_noise(audio, sigma=0.05, rng=None) -> Tuple[ndarray, int]:
         """
         Augment the audio signal by adding gaussian noise.
 
         :param audio: The audio signal as a tuple (signal, sample_rate).
         :param sigma: Standard deviation of the gaussian noise.
+        :param rng: The random generator, defaults to the global one.
         """
         sig, sr = audio
 
-        noise = np.random.normal(0, sigma, len(sig))
+        noise = (np.random if rng is None else rng).normal(0, sigma, len(sig))
         sig = sig + noise
 
         return (sig, sr)
@@ -177,7 +198,13 @@ class AudioUtil:
         return (sig, sr)
 
     def add_bg(
-        audio, dataset, num_sources=1, max_ms=5000, amplitude_limit=0.1
+        audio,
+        dataset,
+        num_sources=1,
+        max_ms=5000,
+        amplitude_limit=0.1,
+        pool=None,
+        rng=None,
     ) -> Tuple[ndarray, int]:
         """
         Adds up sounds uniformly chosen at random to audio.
@@ -187,17 +214,17 @@ class AudioUtil:
         :param num_sources: The number of sounds to add.
         :param max_ms: The maximum duration of the sounds to add.
         :param amplitude_limit: The maximum amplitude of the added sounds.
+        :param pool: The pool of decoded sounds to draw from, defaults to
+            the pool shared by this process for (sample_rate, max_ms).
+        :param rng: The random generator, defaults to the global one.
         """
         audio = (audio[0].copy(), audio[1])
         sig, sr = audio
+        if pool is None:
+            pool = audio_pool.get_pool(sr, max_ms)
 
         for _ in range(num_sources):
-            cls = random.choice(dataset.list_classes())
-            file = random.choice(dataset.get_class_files(cls))
-            bg_audio = AudioUtil.open(file)
-            bg_audio = AudioUtil.resample(bg_audio, sr)
-            bg_audio = AudioUtil.pad_trunc(bg_audio, max_ms)
-            bg_audio = bg_audio[0] * amplitude_limit
+            bg_audio = pool.draw(dataset, rng) * amplitude_limit
             sig += bg_audio[: len(sig)]
 
         return (sig, sr)
@@ -210,22 +237,8 @@ class AudioUtil:
         :param Nft: The number of points of the FFT.
         :param fs2: The sampling frequency.
         """
-        # Crop the signal such that its length is a multiple of Nft
-        y = audio[0][: len(audio[0]) - len(audio[0]) % Nft]
-    
-        # Reshape the signal into segments of length Nft
-        audiomat = np.reshape(y, (-1, Nft))
-    
-        # Apply a Hamming window to each segment
-        audioham = audiomat * np.hamming(Nft)
-    
-        # Flatten the windowed signal back into a 1D array
-        z = np.reshape(audioham, -1)
-    
-        # Compute the magnitude of the STFT
-        stft = np.abs(librosa.stft(z, n_fft=Nft, hop_length=Nft, window="rect", center=False))
-    
-        return stft
+        # Magnitude of the FFT of each Hamming-windowed segment of Nft samples
+        return mel_engine.specgram_batch(audio[0], Nft)
 
     def get_hz2mel(fs2=11025, Nft=512, Nmel=20) -> ndarray:
         """
@@ -235,11 +248,7 @@ class AudioUtil:
         :param Nft: The number of points of the FFT.
         :param Nmel: The number of mel bands.
         """
-        mels = librosa.filters.mel(sr=fs2, n_fft=Nft, n_mels=Nmel)
-        mels = mels[:, :-1]
-        mels = mels / np.max(mels)
-
-        return mels
+        return np.array(mel_engine.mel_filterbank(fs2, Nft, Nmel, mcu=True))
 
     def melspectrogram(audio, Nmel=20, Nft=512, fs2=11025) -> ndarray:
         """
@@ -250,26 +259,15 @@ class AudioUtil:
         :param Nft: The number of points of the FFT.
         :param fs2: The sampling frequency.
         """
-        # Obtain the Hz-to-Mel transformation matrix
-        mels = librosa.filters.mel(sr=fs2, n_fft=Nft, n_mels=Nmel)
-    
-        # Normalize the Mel filter matrix so that its maximum value is 1
-        mels = mels / np.max(mels)
-    
         # Resample the input signal to the downsampled rate
         y = AudioUtil.resample(audio, fs2)
-    
-        # Compute the STFT of the resampled signal
-        stft = AudioUtil.specgram(y, Nft)
-    
-        # Apply the Mel filter bank to the STFT to obtain the Mel spectrogram
-        melspec = np.matmul(mels, stft)
-    
-        return melspec
+
+        # Apply the (cached) Mel filter bank to the STFT of the resampled signal
+        return mel_engine.melspectrogram_batch(y[0], Nmel=Nmel, Nft=Nft, fs2=fs2)
 
 
     def spectro_aug_timefreq_masking(
-        spec, max_mask_pct=0.1, n_freq_masks=1, n_time_masks=1
+        spec, max_mask_pct=0.1, n_freq_masks=1, n_time_masks=1, rng=None
     ) -> ndarray:
         """
         Augment the Spectrogram by masking out some sections of it in both the frequency dimension (ie. horizontal bars) and the time dimension (vertical bars) to prevent overfitting and to help the model generalise better. The masked sections are replaced with the mean value.
@@ -279,21 +277,23 @@ class AudioUtil:
         :param max_mask_pct: The maximum percentage of the spectrogram to mask out.
         :param n_freq_masks: The number of frequency masks to apply.
         :param n_time_masks: The number of time masks to apply.
+        :param rng: The random generator, defaults to the global one.
         """
         Nmel, n_steps = spec.shape
         mask_value = np.mean(spec)
         aug_spec = np.copy(spec)  # avoids modifying spec
+        randint = np.random.randint if rng is None else rng.integers
 
         freq_mask_param = max_mask_pct * Nmel
         for _ in range(n_freq_masks):
-            height = int(np.round(random.random() * freq_mask_param))
-            pos_f = np.random.randint(Nmel - height)
+            height = int(np.round(_random(rng) * freq_mask_param))
+            pos_f = randint(Nmel - height)
             aug_spec[pos_f : pos_f + height, :] = mask_value
 
         time_mask_param = max_mask_pct * n_steps
         for _ in range(n_time_masks):
-            width = int(np.round(random.random() * time_mask_param))
-            pos_t = np.random.randint(n_steps - width)
+            width = int(np.round(_random(rng) * time_mask_param))
+            pos_t = randint(n_steps - width)
             aug_spec[:, pos_t : pos_t + width] = mask_value
 
         return aug_spec
@@ -305,6 +305,16 @@ class Feature_vector_DS:
     Dataset of Feature vectors.
     """
 
+    #: Parameters of each data augmentation, also part of the cache key
+    AUG_PARAMS = {
+        "add_bg": {"num_sources": 1, "amplitude_limit": 0.1},
+        "echo": {"nechos": 2},
+        "noise": {"sigma": 0.05},
+        "scaling": {"scaling_limit": 5},
+        "time_shift": {"shift_limit": 0.5},
+        "aug_sgram": {"max_mask_pct": 0.1, "n_freq_masks": 2, "n_time_masks": 2},
+    }
+
     def __init__(
         self,
         dataset,
@@ -315,7 +325,27 @@ class Feature_vector_DS:
         normalize=False,
         data_aug=None,
         pca=None,
+        cache: Optional[FeatureCache] = None,
+        seed: Optional[int] = None,
     ):
+        """
+        :param dataset: The dataset of sound files.
+        :param Nft: The number of points of the FFT.
+        :param nmel: The number of mel bands.
+        :param duration: The duration (in ms) of each sound.
+        :param shift_pct: The maximum random time shift, as a fraction of the duration.
+        :param normalize: Whether to normalize the feature vectors.
+        :param data_aug: The data augmentation(s) to apply.
+        :param pca: A fitted PCA to apply on the feature vectors.
+        :param cache: If given, feature vectors are read from (and written to)
+            this on-disk cache instead of being recomputed on every access.
+        :param seed: If given, the random shift and augmentations of each item
+            are seeded from this value and the item, making them deterministic.
+            Required when using a cache.
+        """
+        if cache is not None and seed is None:
+            raise ValueError("A seed is required to cache random feature vectors.")
+
         self.dataset = dataset
         self.Nft = Nft
         self.nmel = nmel
@@ -333,6 +363,9 @@ class Feature_vector_DS:
             self.duration * self.sr / (1e3 * self.Nft)
         )  # number of columns in melspectrogram
         self.pca = pca
+        self.cache = cache
+        self.seed = seed
+        self.aug_params = copy.deepcopy(self.AUG_PARAMS)
 
     def __len__(self) -> int:
         """
@@ -340,60 +373,114 @@ class Feature_vector_DS:
         """
         return len(self.dataset) * self.data_aug_factor
 
-    def get_audiosignal(self, cls_index: Tuple[str, int]) -> Tuple[ndarray, int]:
+    def get_audiosignal(
+        self, cls_index: Tuple[str, int], rng: Optional[np.random.Generator] = None
+    ) -> Tuple[ndarray, int]:
         """
         Get temporal signal of i'th item in dataset.
 
         :param cls_index: Class name and index.
+        :param rng: The random generator, defaults to the global one.
         """
         audio_file = self.dataset[cls_index]
         aud = AudioUtil.open(audio_file)
         aud = AudioUtil.resample(aud, self.sr)
-        aud = AudioUtil.time_shift(aud, self.shift_pct)
-        aud = AudioUtil.pad_trunc(aud, self.duration)
+        aud = AudioUtil.time_shift(aud, self.shift_pct, rng=rng)
+        aud = AudioUtil.pad_trunc(aud, self.duration, rng=rng)
         if self.data_aug is not None:
+            params = self.aug_params
             if "add_bg" in self.data_aug:
                 aud = AudioUtil.add_bg(
                     aud,
                     self.dataset,
-                    num_sources=1,
                     max_ms=self.duration,
-                    amplitude_limit=0.1,
+                    rng=rng,
+                    **params["add_bg"],
                 )
             if "echo" in self.data_aug:
-                aud = AudioUtil.echo(aud)
+                aud = AudioUtil.echo(aud, **params["echo"])
             if "noise" in self.data_aug:
-                aud = AudioUtil.add_noise(aud, sigma=0.05)
+                aud = AudioUtil.add_noise(aud, rng=rng, **params["noise"])
             if "scaling" in self.data_aug:
-                aud = AudioUtil.scaling(aud, scaling_limit=5)
+                aud = AudioUtil.scaling(aud, rng=rng, **params["scaling"])
             if "time_shift" in self.data_aug:
-                aud = AudioUtil.time_shift(aud, 0.5)
+                aud = AudioUtil.time_shift(aud, rng=rng, **params["time_shift"])
 
         # aud = AudioUtil.normalize(aud, target_dB=10)
         aud = (aud[0] / np.max(np.abs(aud[0])), aud[1])
         return aud
 
+    def dsp_params(self) -> dict:
+        """
+        Parameters that determine the feature vectors, used as cache key.
+        """
+        return {
+            "Nft": self.Nft,
+            "nmel": self.nmel,
+            "duration": self.duration,
+            "sr": self.sr,
+            "shift_pct": self.shift_pct,
+            "data_aug": {
+                str(aug): self.aug_params.get(str(aug), {})
+                for aug in self.data_aug
+                if aug is not None
+            },
+        }
+
+    def item_seed(self, cls_index: Tuple[str, int]) -> int:
+        """
+        Get the random seed of i'th item, derived from the dataset seed.
+
+        :param cls_index: Class name and index.
+        """
+        cls, index = cls_index
+        digest = hashlib.sha256(f"{self.seed}:{cls}:{index}".encode()).digest()
+        return int.from_bytes(digest[:4], "little")
+
     def __getitem__(self, cls_index: Tuple[str, int]) -> Tuple[ndarray, int]:
         """
         Get i'th item in dataset.
 
         :param cls_index: Class name and index.
         """
-        aud = self.get_audiosignal(cls_index)
+        if self.cache is not None:
+            audio_file = self.dataset[cls_index]
+            params = self.dsp_params()
+            seed = self.item_seed(cls_index)
+            fv = self.cache.get(audio_file, params, seed)
+            if fv is None:
+                fv = self.compute_features(cls_index)
+                self.cache.put(audio_file, params, seed, fv)
+        else:
+            fv = self.compute_features(cls_index)
+
+        if self.normalize:
+            fv = fv / np.linalg.norm(fv)
+        if self.pca is not None:
+            fv = self.pca.transform([fv])[0]
+        return fv
+
+    def compute_features(self, cls_index: Tuple[str, int]) -> ndarray:
+        """
+        Compute the feature vector of i'th item, before normalization and PCA.
+
+        :param cls_index: Class name and index.
+        """
+        # A local generator, so that the random state of other users is not touched
+        rng = None
+        if self.seed is not None:
+            rng = np.random.default_rng(self.item_seed(cls_index))
+
+        aud = self.get_audiosignal(cls_index, rng)
         sgram = AudioUtil.melspectrogram(aud, Nmel=self.nmel, Nft=self.Nft)
         if self.data_aug is not None:
             if "aug_sgram" in self.data_aug:
                 sgram = AudioUtil.spectro_aug_timefreq_masking(
-                    sgram, max_mask_pct=0.1, n_freq_masks=2, n_time_masks=2
+                    sgram, rng=rng, **self.aug_params["aug_sgram"]
                 )
 
         sgram_crop = sgram[:, : self.ncol]
-        fv = sgram_crop.flatten()  # feature vector
-        if self.normalize:
-            fv /= np.linalg.norm(fv)
-        if self.pca is not None:
-            fv = self.pca.transform([fv])[0]
-        return fv
+        return sgram_crop.flatten()  # feature vector
 
     def display(self, cls_index: Tuple[str, int]):
         """
@@ -427,4 +514,20 @@ class Feature_vector_DS:
             self.data_aug_factor += len(self.data_aug)
         else:
             self.data_aug = [self.data_aug]
-            
\ No newline at end of file
+
+    def mod_dsp_params(self, Nft=None, nmel=None, duration=None) -> None:
+        """
+        Modify the DSP parameters, and invalidate the cached feature vectors
+        computed with the previous ones.
+
+        :param Nft: The new number of points of the FFT.
+        :param nmel: The new number of mel bands.
+        :param duration: The new duration (in ms).
+        """
+        if self.cache is not None:
+            self.cache.invalidate(self.dsp_params())
+
+        self.Nft = Nft or self.Nft
+        self.nmel = nmel or self.nmel
+        self.duration = duration or self.duration
+        self.ncol = int(self.duration * self.sr / (1e3 * self.Nft))
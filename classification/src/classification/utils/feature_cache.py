@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from numpy import ndarray
+
+# -----------------------------------------------------------------------------
+"""
+Synthesis of the classes in :
+- FeatureCache : content-addressed, memory-mapped on-disk cache of feature vectors.
+"""
+# -----------------------------------------------------------------------------
+
+CACHE_VERSION = 3
+DEFAULT_CACHE_FOLDER = Path(__file__).parents[1] / "datasets" / ".feature_cache"
+
+
+def params_digest(params: Dict[str, Any]) -> str:
+    """
+    Return a short, stable digest of DSP parameters.
+
+    :param params: JSON-serializable parameters (e.g., Nft, nmel, duration).
+    :return: The hex digest.
+    """
+    blob = json.dumps({"version": CACHE_VERSION, **params}, sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+class FeatureCache:
+    """
+    On-disk cache of feature vectors, keyed by audio file content,
+    DSP parameters and augmentation seed.
+
+    Entries are stored as `.npy` files grouped in one subfolder per set of
+    DSP parameters, and are read back memory-mapped. When the cache grows
+    above `max_bytes`, the least recently used entries are removed.
+
+    :param folder: Where to store the cached features.
+    :param max_bytes: The maximum size of the cache on disk.
+    """
+
+    def __init__(
+        self, folder: Path = DEFAULT_CACHE_FOLDER, max_bytes: int = 1024 * 2**20
+    ):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._file_hashes: Dict[Path, Tuple[int, int, str]] = {}
+        self._size = sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self):
+        return self.folder.glob("*/*.npy")
+
+    def file_hash(self, audio_file: Path) -> str:
+        """
+        Return the SHA-256 digest of a file's content.
+
+        Digests are memoized in memory as long as the file size
+        and modification time do not change.
+
+        :param audio_file: The path to the audio file.
+        """
+        audio_file = Path(audio_file)
+        stat = audio_file.stat()
+        memo = self._file_hashes.get(audio_file)
+        if memo is not None and memo[:2] == (stat.st_size, stat.st_mtime_ns):
+            return memo[2]
+
+        digest = hashlib.sha256()
+        with open(audio_file, "rb") as file:
+            for chunk in iter(lambda: file.read(2**20), b""):
+                digest.update(chunk)
+        hexdigest = digest.hexdigest()
+        self._file_hashes[audio_file] = (stat.st_size, stat.st_mtime_ns, hexdigest)
+        return hexdigest
+
+    def path(self, audio_file: Path, params: Dict[str, Any], seed: int) -> Path:
+        """
+        Return the cache entry path for a given file, set of parameters and seed.
+
+        :param audio_file: The path to the audio file.
+        :param params: The DSP parameters used to compute the features.
+        :param seed: The augmentation seed.
+        """
+        key = f"{self.file_hash(audio_file)[:32]}_{seed}"
+        return self.folder / params_digest(params) / f"{key}.npy"
+
+    def get(
+        self, audio_file: Path, params: Dict[str, Any], seed: int
+    ) -> Optional[ndarray]:
+        """
+        Return the cached features, memory-mapped and read-only, or None.
+
+        :param audio_file: The path to the audio file.
+        :param params: The DSP parameters used to compute the features.
+        :param seed: The augmentation seed.
+        """
+        entry = self.path(audio_file, params, seed)
+        try:
+            features = np.load(entry, mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+
+        os.utime(entry)  # mark as recently used
+        self.hits += 1
+        return features
+
+    def put(
+        self, audio_file: Path, params: Dict[str, Any], seed: int, features: ndarray
+    ) -> None:
+        """
+        Store features in the cache, evicting old entries if needed.
+
+        :param audio_file: The path to the audio file.
+        :param params: The DSP parameters used to compute the features.
+        :param seed: The augmentation seed.
+        :param features: The features to store.
+        """
+        entry = self.path(audio_file, params, seed)
+        entry.parent.mkdir(exist_ok=True)
+        tmp = entry.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as file:
+            np.save(file, np.ascontiguousarray(features))
+        try:
+            old_size = entry.stat().st_size  # overwritten entry
+        except FileNotFoundError:
+            old_size = 0
+        os.replace(tmp, entry)  # atomic, so concurrent readers never see partial files
+
+        self._size += entry.stat().st_size - old_size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_bytes: Optional[int] = None) -> int:
+        """
+        Remove least recently used entries until the cache fits in `target_bytes`.
+
+        :param target_bytes: The size to reach, defaults to 90% of `max_bytes`.
+        :return: The number of removed entries.
+        """
+        if target_bytes is None:
+            target_bytes = int(0.9 * self.max_bytes)
+
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:  # removed by another process
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry))
+        entries.sort()
+
+        size = sum(entry[1] for entry in entries)
+        removed = 0
+        for _, entry_size, entry in entries:
+            if size <= target_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            size -= entry_size
+            removed += 1
+
+        self._size = size
+        return removed
+
+    def invalidate(self, params: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Remove cached features.
+
+        :param params: If given, only remove features computed with these
+            DSP parameters. Otherwise, clear the whole cache.
+        """
+        if params is None:
+            folders = [path for path in self.folder.iterdir() if path.is_dir()]
+        else:
+            folders = [self.folder / params_digest(params)]
+
+        for folder in folders:
+            shutil.rmtree(folder, ignore_errors=True)
+
+        self._size = sum(entry.stat().st_size for entry in self._entries())
@@ -0,0 +1,136 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from numpy import ndarray
+from tqdm import tqdm
+
+from .audio_student import Feature_vector_DS
+
+# -----------------------------------------------------------------------------
+"""
+Synthesis of the functions in :
+- extract_features : compute the feature matrix of a whole dataset with a pool of processes.
+"""
+# -----------------------------------------------------------------------------
+
+# Feature vector datasets of the current worker process, one per augmentation pass
+_worker_datasets: List[Feature_vector_DS] = []
+
+
+def _init_worker(datasets: List[Feature_vector_DS]) -> None:
+    global _worker_datasets
+    _worker_datasets = datasets
+
+
+def _worker_features(task: Tuple[int, str, int]) -> ndarray:
+    aug_pass, cls, index = task
+    return np.asarray(_worker_datasets[aug_pass][cls, index])
+
+
+def _n_features(myds: Feature_vector_DS) -> int:
+    if myds.pca is not None:
+        return myds.pca.n_components_
+    return myds.nmel * myds.ncol
+
+
+def extract_features(
+    dataset,
+    classnames: Optional[Sequence[str]] = None,
+    indices: Optional[Sequence[int]] = None,
+    data_augs: Sequence[Optional[list]] = ([],),
+    out: Optional[Union[str, Path]] = None,
+    n_workers: Optional[int] = None,
+    seed: int = 0,
+    chunksize: int = 8,
+    **kwargs,
+) -> Tuple[ndarray, ndarray]:
+    """
+    Compute the feature matrix of a dataset, fanning files out to a pool of processes.
+
+    Rows are ordered by augmentation pass, then class, then index, i.e., the
+    same layout as the loops over `myds[classname, idx]` in the notebooks.
+    Each item is seeded from `seed` (see :meth:`Feature_vector_DS.item_seed`),
+    so the result does not depend on the number of workers.
+
+    :param dataset: The dataset, see :class:`classification.datasets.Dataset`.
+    :param classnames: The classes to use, defaults to all classes.
+    :param indices: The indices of the sounds to use in each class,
+        defaults to all sounds.
+    :param data_augs: The data augmentations of each pass, e.g.,
+        `([], ["noise"], ["echo"])` stacks the original features with
+        two augmented copies.
+    :param out: If given, the feature matrix is written into a `.npy` file,
+        memory-mapped, instead of being held in memory.
+    :param n_workers: The number of processes, defaults to the number of CPUs.
+        Use 1 to compute everything in the current process.
+    :param seed: The random seed.
+    :param chunksize: The number of items sent to a worker at once.
+    :param kwargs: Other arguments passed to :class:`Feature_vector_DS`,
+        e.g., `Nft`, `nmel`, `duration` or `cache`.
+    :return: The (feature matrix, labels) pair.
+    """
+    if classnames is None:
+        classnames = dataset.list_classes()
+
+    datasets = []
+    for data_aug in data_augs:
+        myds = Feature_vector_DS(dataset, seed=seed, **kwargs)
+        myds.mod_data_aug(data_aug)
+        datasets.append(myds)
+
+    tasks = [
+        (aug_pass, cls, index)
+        for aug_pass in range(len(datasets))
+        for cls in classnames
+        for index in (
+            range(len(dataset.get_class_files(cls))) if indices is None else indices
+        )
+    ]
+    labels = np.array([cls for _, cls, _ in tasks])
+
+    # The first item gives the shape and type of the feature vectors
+    _init_worker(datasets)
+    if tasks:
+        first = _worker_features(tasks[0])
+        shape, dtype = (len(tasks), *first.shape), first.dtype
+    else:
+        shape = (0, _n_features(datasets[0]) if datasets else 0)
+        dtype = np.float64
+
+    if out is not None:
+        X = np.lib.format.open_memmap(out, mode="w+", dtype=dtype, shape=shape)
+    else:
+        X = np.empty(shape, dtype=dtype)
+    if tasks:
+        X[0] = first
+
+    n_workers = n_workers or os.cpu_count() or 1
+
+    with ExitStack() as stack:
+        if n_workers == 1:
+            results = map(_worker_features, tasks[1:])
+        else:
+            executor = stack.enter_context(
+                ProcessPoolExecutor(
+                    n_workers, initializer=_init_worker, initargs=(datasets,)
+                )
+            )
+            results = executor.map(_worker_features, tasks[1:], chunksize=chunksize)
+
+        results = tqdm(
+            results,
+            total=max(len(tasks) - 1, 0),
+            desc="Extracting features",
+            leave=False,
+        )
+        for i, fv in enumerate(results, start=1):
+            X[i] = fv
+
+    if out is not None:
+        X.flush()
+
+    return X, labels
@@ -0,0 +1,120 @@
+from functools import lru_cache
+
+import librosa
+import numpy as np
+from numpy import ndarray
+
+# -----------------------------------------------------------------------------
+"""
+Synthesis of the functions in :
+- mel_filterbank : get the (cached) Hz-to-Mel conversion matrix.
+- hamming_window : get the (cached) Hamming window.
+- specgram_batch : compute the magnitude of the windowed STFT of a batch of signals.
+- melspectrogram_batch : compute the Mel spectrogram of a batch of signals.
+- to_mcu_layout : convert Mel spectrograms to the fixed-point layout sent by the MCU.
+"""
+# -----------------------------------------------------------------------------
+
+
+@lru_cache(maxsize=16)
+def mel_filterbank(
+    fs2: int = 11025,
+    Nft: int = 512,
+    Nmel: int = 20,
+    mcu: bool = False,
+    dtype: str = "float64",
+) -> ndarray:
+    """
+    Get the Hz-to-Mel conversion matrix, normalized so that its maximum is 1.
+
+    Matrices are computed once per set of arguments, and returned read-only.
+
+    :param fs2: The sampling frequency.
+    :param Nft: The number of points of the FFT.
+    :param Nmel: The number of mel bands.
+    :param mcu: If True, drop the last (Nyquist) FFT bin, as the MCU only
+        computes Nft / 2 bins.
+    :param dtype: The data type of the matrix.
+    :return: The (Nmel, Nft // 2 + 1) matrix, or (Nmel, Nft // 2) if `mcu`.
+    """
+    mels = librosa.filters.mel(sr=fs2, n_fft=Nft, n_mels=Nmel)
+    mels = mels / np.max(mels)
+    if mcu:
+        mels = mels[:, :-1]
+    mels = np.ascontiguousarray(mels, dtype=dtype)
+    mels.setflags(write=False)
+    return mels
+
+
+@lru_cache(maxsize=16)
+def hamming_window(Nft: int = 512, dtype: str = "float64") -> ndarray:
+    """
+    Get the Hamming window of Nft points, read-only.
+
+    :param Nft: The number of points of the FFT.
+    :param dtype: The data type of the window.
+    """
+    window = np.hamming(Nft).astype(dtype)
+    window.setflags(write=False)
+    return window
+
+
+def specgram_batch(sigs: ndarray, Nft: int = 512, dtype=np.float64) -> ndarray:
+    """
+    Compute the magnitude of the Hamming-windowed STFT of one or many signals.
+
+    Signals are cut into non-overlapping frames of Nft samples (the trailing
+    samples that do not fill a frame are dropped), as done on the MCU.
+
+    :param sigs: The signals, of shape (..., n_samples).
+    :param Nft: The number of points of the FFT.
+    :param dtype: The data type used for the computation, e.g., `np.float32`.
+    :return: The spectrograms, of shape (..., Nft // 2 + 1, n_samples // Nft).
+    """
+    sigs = np.asarray(sigs, dtype=dtype)
+    n_frames = sigs.shape[-1] // Nft
+    frames = sigs[..., : n_frames * Nft].reshape(*sigs.shape[:-1], n_frames, Nft)
+    frames = frames * hamming_window(Nft, np.dtype(dtype).name)
+    stft = np.abs(np.fft.rfft(frames, axis=-1)).astype(dtype, copy=False)
+    return np.swapaxes(stft, -1, -2)
+
+
+def melspectrogram_batch(
+    sigs: ndarray,
+    Nmel: int = 20,
+    Nft: int = 512,
+    fs2: int = 11025,
+    mcu: bool = False,
+    dtype=np.float64,
+) -> ndarray:
+    """
+    Compute the Mel spectrogram of one or many signals in one pass.
+
+    The signals must already be sampled at `fs2`.
+
+    :param sigs: The signals, of shape (..., n_samples).
+    :param Nmel: The number of mel bands.
+    :param Nft: The number of points of the FFT.
+    :param fs2: The sampling frequency.
+    :param mcu: If True, ignore the Nyquist bin, as done on the MCU.
+    :param dtype: The data type used for the computation, e.g., `np.float32`.
+    :return: The Mel spectrograms, of shape (..., Nmel, n_samples // Nft).
+    """
+    stft = specgram_batch(sigs, Nft, dtype)
+    mels = mel_filterbank(fs2, Nft, Nmel, mcu, np.dtype(dtype).name)
+    if mcu:
+        stft = stft[..., :-1, :]
+    return np.matmul(mels, stft)
+
+
+def to_mcu_layout(melspec: ndarray, scale: float = 1.0) -> ndarray:
+    """
+    Convert Mel spectrograms to the layout of the Mel vectors sent by the MCU,
+    i.e., the inverse of :func:`classification.utils.payload_to_melvecs`.
+
+    :param melspec: The Mel spectrograms, of shape (..., Nmel, n_melvecs).
+    :param scale: The value mapped to 1.0 in Q15 (values above are saturated).
+    :return: The Q15 Mel vectors, as int16 of shape (..., n_melvecs, Nmel).
+    """
+    q15 = np.round(np.swapaxes(melspec, -1, -2) / scale * 32768)
+    return np.clip(q15, -32768, 32767).astype(np.int16)
@@ -0,0 +1,87 @@
+from typing import Optional
+
+import numpy as np
+from numpy import ndarray
+
+# -----------------------------------------------------------------------------
+"""
+Synthesis of the functions in :
+- uniform_bins : the n-bits uniform quantization levels, in [0, 1].
+- mu_law_bins : the n-bits mu-law (companded) quantization levels, in [0, 1].
+- nearest_bin : index of the nearest quantization level, for any sorted levels.
+- quantize : quantize a signal on n bits, in O(N) memory.
+"""
+# -----------------------------------------------------------------------------
+
+
+def uniform_bins(n: int = 8) -> ndarray:
+    """
+    Return the 2^n uniform quantization levels, from 0 to 1 (included).
+
+    :param n: The number of bits.
+    """
+    return np.arange(2**n) / (2**n - 1)
+
+
+def mu_law_bins(n: int = 8, mu: float = 255) -> ndarray:
+    """
+    Return 2^n quantization levels in [0, 1], denser around 0.5,
+    obtained by expanding uniform levels with the mu-law.
+
+    :param n: The number of bits.
+    :param mu: The compression parameter.
+    """
+    y = 2 * uniform_bins(n) - 1  # in [-1, 1]
+    x = np.sign(y) * ((1 + mu) ** np.abs(y) - 1) / mu
+    return (x + 1) / 2
+
+
+def nearest_bin(normed: ndarray, bins: ndarray) -> ndarray:
+    """
+    Return the index of the nearest level for each sample, using a binary
+    search (ties go to the lower level).
+
+    :param normed: The samples, any shape.
+    :param bins: The quantization levels, sorted in increasing order.
+    """
+    idx = np.searchsorted(bins, normed)
+    idx = np.clip(idx, 1, len(bins) - 1)
+    lower = bins[idx - 1]
+    upper = bins[idx]
+    idx -= normed - lower <= upper - normed
+    return idx
+
+
+def quantize(sig: ndarray, n: int = 8, bins: Optional[ndarray] = None) -> ndarray:
+    """
+    Quantize a signal with n bits.
+
+    The signal is mapped to [0, 1], using its minimum and maximum,
+    rounded to the nearest level, and mapped back to its original range.
+    Uniform levels are computed by direct rounding, without
+    materializing the distances to every level.
+
+    :param sig: The signal, 1D or 2D array.
+    :param n: The number of bits, for uniform levels.
+    :param bins: If given, the (sorted) levels in [0, 1] to use instead of
+        the uniform ones, e.g., :func:`mu_law_bins`.
+    :return: The quantized signal.
+    """
+    sig = np.asarray(sig, dtype=float)
+    xmin = np.min(sig)
+    xmax = np.max(sig)
+    if xmax == xmin:
+        return sig.copy()
+
+    normed = (sig - xmin) / (xmax - xmin)
+
+    if bins is None:
+        numbins = 2**n
+        # Nearest of the levels k / (numbins - 1), ties go to the lower level
+        idx = np.ceil(normed * (numbins - 1) - 0.5)
+        quantized_normed = np.clip(idx, 0, numbins - 1) / (numbins - 1)
+    else:
+        bins = np.asarray(bins, dtype=float)
+        quantized_normed = bins[nearest_bin(normed, bins)]
+
+    return xmin + (xmax - xmin) * quantized_normed
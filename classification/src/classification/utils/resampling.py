@@ -0,0 +1,128 @@
+import math
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+import scipy.signal as sg
+from numpy import ndarray
+
+# -----------------------------------------------------------------------------
+"""
+Synthesis of the functions in :
+- polyphase_filter : design (and cache) the anti-aliasing filter for a pair of rates.
+- resample : resample a signal, or a batch of signals, with rational polyphase filtering.
+- resample_batch : resample clips of different lengths at once.
+- resample_stream : resample a long recording chunk by chunk.
+"""
+# -----------------------------------------------------------------------------
+
+
+@lru_cache(maxsize=32)
+def polyphase_filter(sr: int, newsr: int) -> Tuple[int, int, ndarray]:
+    """
+    Design the low-pass filter used to resample from `sr` to `newsr`.
+
+    The design is the same as in :func:`scipy.signal.resample_poly`,
+    but is only done once per pair of sampling frequencies.
+
+    :param sr: The source sampling frequency.
+    :param newsr: The target sampling frequency.
+    :return: The (up, down, filter) tuple, where up / down = newsr / sr.
+    """
+    g = math.gcd(int(sr), int(newsr))
+    up, down = int(newsr) // g, int(sr) // g
+    if up == down:
+        h = np.ones(1)
+    else:
+        max_rate = max(up, down)
+        half_len = 10 * max_rate
+        h = sg.firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+    h.setflags(write=False)
+    return up, down, h
+
+
+def resample(sig: ndarray, sr: int, newsr: int, axis: int = -1) -> ndarray:
+    """
+    Resample a signal from `sr` to `newsr` with rational polyphase filtering.
+
+    Unlike an FFT-based resampling, the ratio between the two frequencies
+    does not need to be an integer (e.g., 44100 Hz to 10200 Hz) and the cost
+    grows linearly with the signal length.
+
+    :param sig: The signal, or a 2D array of equal-length signals.
+    :param sr: The source sampling frequency.
+    :param newsr: The target sampling frequency.
+    :param axis: The time axis.
+    :return: The resampled signal(s), with `ceil(len * newsr / sr)` samples.
+    """
+    up, down, h = polyphase_filter(sr, newsr)
+    if up == down:
+        return np.array(sig, copy=True)
+    return sg.resample_poly(sig, up, down, axis=axis, window=h)
+
+
+def resample_batch(sigs: Sequence[ndarray], sr: int, newsr: int) -> List[ndarray]:
+    """
+    Resample many clips sharing the same sampling frequency in one pass.
+
+    Clips are zero-padded to the same length, which does not change their
+    resampled samples, as the filter already sees zeros beyond the end
+    of each clip.
+
+    :param sigs: The clips.
+    :param sr: The source sampling frequency.
+    :param newsr: The target sampling frequency.
+    :return: The resampled clips.
+    """
+    up, down, _ = polyphase_filter(sr, newsr)
+    lengths = [len(sig) for sig in sigs]
+    batch = np.zeros((len(sigs), max(lengths, default=0)))
+    for i, sig in enumerate(sigs):
+        batch[i, : len(sig)] = sig
+
+    resampled = resample(batch, sr, newsr, axis=1)
+    return [resampled[i, : -(-n * up // down)] for i, n in enumerate(lengths)]
+
+
+def resample_stream(
+    chunks: Iterable[ndarray], sr: int, newsr: int, min_block: int = 2**16
+) -> Iterator[ndarray]:
+    """
+    Resample a long recording chunk by chunk.
+
+    Each block is resampled with enough context on both sides for the output
+    to be the same as resampling the whole recording at once, while only
+    keeping a few blocks in memory.
+
+    :param chunks: The consecutive chunks of the recording, of any lengths.
+    :param sr: The source sampling frequency.
+    :param newsr: The target sampling frequency.
+    :param min_block: The minimum number of input samples resampled at once.
+    :return: The consecutive chunks of the resampled recording.
+    """
+    up, down, h = polyphase_filter(sr, newsr)
+    half_len = (len(h) - 1) // 2
+    # Context (in input samples) needed on each side, as a multiple of `down`
+    # so that block boundaries fall on output samples
+    pad = -(-(half_len // up + 2) // down) * down
+
+    buffer = np.zeros(0)
+    left = 0  # number of samples of left context at the start of the buffer
+
+    for chunk in chunks:
+        buffer = np.concatenate((buffer, chunk))
+        n = (len(buffer) - left - pad) // down * down
+        if n <= 0 or n < min_block:
+            continue
+
+        out = resample(buffer[: left + n + pad], sr, newsr)
+        yield out[left * up // down : (left + n) * up // down]
+
+        start = max(left + n - pad, 0)
+        buffer = buffer[start:]
+        left = left + n - start
+
+    if len(buffer) > left:
+        out = resample(buffer, sr, newsr)
+        yield out[left * up // down :]
+
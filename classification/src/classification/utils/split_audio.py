@@ -1,17 +1,74 @@
 import random
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 import click
-from pydub import AudioSegment
-from tqdm import trange
+import soundfile as sf
+from tqdm import tqdm
 
 import common
 from common.logging import logger
 
 from ..datasets import SOUND_DURATION
 
+LAYOUTS = ("random", "even", "sliding")
+
+
+def piece_starts(
+    n_frames: int,
+    piece_frames: int,
+    layout: str = "random",
+    num_pieces: Optional[int] = None,
+    hop_frames: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> List[int]:
+    """
+    Return the first frame of each piece.
+
+    :param n_frames: The number of frames of the source.
+    :param piece_frames: The number of frames of each piece.
+    :param layout: How to place the pieces: "random" (independent, possibly
+        overlapping, pieces), "even" (evenly spaced pieces, from the start
+        to the end of the source) or "sliding" (a piece every `hop_frames`).
+    :param num_pieces: The number of pieces, for the "random" and "even"
+        layouts. For "sliding", the maximum number of pieces.
+    :param hop_frames: The number of frames between two consecutive pieces,
+        for the "sliding" layout. Defaults to `piece_frames`.
+    :param seed: The random seed, for the "random" layout.
+    """
+    max_start = n_frames - piece_frames
+    if layout == "random":
+        rng = random.Random(seed)
+        return [rng.randint(0, max_start) for _ in range(num_pieces or 10)]
+    if layout == "even":
+        num_pieces = num_pieces or 10
+        if num_pieces == 1:
+            return [0]
+        return [i * max_start // (num_pieces - 1) for i in range(num_pieces)]
+    if layout == "sliding":
+        starts = list(range(0, max_start + 1, hop_frames or piece_frames))
+        return starts[:num_pieces]
+    raise ValueError(f"Unknown layout {layout!r}, expected one of {LAYOUTS}.")
+
+
+def write_piece(source: Path, start: int, frames: int, output: Path) -> None:
+    """
+    Read only the frames of one piece from the source, and write them.
+
+    :param source: The source audio file.
+    :param start: The first frame of the piece.
+    :param frames: The number of frames of the piece.
+    :param output: The output audio file.
+    """
+    with sf.SoundFile(source) as src:
+        src.seek(start)
+        # Integer samples are copied as is, without float conversion
+        data = src.read(frames, dtype="int32" if "PCM" in src.subtype else "float64")
+        subtype = src.subtype if sf.check_format("WAV", src.subtype) else None
+        sf.write(output, data, src.samplerate, subtype=subtype)
+
 
 @click.command()
 @click.argument(
@@ -21,10 +78,10 @@ from ..datasets import SOUND_DURATION
 @click.option(
     "-n",
     "--num_pieces",
-    default=10,
-    show_default=True,
+    default=None,
     type=click.IntRange(min=1),
-    help="In how many pieces to split the audio.",
+    help="In how many pieces to split the audio. "
+    "Defaults to 10, or to all the windows for the sliding layout.",
 )
 @click.option(
     "-d",
@@ -34,6 +91,27 @@ from ..datasets import SOUND_DURATION
     type=click.FloatRange(min=0.0, min_open=True),
     help="How long (in seconds) each pieces should be.",
 )
+@click.option(
+    "--layout",
+    default="random",
+    show_default=True,
+    type=click.Choice(LAYOUTS),
+    help="How to place the pieces in the source audio file.",
+)
+@click.option(
+    "--hop",
+    default=None,
+    type=click.FloatRange(min=0.0, min_open=True),
+    help="Time (in seconds) between two pieces, for the sliding layout. "
+    "Defaults to `--duration`, i.e., non-overlapping pieces.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Number of pieces written in parallel. Defaults to the number of CPUs.",
+)
 @click.option(
     "-s",
     "--seed",
@@ -68,55 +146,63 @@ from ..datasets import SOUND_DURATION
 @common.click.verbosity
 def main(
     source: Path,
-    num_pieces: int,
+    num_pieces: Optional[int],
     duration: float,
+    layout: str,
+    hop: Optional[float],
+    jobs: Optional[int],
     seed: Optional[int],
     zero_padding: Optional[int],
     directory: Path,
     prefix: Optional[str],
 ) -> None:
     """
-    Split SOURCE audio file (.wav) into many pieces of fixed duration.
-
-    The audio is split randomly, and pieces may overlap as they are all
-    independently generated.
-    """
-    width = zero_padding or len(str(num_pieces - 1))
-
-    random.seed(seed)
-
-    logger.info("Reading source audio file...")
-
-    audio = AudioSegment.from_wav(source)
+    Split SOURCE audio file into many pieces of fixed duration.
 
-    duration_millis = int(1000 * duration)
+    By default, the audio is split randomly, and pieces may overlap as they
+    are all independently generated. Use `--layout even` for evenly spaced
+    pieces, or `--layout sliding` for a sliding window.
 
-    frac = len(audio) / duration_millis
-
-    directory.mkdir(parents=True, exist_ok=True)
-
-    fname = prefix or source.stem
+    Only the frames of each piece are read from SOURCE, so that long
+    recordings do not need to fit in memory.
+    """
+    info = sf.info(source)
+    piece_frames = int(duration * info.samplerate)
 
-    if frac < 1:
+    if info.frames < piece_frames:
         logger.error(
             "The provided audio file has duration of "
-            f"{len(audio) / 1000.0:.0f}s, "
+            f"{info.duration:.0f}s, "
             f"which is shorter than required duration of {duration:.0f}s."
         )
         sys.exit(1)
     else:
         logger.info(
             "The ratio of source duration / required duraction per piece is "
-            f"{frac:.2}"
+            f"{info.frames / piece_frames:.2}"
         )
 
-    max_start = len(audio) - duration_millis
-
-    for i in trange(
-        num_pieces, desc="Splitting audio files into random pieces...", leave=False
-    ):
-        start = random.randint(0, max_start)
+    hop_frames = int(hop * info.samplerate) if hop else None
+    starts = piece_starts(
+        info.frames, piece_frames, layout, num_pieces, hop_frames, seed
+    )
 
-        piece = audio[start : start + duration_millis]
+    width = zero_padding or len(str(len(starts) - 1))
+    directory.mkdir(parents=True, exist_ok=True)
+    fname = prefix or source.stem
 
-        piece.export(directory / f"{fname}_{i:0{width}d}.wav", format="wav")
+    with ThreadPoolExecutor(jobs) as executor:
+        futures = [
+            executor.submit(
+                write_piece,
+                source,
+                start,
+                piece_frames,
+                directory / f"{fname}_{i:0{width}d}.wav",
+            )
+            for i, start in enumerate(starts)
+        ]
+        for future in tqdm(
+            futures, desc="Splitting audio files into pieces...", leave=False
+        ):
+            future.result()
@@ -1,5 +1,7 @@
 import numpy as np
 
+from . import quantization
+
 # import torch
 # from DL_model import *
 
@@ -140,26 +142,11 @@ def quantize(sig, n=8):
         - n   = number of bits for quantization
     Outputs :
         - quantized = the quantized signal
+
+    See `quantization.quantize`, which rounds directly to the nearest bin
+    (in O(N) memory) and also supports non-uniform bins.
     """
-    xmin = np.min(sig)
-    xmax = np.max(sig)
-
-    normed = (sig - xmin) / (xmax - xmin)
-
-    numbins = 2**n  # 2^n
-    Delta = 1 / (2**n + 1)  # spacing between the bins
-    bins = Delta / 2 + np.linspace(-Delta / 2, 1 - Delta / 2, numbins)
-
-    if sig.ndim == 1:  # signal is 1D
-        mat = np.reshape(np.repeat(normed, numbins), (len(sig), numbins))
-    elif sig.ndim == 2:  # signal is 2D
-        mat = np.repeat(normed, numbins)
-        mat = mat.reshape(sig.shape[0], sig.shape[1], numbins)
-    dists = (mat - bins) ** 2
-    bests = np.argmin(dists, axis=sig.ndim)
-    quantized_normed = bins[bests]
-    quantized = xmin + (xmax - xmin) * quantized_normed
-    return quantized
+    return quantization.quantize(sig, n)
 
 
 def flatten(thelist, flat_list=[]):
@@ -8,14 +8,15 @@ import click
 import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
+import pyqtgraph as pg
 import scipy.io.wavfile as wav
 import sklearn
 import soundfile as sf
 from matplotlib.animation import FuncAnimation
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
 from matplotlib.figure import Figure
-from matplotlib.patches import Rectangle
 from PyQt6 import QtGui
+from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import (
     QApplication,
     QFileDialog,
@@ -35,9 +36,13 @@ from serial.tools import list_ports
 
 from .__version__ import __version__
 from .libraries import database_utils as dbu
+from .libraries import framing_utils as fu
+from .libraries import history_utils as hu
 from .libraries import logging_utils as logu
+from .libraries import plot_utils as pu
 from .libraries import serial_utils as seru
 from .model_trainer import (
+    HistoryPredictor,
     load_model,
 )
 
@@ -122,7 +127,7 @@ class GUIAudioWindow(QMainWindow):
             self.db.get_item("Audio Settings", "serial_prefix").value, message=base_data
         )
 
-        self.ser.data_received_prefix.connect(self.prefix_message_handler)
+        self.ser.data_received_prefix_batch.connect(self.prefix_batch_handler)
 
         # Create the main window
         self.setWindowTitle(
@@ -143,17 +148,22 @@ class GUIAudioWindow(QMainWindow):
         self.create_ui()
 
     def update_audio_data(self, data):
-        self.audio_freeze = self.db.get_item("Audio Settings", "audio_freeze").value
+        settings = self.db.snapshot
+        self.audio_freeze = settings.get("Audio Settings", "audio_freeze")
         if not self.audio_freeze:
             print("Updating audio data")
             self.audio_data = data
-        if self.db.get_item("Audio Settings", "auto_save").value:
+        if settings.get("Audio Settings", "auto_save"):
             self.save_audio_data_npy(self.audio_data)
 
+    def prefix_batch_handler(self, frames):
+        for prefix, message in frames:
+            self.prefix_message_handler(prefix, message)
+
     def prefix_message_handler(self, prefix, message):
         print(prefix)
-        if prefix == self.db.get_item("Audio Settings", "serial_prefix").value:
-            array_hex = bytes.fromhex(message)
+        if prefix == self.db.snapshot.get("Audio Settings", "serial_prefix"):
+            array_hex = fu.payload_bytes(message)
             audio_vec = np.frombuffer(
                 array_hex, dtype=np.dtype(np.int16).newbyteorder("<")
             )
@@ -451,18 +461,24 @@ class GUIMELWindow(QMainWindow):
             else 10
         )
 
-        # Create the data : list[dict<"data": np.ndarray, "class_proba": np.ndarray]
-        self.historic_data = [
-            {
-                "data": np.zeros(self.current_feature_length),
-                "class_proba": np.zeros(self.num_classes),
-            }
-            for _ in range(self.max_hist_length)
-        ]
+        # Models that need history average their predictions over the last
+        # `num_hist` packets, only the newest packet is predicted each time
+        self.hist_predictor = None
+        if self.current_model is not None and self.current_model_dict.get(
+            "needs_hist", False
+        ):
+            self.hist_predictor = HistoryPredictor(
+                self.current_model, self.current_model_dict.get("num_hist", 1)
+            )
+
+        # Create the data : preallocated ring buffer of mel vectors and class probabilities
+        self.history = hu.RingHistory(
+            self.max_hist_length, self.current_feature_length, self.num_classes
+        )
         if base_data is not None and type(base_data) == np.ndarray:
             self.add_data(base_data)
 
-        self.ser.data_received_prefix.connect(self.prefix_message_handler)
+        self.ser.data_received_prefix_batch.connect(self.prefix_batch_handler)
 
         # Create the main window
         self.setWindowTitle(
@@ -508,13 +524,11 @@ class GUIMELWindow(QMainWindow):
                 )
             )
             self.demo_super_spawn.clicked.connect(
-                lambda: self.historic_data[0].update(
-                    {
-                        "class_proba": np.random.rand(self.num_classes)
-                        if self.historic_data[0]["class_proba"].sum() == 0
-                        else self.historic_data[0]["class_proba"]
-                    }
+                lambda: self.history.set_latest_class_proba(
+                    np.random.rand(self.num_classes)
                 )
+                if self.history.latest_class_proba.sum() == 0
+                else None
             )
             self.demo_box_layout.addWidget(self.demo_super_spawn)
 
@@ -522,43 +536,48 @@ class GUIMELWindow(QMainWindow):
         self.create_ui()
 
     def add_data(self, data):
-        if not self.db.get_item("MEL Settings", "mel_freeze").value:
-            max_history = self.db.get_item("MEL Settings", "max_history_length").value
-            self.historic_data = [
-                {"data": data, "class_proba": np.zeros(self.num_classes)}
-            ] + self.historic_data[:-1]
-            if len(self.historic_data) > max_history:
-                self.historic_data = self.historic_data[:max_history]
-            elif len(self.historic_data) < max_history:
-                self.historic_data = self.historic_data + [
-                    {
-                        "data": np.zeros(self.current_feature_length),
-                        "class_proba": np.zeros(self.num_classes),
-                    }
-                    for _ in range(max_history - len(self.historic_data))
-                ]
+        if len(data) != self.current_feature_length:
+            self.logger.error(
+                f"Received {len(data)} MEL values, expected {self.current_feature_length}"
+            )
+            return
+
+        # Read the settings once, without locking the database
+        settings = self.db.snapshot
+        if not settings.get("MEL Settings", "mel_freeze"):
+            max_history = settings.get("MEL Settings", "max_history_length")
+            self.history.resize(max_history)
+            self.history.push(data)
 
         # Classify the data
         if self.current_model is not None:
             # Take the lastest data
-            data = self.historic_data[0]["data"]
+            data = self.history.latest_data
             # Classify the data
             self.current_model: Optional[sklearn.base.BaseEstimator]
-            class_proba = self.current_model.predict(data.reshape(1, -1))
-            self.historic_data[0].update({"class_proba": class_proba[0]})
+            if self.hist_predictor is not None:
+                class_proba = self.hist_predictor.update(data)
+            else:
+                class_proba = self.current_model.predict(data.reshape(1, -1))[0]
+            self.history.set_latest_class_proba(class_proba)
 
         # If auto_save
-        if self.db.get_item("MEL Settings", "auto_save").value:
+        if settings.get("MEL Settings", "auto_save"):
             self.save_mel_data(single=True)
 
+    def prefix_batch_handler(self, frames):
+        for prefix, message in frames:
+            self.prefix_message_handler(prefix, message)
+
     def prefix_message_handler(self, prefix, message):
-        if prefix == self.db.get_item("MEL Settings", "serial_prefix").value:
+        if prefix == self.db.snapshot.get("MEL Settings", "serial_prefix"):
+            # Convert the message (hex line or binary frame) to a mel vector
+            array_hex = fu.payload_bytes(message)
+
             # Message is a packet of mel data
-            if len(message) >= 2 * self.current_feature_length:
-                message = message[16:-32]
+            if len(array_hex) >= self.current_feature_length:
+                array_hex = array_hex[8:-16]
 
-            # Convert the message to a mel vector
-            array_hex = bytes.fromhex(message)
             mel_vec = np.frombuffer(
                 array_hex, dtype=np.dtype(np.uint16).newbyteorder("<")
             )
@@ -573,7 +592,6 @@ class GUIMELWindow(QMainWindow):
         # Add a FPS counter
         self.fps_counter = QLabel("FPS: 0")
         self.main_layout.addWidget(self.fps_counter)
-        self.current_time = time.time()
 
         # Say if the model is loaded
         if self.current_model is not None:
@@ -591,112 +609,72 @@ class GUIMELWindow(QMainWindow):
         self.main_layout.addWidget(self.error_text)
 
         # Add the MEL graph
-        self.fig_mel = Figure(figsize=(8, 6))
-        self.canvas_mel = FigureCanvasQTAgg(self.fig_mel)
-        self.main_layout.addWidget(self.canvas_mel)
-        self.fig_mel.subplots_adjust(left=0.1, right=0.9, top=0.9, bottom=0.2)
-        self.fig_mel.tight_layout(pad=0.5)
+        self.mel_plot = pg.PlotWidget(title="MEL Spectrogram")
+        self.mel_plot.setLabel("bottom", "Time Frames")
+        self.mel_plot.setLabel("left", "Mel Frequency Bins")
+        self.mel_plot.setMouseEnabled(x=False, y=False)
+        self.main_layout.addWidget(self.mel_plot)
 
         # Add the classifier graphs next to each other
         self.classifier_layout = QHBoxLayout()
-        self.fig_classifier = Figure(figsize=(6, 6))
-        self.canvas_classifier = FigureCanvasQTAgg(self.fig_classifier)
-        self.classifier_layout.addWidget(self.canvas_classifier)
-
-        self.fig_class_history = Figure(figsize=(8, 6))
-        self.canvas_class_history = FigureCanvasQTAgg(self.fig_class_history)
-        self.classifier_layout.addWidget(self.canvas_class_history)
+        self.class_plot = pg.PlotWidget(title="Classifier Probabilities")
+        self.class_plot.setLabel("bottom", "Classes")
+        self.class_plot.setLabel("left", "Probability")
+        self.class_plot.setMouseEnabled(x=False, y=False)
+        self.classifier_layout.addWidget(self.class_plot)
+
+        self.hist_plot = pg.PlotWidget(title="Classifier History")
+        self.hist_plot.setLabel("bottom", "Time Frames")
+        self.hist_plot.setLabel("left", "Probability")
+        self.hist_plot.setMouseEnabled(x=False, y=False)
+        self.classifier_layout.addWidget(self.hist_plot)
         self.main_layout.addLayout(self.classifier_layout)
 
-        # Setup the graphs
-        self.mel_ax = self.fig_mel.add_subplot(111)
-        self.class_ax = self.fig_classifier.add_subplot(111)
-        self.hist_ax = self.fig_class_history.add_subplot(111)
-
-        # Make a rectangle for the mel plot
-        self.mel_rect = Rectangle(
-            (-1.125 + 0.5, -0.025),
-            1.05,
-            1.05,
-            linewidth=1,
-            edgecolor="red",
-            facecolor="none",
+        # Setup the graph for the mel spectrograms, only new spectrograms are uploaded
+        self.mel_image = pu.ScrollingMelImage(
+            self.mel_plot.getPlotItem(),
+            self.current_mel_length,
+            self.current_mel_number,
+            number_of_bins=10,
         )
 
-        self.mel_pcolors = []
-        self.setup_mel_plots()
-
         self.db.get_item("MEL Settings", "max_history_length").register_callback(
             self.setup_mel_plots
         )
 
         # Setup the graph for the classifier
-        self.class_ax.set_title("Classifier Probabilities")
-        self.class_ax.set_xlabel("Classes")
-        self.class_ax.set_ylabel("Probability")
-        self.class_ax.set_xlim(-0.5, 9.5)
-        self.class_ax.set_ylim(-0.05, 1.05)
-        self.class_ax.autoscale(enable=False, axis="both")
-
         self.classes = self.current_model_dict.get(
             "classes", [f"Class {i}" for i in range(self.num_classes)]
         )
         self.num_classes = len(self.classes)
-        self.class_histogram = self.class_ax.hist(
-            self.classes,
-            bins=len(self.classes),
-            weights=np.zeros(len(self.classes)),
-            align="mid",
-            rwidth=0.5,
-            color="blue",
+        self.class_bars = pg.BarGraphItem(
+            x=np.arange(self.num_classes),
+            height=np.zeros(self.num_classes),
+            width=0.5,
+            brush="b",
         )
-
-        self.hist_ax.set_title("Classifier History")
-        self.hist_ax.set_xlabel("Time Frames")
-        self.hist_ax.set_ylabel("Probability")
-        self.hist_ax.set_xlim(-9, 0)
-        self.hist_ax.set_ylim(-0.05, 1.45)
-        self.hist_ax.autoscale(enable=False, axis="both")
-
+        self.class_plot.addItem(self.class_bars)
+        self.class_plot.getAxis("bottom").setTicks([list(enumerate(self.classes))])
+        self.class_plot.setXRange(-0.5, self.num_classes - 0.5)
+        self.class_plot.setYRange(-0.05, 1.05)
+
+        self.hist_plot.setXRange(-9, 0)
+        self.hist_plot.setYRange(-0.05, 1.45)
+        self.hist_plot.addLegend(offset=(-1, 1))
         self.hist_lines = []
         for i in range(len(self.classes)):
-            (line,) = self.hist_ax.plot([], [], animated=True, label=self.classes[i])
+            pen = pg.mkPen(pg.intColor(i, len(self.classes)))
+            line = self.hist_plot.plot([], [], pen=pen, name=self.classes[i])
             self.hist_lines.append(line)
 
-        # Place a external legend
-        self.hist_ax.legend(loc="upper left", bbox_to_anchor=(1, 1))
-        self.fig_class_history.subplots_adjust(
-            left=0.15, right=0.75, top=0.9, bottom=0.2
-        )
-
-        # Add the animation
+        # Render on a timer, independently of the packet rate, and only
+        # when the history changed since the last frame
         TARGET_FPS = self.db.get_item("Plot Settings", "framerate").value
-        self.anim_mel = FuncAnimation(
-            self.fig_mel,
-            self._update_mel_plot,
-            init_func=self._init_mel_plot,
-            interval=1 / TARGET_FPS * 1000,
-            blit=True,
-            save_count=1,
-        )
-
-        self.anim_class = FuncAnimation(
-            self.fig_classifier,
-            self._update_class_plot,
-            init_func=self._init_class_plot,
-            interval=1 / TARGET_FPS * 1000,
-            blit=True,
-            save_count=1,
-        )
-
-        self.anim_hist_class = FuncAnimation(
-            self.fig_class_history,
-            self._update_hist_class_plot,
-            init_func=self._init_hist_class_plot,
-            interval=1 / TARGET_FPS * 1000,
-            blit=True,
-            save_count=1,
-        )
+        self.render_stats = pu.RenderStats(TARGET_FPS)
+        self._rendered_version = None
+        self.render_timer = QTimer(self)
+        self.render_timer.timeout.connect(self._render_plots)
+        self.render_timer.start(int(1000 / TARGET_FPS))
 
         # Add the save group
         self.save_group = QGroupBox("Additional Options")
@@ -712,129 +690,47 @@ class GUIMELWindow(QMainWindow):
             "MEL Settings", "mel_freeze"
         ).gen_widget_full()
         self.save_group_layout.addWidget(self.mel_freeze, 0, 1)
-        self.save_melbox = QPushButton("Save Mel Data (NPY)")
+        self.save_melbox = QPushButton("Save Mel Data (NPZ)")
         self.save_group_layout.addWidget(self.save_melbox, 1, 0)
         self.save_melbox.clicked.connect(self.save_mel_data)
 
         self.main_layout.addWidget(self.save_group)
 
     def setup_mel_plots(self, number_of_bins=10):
-        self.mel_pcolors = []
-        self.mel_ax.clear()
-        self.mel_ax.set_title("MEL Spectrogram")
-        self.mel_ax.set_xlabel("Time Frames")
-        self.mel_ax.set_ylabel("Mel Frequency Bins")
-        self.mel_ax.set_xlim(-number_of_bins * 1.1 + 0.4, 0.1 + 0.5)
-        self.mel_ax.set_ylim(-0.05, 1.05)
-        self.mel_ax.autoscale(enable=False, axis="both")
-        self.mel_ax.set_xticks(np.arange(-number_of_bins, 1, 1))
-
-        for i in range(number_of_bins):
-            offset = -1.1
-            X, Y = np.meshgrid(
-                np.linspace(0, 1, self.current_mel_number),
-                np.linspace(0, 1, self.current_mel_length),
-            )
-            image = self.mel_ax.pcolormesh(
-                X + i * offset - 1.1 + 0.5,
-                Y,
-                np.zeros((self.current_mel_length, self.current_mel_number)),
-                vmin=0,
-                vmax=(2**16),
-                cmap="viridis",
-                shading="auto",  # Avoid gridlines
-            )
-            self.mel_pcolors.append(image)
-
-        self.mel_ax.add_patch(self.mel_rect)
-
-    def _init_mel_plot(self):
-        """Initialize mel plot for blitting."""
-        for image in self.mel_pcolors:
-            image.set_array(np.zeros(self.current_feature_length).ravel())
-        return self.mel_pcolors + [self.mel_rect]
-
-    def _update_mel_plot(self, frame):
-        """Update mel plot for animation."""
-        for i, image in enumerate(self.mel_pcolors):
-            if i < len(self.historic_data):
-                data: np.ndarray = self.historic_data[i]["data"]
-            else:
-                data = np.zeros(self.current_feature_length)
-            raveled_data = data.reshape(
-                self.current_mel_length, self.current_mel_number
-            ).T.ravel()
-            image.set_array(raveled_data)
-
-        # FPS counter
-        current_time = time.time()
-        fps = 1 / max((current_time - self.current_time), 1e-16)
-        self.current_time = current_time
-        self.fps_counter.setText(f"FPS: {fps:.2f}")
-
-        return self.mel_pcolors + [self.mel_rect]
-
-    def _init_class_plot(self):
-        """Initialize class plot for blitting."""
-        self.class_histogram = self.class_ax.hist(
-            self.classes,
-            bins=self.num_classes,
-            weights=np.zeros(self.num_classes),
-            align="mid",
-            rwidth=0.5,
-            color="blue",
-            edgecolor="black",
-        )
-        # Make the class titles vertical
-        self.class_ax.set_xticks(np.arange(0, self.num_classes, 1))
-        self.class_ax.set_xticklabels(self.classes, rotation=45)
-        # Make the figure slightly smaller in height to compensate for the vertical labels
-        self.fig_classifier.subplots_adjust(left=0.1, right=0.9, top=0.9, bottom=0.3)
-
-        return (self.class_histogram[2][0],)
-
-    def _update_class_plot(self, frame):
-        """Update class plot for animation."""
-        # Update class histogram
-        if len(self.historic_data) > 0:
-            class_proba = self.historic_data[0]["class_proba"]
-        else:
-            class_proba = np.zeros(self.num_classes)
-
-        # Update the histogram
-        for rect, h in zip(self.class_histogram[2], class_proba):
-            rect.set_height(h)
-
-        # Make red and add text to the highest bar
-        max_class = np.argmax(class_proba)
-        for i, rect in enumerate(self.class_histogram[2]):
-            if i == max_class:
-                rect.set_color("red")
-            else:
-                rect.set_color("blue")
-
-        return self.class_histogram[2]
-
-    def _init_hist_class_plot(self):
-        """Initialize class history plot for blitting."""
-        for line in self.hist_lines:
-            line.set_data([], [])
-        return self.hist_lines
-
-    def _update_hist_class_plot(self, frame):
-        """Update class history plot for animation."""
+        self.mel_image.setup(number_of_bins)
+        self._rendered_version = None
+
+    def _render_plots(self):
+        """Render the plots, if new data arrived since the last frame."""
+        self.render_stats.tick()
+        self.fps_counter.setText(str(self.render_stats))
+        if self.history.version == self._rendered_version:
+            return
+        self._rendered_version = self.history.version
+        self.render_stats.rendered_frames += 1
+
+        self.mel_image.render(self.history)
+        self._update_class_plot()
+        self._update_hist_class_plot()
+
+    def _update_class_plot(self):
+        """Update the class probabilities, the most probable class in red."""
+        class_proba = self.history.latest_class_proba
+        brushes = ["b"] * self.num_classes
+        brushes[int(np.argmax(class_proba))] = "r"
+        self.class_bars.setOpts(height=class_proba, brushes=brushes)
+
+    def _update_hist_class_plot(self):
+        """Update class history plot."""
+        class_proba = self.history.class_proba[::-1]  # Most recent first
+        time_frames = -np.arange(0, len(class_proba))
         for i, line in enumerate(self.hist_lines):
             try:
-                line.set_data(
-                    -np.arange(0, len(self.historic_data)),
-                    [data["class_proba"][i] for data in self.historic_data],
-                )
+                line.setData(time_frames, class_proba[:, i])
             except Exception as e:
                 self.error_text.setVisible(True)
                 self.error_text.setText(f"Classifier History Error (suppressed) : {e}")
 
-        return self.hist_lines
-
     def save_mel_data(self, single=False):
         if not single:
             # Get the file name
@@ -842,16 +738,16 @@ class GUIMELWindow(QMainWindow):
                 self,
                 "Save Mel Data",
                 str(pathl.Path(__file__).parent),
-                "NPY Files (*.npy)",
+                "NPZ Files (*.npz)",
             )
             if file_name:
                 self.logger.info(f"Saving mel data to {file_name}")
-                np.save(file_name, self.historic_data)
+                self.history.save(file_name)
         else:
             # Get the file name
             file_name = self._get_mel_file_name()
             self.logger.info(f"Auto saving mel data to {file_name}")
-            np.save(file_name, [self.historic_data[0]])
+            self.history.save(file_name, single=True)
 
     def _get_mel_file_name(self):
         prefix = self.db.get_item("MEL Settings", "file_prefix").value
@@ -900,8 +796,8 @@ class GUIMainWindow(QMainWindow):
         self.create_ui()
 
         # Register the message handlers
-        self.ser.data_received_normal.connect(self.normal_message_handler)
-        self.ser.data_received_prefix.connect(self.prefix_message_handler)
+        self.ser.data_received_normal_batch.connect(self.normal_batch_handler)
+        self.ser.data_received_prefix_batch.connect(self.prefix_batch_handler)
         self.ser.error_occurred.connect(self.error_message_handler)
         self.ser.connection_state.connect(self.connection_status_handler)
 
@@ -1133,32 +1029,39 @@ class GUIMainWindow(QMainWindow):
         # self.logger.error(message)
         pass
 
-    def normal_message_handler(self, message):
-        if message == "TERMINATE":
-            return
-        self.logger.info(message)
-        print(f">>{message}")
-
-    def prefix_message_handler(self, prefix, message):
-        # Print to the log file the received data
-        log_path = self.db.get_item("Folder Settings", "log path").value
-        log_file = self.db.get_item("Logging Settings", "file_name").value
-        log_message = f"[{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {prefix} : {message}"
+    def normal_batch_handler(self, messages):
+        for message in messages:
+            self.logger.info(message)
+            print(f">>{message}")
+
+    def prefix_batch_handler(self, frames):
+        # Print to the log file the received data, all at once
+        settings = self.db.snapshot
+        log_path = settings.get("Folder Settings", "log path")
+        log_file = settings.get("Logging Settings", "file_name")
+        time_stamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         with open(str(log_path / log_file), "a") as f:
-            f.write(log_message + "\n")
-        #print(log_message)
+            f.writelines(
+                f"[{time_stamp}] {prefix} : {fu.payload_text(message)}\n"
+                for prefix, message in frames
+            )
+
+        for prefix, message in frames:
+            self.prefix_message_handler(prefix, message)
 
+    def prefix_message_handler(self, prefix, message):
         # self.logger.info(f"Received {len(message)} bytes for prefix {prefix}")
-        if prefix == self.db.get_item("Serial Settings", "database_prefix").value:
+        settings = self.db.snapshot
+        if prefix == settings.get("Serial Settings", "database_prefix"):
             self.logger.info(f"New configuration received: {message}")
-        elif prefix == self.db.get_item("Audio Settings", "serial_prefix").value:
+        elif prefix == settings.get("Audio Settings", "serial_prefix"):
             self.open_audio_window(message)
             # Print the received data only to the log file
-            self.logger.debug(f"Received audio data: {message}")
-        elif prefix == self.db.get_item("MEL Settings", "serial_prefix").value:
+            self.logger.debug(f"Received audio data: {fu.payload_text(message)}")
+        elif prefix == settings.get("MEL Settings", "serial_prefix"):
             self.open_mel_window(message)
             # Print the received data only to the log file
-            self.logger.debug(f"Received MEL data: {message}")
+            self.logger.debug(f"Received MEL data: {fu.payload_text(message)}")
         else:
             self.logger.warning(
                 f"Unknown prefix {prefix} (message length: {len(message)})"
@@ -1628,10 +1531,19 @@ def connect_db_to_ser(db: dbu.ContentDatabase, ser: seru.SerialController):
         db.get_item("Serial Settings", "database_prefix"),
     ]
 
+    # Binary frames are emitted with the prefix of the same data sent as text
+    frame_types = {
+        fu.FRAME_TYPE_AUDIO: prefixes[0],
+        fu.FRAME_TYPE_MEL: prefixes[1],
+        fu.FRAME_TYPE_CONFIG: prefixes[2],
+    }
+
     def change_prefixes(value):
         ser.unregister_all_prefixes()
         for prefix in prefixes:
             ser.register_prefix(prefix.value)
+        for frame_type, prefix in frame_types.items():
+            ser.register_frame_type(frame_type, prefix.value)
 
     change_prefixes(None)
     for prefix in prefixes:
@@ -1,7 +1,9 @@
 import logging
 import pathlib
 import sys
+from functools import partial
 from threading import RLock as Lock
+from types import MappingProxyType
 
 import numpy as np
 from PyQt6 import QtGui
@@ -70,6 +72,35 @@ def scaled_suffix_to_float(value: float, suffix: str):
     return value
 
 
+class SettingsSnapshot:
+    """
+    Immutable copy of the values of all the elements of a database.
+
+    A new snapshot replaces the previous one whenever an element changes, so it
+    can be read from any thread without taking the database lock. The version
+    is incremented on each change, to detect them cheaply.
+    """
+
+    __slots__ = ("version", "values")
+
+    def __init__(self, version: int, values: dict):
+        self.version = version
+        self.values = MappingProxyType(values)
+
+    def get(self, category_name: str, item_name: str, default=None):
+        """Get the value of an item (or default if it does not exist)."""
+        return self.values.get((category_name, item_name), default)
+
+    def __getitem__(self, key: tuple):
+        return self.values[key]
+
+    def replace(self, category_name: str, item_name: str, value) -> "SettingsSnapshot":
+        """Return the next snapshot, with the value of an item changed."""
+        values = dict(self.values)
+        values[(category_name, item_name)] = value
+        return SettingsSnapshot(self.version + 1, values)
+
+
 class ContentDatabase:
     """
     A simple, thread-safe database class that stores categories and items, synchronizing them between widgets.
@@ -78,6 +109,7 @@ class ContentDatabase:
     - Thread-safe access from multiple threads.
     - Custom initialization function to populate the database.
     - Generate widgets for each element or a whole cathegory easilly.
+    - Lock-free reads of the values through `snapshot`, for hot paths.
 
     Supported Item Types:
     - SuffixFloat
@@ -100,6 +132,8 @@ class ContentDatabase:
     ):
         self.lock = Lock()
         self.db = {}
+        self._snapshot = SettingsSnapshot(0, {})
+        self._snapshot_lock = Lock()  # Only for the writers, not the database lock
         self.app_path = pathlib.Path(__file__).parent.absolute()
         self.logger = logger
         self.debug = debug
@@ -130,6 +164,11 @@ class ContentDatabase:
                 # Check if the item already exists
                 if item_name not in self.db[category_name]:
                     self.db[category_name][item_name] = item_value
+                    self._update_snapshot(category_name, item_name, item_value.value)
+                    # Registered first, so that other callbacks see the new snapshot
+                    item_value.register_callback(
+                        partial(self._update_snapshot, category_name, item_name)
+                    )
                     self.debug_log(f"Item added: {item_name}")
                 else:
                     self.debug_log(
@@ -152,6 +191,19 @@ class ContentDatabase:
                 self.debug_log(f"Category does not exist: {category_name}")
             return None
 
+    @property
+    def snapshot(self) -> SettingsSnapshot:
+        """
+        The current values of all items, without locking.
+        Prefer it to get_item(...).value in code that runs for every packet.
+        """
+        return self._snapshot
+
+    def _update_snapshot(self, category_name: str, item_name: str, value) -> None:
+        """Replace the snapshot (atomically, for the readers) after a change."""
+        with self._snapshot_lock:
+            self._snapshot = self._snapshot.replace(category_name, item_name, value)
+
     def gen_category_widget(self, category_name: str) -> QGroupBox:
         """Generate a widget for a category in the database (using each element's generation function)."""
         with self.lock:
@@ -0,0 +1,306 @@
+"""
+Framing of the data received from the MCU over UART.
+
+Two kinds of data can be mixed on the same serial link:
+
+- text lines, terminated by a newline, possibly starting with a prefix
+  (e.g., "DF:HEX:" followed by the hex payload);
+- binary frames, delimited by zero bytes: 0x00 + COBS(body) + 0x00, where
+  body = length (2 bytes, big endian) + type (1 byte) + payload + CRC (2 bytes).
+  The CRC is the CRC-16/CCITT-FALSE of length + type + payload.
+
+COBS encoding guarantees that the body contains no zero byte, and text lines
+never contain one, so both kinds of data can be told apart. Binary frames
+halve the number of bytes sent for the same payload, and need no hex decoding.
+"""
+
+import binascii
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+MAX_PAYLOAD_LENGTH = 0xFFFF
+
+# Frame types
+FRAME_TYPE_MEL = 0x01
+FRAME_TYPE_AUDIO = 0x02
+FRAME_TYPE_PACKET = 0x03
+FRAME_TYPE_CONFIG = 0x04
+
+
+class FrameError(ValueError):
+    """Raised when a binary frame cannot be decoded."""
+
+
+def crc16(data: bytes) -> int:
+    """CRC-16/CCITT-FALSE (polynomial 0x1021, initial value 0xFFFF)."""
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def cobs_encode(data: bytes) -> bytes:
+    """Encode data with Consistent Overhead Byte Stuffing (no zero in the output)."""
+    out = bytearray()
+    for chunk in bytes(data).split(b"\x00"):
+        # Blocks of 254 non-zero bytes are not followed by an implicit zero
+        while len(chunk) >= 254:
+            out.append(255)
+            out += chunk[:254]
+            chunk = chunk[254:]
+        out.append(len(chunk) + 1)
+        out += chunk
+    return bytes(out)
+
+
+def cobs_decode(data: bytes) -> bytes:
+    """Decode COBS encoded data."""
+    out = bytearray()
+    i = 0
+    n = len(data)
+    while i < n:
+        code = data[i]
+        if code == 0:
+            raise FrameError("Zero byte in COBS data")
+        end = i + code
+        if end > n:
+            raise FrameError("Truncated COBS data")
+        out += data[i + 1 : end]
+        i = end
+        if code != 255 and i < n:
+            out.append(0)
+    return bytes(out)
+
+
+def encode_frame(frame_type: int, payload: bytes) -> bytes:
+    """
+    Encode a binary frame, delimiters included.
+    This is what the MCU sends in binary mode.
+    """
+    if len(payload) > MAX_PAYLOAD_LENGTH:
+        raise FrameError(f"Payload too long ({len(payload)} bytes)")
+    body = len(payload).to_bytes(2, "big") + bytes([frame_type]) + payload
+    body += crc16(body).to_bytes(2, "big")
+    return b"\x00" + cobs_encode(body) + b"\x00"
+
+
+def decode_frame(data: bytes) -> Tuple[int, bytes]:
+    """
+    Decode a binary frame, without its delimiters.
+
+    :return: The frame type and payload.
+    """
+    body = cobs_decode(data)
+    if len(body) < 5:
+        raise FrameError(f"Frame too short ({len(body)} bytes)")
+    length = int.from_bytes(body[:2], "big")
+    if length != len(body) - 5:
+        raise FrameError(f"Length mismatch ({length} != {len(body) - 5})")
+    if crc16(body[:-2]) != int.from_bytes(body[-2:], "big"):
+        raise FrameError("CRC mismatch")
+    return body[2], body[3:-2]
+
+
+def payload_bytes(message: Union[str, bytes]) -> bytes:
+    """Return the payload of a prefixed text line (hex string) or binary frame."""
+    return message if isinstance(message, bytes) else bytes.fromhex(message)
+
+
+def payload_text(message: Union[str, bytes]) -> str:
+    """Return the payload of a prefixed text line or binary frame, as hex string."""
+    return message.hex().upper() if isinstance(message, bytes) else message
+
+
+class LineFramer:
+    """
+    Split a stream of bytes into newline-terminated ASCII lines, and sort them
+    by registered prefix.
+
+    The buffer is scanned from an offset, and consumed bytes are removed once
+    per call to `feed`, instead of copying the remainder for every line.
+    The offset is kept across calls, so an incomplete line is not scanned
+    again when more bytes arrive.
+    Prefixes are matched through a table indexed by prefix length, the longest
+    matching prefix wins.
+    """
+
+    def __init__(self, prefixes: Iterable[str] = ()):
+        self._buffer = bytearray()
+        self._scan = 0  # The buffer before this offset contains no newline
+        self.decode_errors = 0
+        self.set_prefixes(prefixes)
+
+    def set_prefixes(self, prefixes: Iterable[str]) -> None:
+        """Rebuild the prefix dispatch table."""
+        table: Dict[int, Set[str]] = {}
+        for prefix in prefixes:
+            table.setdefault(len(prefix), set()).add(prefix)
+        # Replaced at once, so that it can be read from another thread
+        self._dispatch = (sorted(table, reverse=True), table)
+
+    def match(self, line: str) -> Optional[str]:
+        """Return the registered prefix of a line, if any."""
+        lengths, table = self._dispatch
+        for length in lengths:
+            if line[:length] in table[length]:
+                return line[:length]
+        return None
+
+    def clear(self) -> None:
+        """Drop the incomplete line, if any."""
+        self._buffer.clear()
+        self._scan = 0
+
+    def feed(self, data: bytes) -> Tuple[List[Tuple[str, str]], List[str]]:
+        """
+        Add received bytes, and return the complete lines.
+
+        :return: The (prefix, data) pairs of the lines with a registered prefix,
+            and the other lines.
+        """
+        buffer = self._buffer
+        buffer += data
+        prefixed, normal = [], []
+        start = 0
+        while True:
+            end = buffer.find(b"\n", max(start, self._scan))
+            if end < 0:
+                break
+            line = buffer[start:end]
+            start = end + 1
+            try:
+                decoded = line.decode("ascii").strip()
+            except UnicodeDecodeError:
+                self.decode_errors += 1
+                continue
+
+            prefix = self.match(decoded)
+            if prefix is None:
+                normal.append(decoded)
+            else:
+                prefixed.append((prefix, decoded[len(prefix) :]))
+
+        if start:
+            del buffer[:start]
+        self._scan = len(buffer)
+        return prefixed, normal
+
+
+class StreamDecoder:
+    """
+    Split a stream of bytes into text lines and binary frames.
+
+    Binary frames of a registered type are returned as (prefix, payload)
+    pairs, like the text lines with that prefix, except that the payload
+    is raw bytes instead of a hex string.
+
+    If the stream is joined in the middle of a frame, the first frames are
+    misread as text and the text as frames. Text read as a frame fails the
+    length and CRC checks, and the decoder then realigns itself on the next zero.
+    As text lines are complete before a frame starts, an incomplete line is
+    dropped when a frame starts, so that it is not glued to the next line.
+    """
+
+    def __init__(
+        self,
+        prefixes: Iterable[str] = (),
+        frame_prefixes: Optional[Dict[int, str]] = None,
+        max_frame_size: int = 2 * MAX_PAYLOAD_LENGTH,
+    ):
+        self.lines = LineFramer(prefixes)
+        self.frame_prefixes = dict(frame_prefixes or {})
+        self.max_frame_size = max_frame_size
+        self.frame_errors = 0
+        self.unknown_frames = 0
+        self._frame = bytearray()
+        self._in_frame = False
+
+    @property
+    def decode_errors(self) -> int:
+        """Number of dropped text lines and binary frames."""
+        return self.lines.decode_errors + self.frame_errors
+
+    def set_prefixes(self, prefixes: Iterable[str]) -> None:
+        """Rebuild the prefix dispatch table of text lines."""
+        self.lines.set_prefixes(prefixes)
+
+    def set_frame_prefix(self, frame_type: int, prefix: str) -> None:
+        """Deliver the frames of a given type with a given prefix."""
+        self.frame_prefixes = {**self.frame_prefixes, frame_type: prefix}
+
+    def clear(self) -> None:
+        """Drop the incomplete line or frame, if any."""
+        self.lines.clear()
+        self._frame.clear()
+        self._in_frame = False
+
+    def _start_frame(self) -> None:
+        if self.lines._buffer:
+            self.frame_errors += 1
+            self.lines.clear()
+        self._in_frame = True
+
+    def _end_frame(
+        self,
+        prefixed: List[Tuple[str, Union[str, bytes]]],
+        add_text: Callable[[bytes], None],
+    ) -> None:
+        try:
+            frame_type, payload = decode_frame(bytes(self._frame))
+        except FrameError:
+            # Probably text read as a frame: this zero opens a frame
+            self.frame_errors += 1
+            add_text(bytes(self._frame))
+            self._start_frame()
+        else:
+            self._in_frame = False
+            prefix = self.frame_prefixes.get(frame_type)
+            if prefix is None:
+                self.unknown_frames += 1
+            else:
+                prefixed.append((prefix, payload))
+        self._frame.clear()
+
+    def feed(
+        self, data: bytes
+    ) -> Tuple[List[Tuple[str, Union[str, bytes]]], List[str]]:
+        """
+        Add received bytes, and return the complete lines and frames.
+
+        :return: The (prefix, data) pairs of the lines and frames with a
+            registered prefix, and the other lines.
+        """
+        if not self._in_frame and b"\x00" not in data:
+            return self.lines.feed(data)  # Fast path, text only
+
+        prefixed: List[Tuple[str, Union[str, bytes]]] = []
+        normal: List[str] = []
+
+        def add_text(text: bytes):
+            text_prefixed, text_normal = self.lines.feed(text)
+            prefixed.extend(text_prefixed)
+            normal.extend(text_normal)
+
+        start = 0
+        while True:
+            end = data.find(b"\x00", start)
+            if end < 0:
+                break
+            if not self._in_frame:
+                add_text(data[start:end])
+                self._start_frame()
+            else:
+                self._frame += data[start:end]
+                # An empty frame is a delimiter, the next frame starts here
+                if self._frame:
+                    self._end_frame(prefixed, add_text)
+            start = end + 1
+
+        if self._in_frame:
+            self._frame += data[start:]
+            if len(self._frame) > self.max_frame_size:
+                # Lost: go back to text
+                self.frame_errors += 1
+                add_text(bytes(self._frame))
+                self._frame.clear()
+                self._in_frame = False
+        else:
+            add_text(data[start:])
+
+        return prefixed, normal
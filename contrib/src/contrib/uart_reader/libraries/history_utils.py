@@ -0,0 +1,114 @@
+import numpy as np
+
+
+class RingHistory:
+    """
+    Fixed-size history of MEL feature vectors and their class probabilities.
+
+    Entries are stored in preallocated arrays, written twice (at `i` and at
+    `i + capacity`), so that inserting is O(1) and the whole history is
+    always available as a contiguous view, without copying.
+
+    Entries that were never written are zeros.
+    """
+
+    def __init__(self, capacity: int, feature_length: int, num_classes: int):
+        self.feature_length = feature_length
+        self.num_classes = num_classes
+        self.version = 0  # Incremented on each change, to detect new data
+        self._allocate(max(capacity, 1))
+
+    def _allocate(self, capacity: int):
+        self.capacity = capacity
+        self._data = np.zeros((2 * capacity, self.feature_length))
+        self._class_proba = np.zeros((2 * capacity, self.num_classes))
+        self._next = 0  # Where the next entry is written, in [0, capacity)
+        self.count = 0  # Number of entries written since the last reset
+
+    def __len__(self) -> int:
+        return self.capacity
+
+    def reset(self):
+        """Clear the history."""
+        self._allocate(self.capacity)
+        self.version += 1
+
+    def resize(self, capacity: int):
+        """Change the capacity, keeping the most recent entries."""
+        capacity = max(capacity, 1)
+        if capacity == self.capacity:
+            return
+        keep = min(capacity, self.capacity)
+        data = self.data[-keep:].copy()
+        class_proba = self.class_proba[-keep:].copy()
+        count = self.count
+        self._allocate(capacity)
+        for row, proba in zip(data, class_proba):
+            self.push(row, proba)
+        self.count = min(count, capacity)
+        self.version += 1
+
+    def push(self, data: np.ndarray, class_proba: np.ndarray = None):
+        """Add a new entry, replacing the oldest one."""
+        i = self._next
+        self._data[i] = self._data[i + self.capacity] = data
+        if class_proba is None:
+            self._class_proba[i] = self._class_proba[i + self.capacity] = 0
+        else:
+            self._class_proba[i] = self._class_proba[i + self.capacity] = class_proba
+        self._next = (i + 1) % self.capacity
+        self.count += 1
+        self.version += 1
+
+    def set_latest_class_proba(self, class_proba: np.ndarray):
+        """Set the class probabilities of the most recent entry."""
+        i = (self._next - 1) % self.capacity
+        self._class_proba[i] = self._class_proba[i + self.capacity] = class_proba
+        self.version += 1
+
+    @property
+    def data(self) -> np.ndarray:
+        """View of the feature vectors, from the oldest to the most recent."""
+        return self._data[self._next : self._next + self.capacity]
+
+    @property
+    def class_proba(self) -> np.ndarray:
+        """View of the class probabilities, from the oldest to the most recent."""
+        return self._class_proba[self._next : self._next + self.capacity]
+
+    @property
+    def latest_data(self) -> np.ndarray:
+        """View of the most recent feature vector."""
+        return self.data[-1]
+
+    @property
+    def latest_class_proba(self) -> np.ndarray:
+        """View of the class probabilities of the most recent entry."""
+        return self.class_proba[-1]
+
+    def save(self, file_name: str, single: bool = False):
+        """
+        Save the history (or only the most recent entry) to a NPZ file,
+        with `data` and `class_proba` arrays, from the oldest to the most recent.
+        """
+        start = -1 if single else 0
+        np.savez(
+            file_name,
+            data=self.data[start:],
+            class_proba=self.class_proba[start:],
+        )
+
+    @classmethod
+    def load(cls, file_name: str, capacity: int = None) -> "RingHistory":
+        """
+        Load a history saved with :meth:`save`.
+
+        The capacity defaults to the number of saved entries.
+        """
+        with np.load(file_name) as saved:
+            data, class_proba = saved["data"], saved["class_proba"]
+        history = cls(capacity or len(data), data.shape[1], class_proba.shape[1])
+        keep = min(history.capacity, len(data))
+        for row, proba in zip(data[-keep:], class_proba[-keep:]):
+            history.push(row, proba)
+        return history
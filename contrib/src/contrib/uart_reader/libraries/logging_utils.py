@@ -2,10 +2,12 @@ import logging
 import logging.handlers
 import os
 import pathlib
+import threading
+from collections import deque
 from logging import Handler, LogRecord
 
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QColor, QPalette, QTextCursor
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QColor, QTextCharFormat, QTextCursor
 from PyQt6.QtWidgets import QApplication, QPushButton, QTextEdit, QVBoxLayout, QWidget
 
 
@@ -157,73 +159,144 @@ class ContentLogger:
         self.logger.addHandler(handler)
         self.handlers.append(handler)
 
-    def gen_gui_console(self) -> QTextEdit:
+    def gen_gui_console(
+        self, max_lines: int = 200, flush_interval_ms: int = 100
+    ) -> QTextEdit:
         """
-        Generate a QTextEdit widget as a log receiver, limited to 200 lines.
+        Generate a QTextEdit widget as a log receiver, limited to `max_lines` lines.
+        Records are queued from any thread, and written to the widget in batches,
+        every `flush_interval_ms` milliseconds.
         """
-
-        # Custom handler for QTextEdit
-        class QTextEditHandler(Handler):
-            def __init__(self, text_edit: QTextEdit, max_lines: int = 200):
-                """Initialize the handler with a QTextEdit widget and a maximum number of lines."""
-                super().__init__()
-                self.text_edit = text_edit
-                self.max_lines = max_lines
-
-            def emit(self, record: LogRecord):
-                """Emit a log record to the QTextEdit widget."""
-                try:
-                    msg = self.format(record)
-                    self.append_colored_message(record.levelname, msg)
-                    self.trim_lines()
-                except Exception:
-                    self.handleError(record)
-
-            def append_colored_message(self, level, message):
-                """Append a message to the QTextEdit widget with a specific color based on the log level."""
-                color_map = {
-                    "DEBUG": "blue",
-                    "INFO": "black",
-                    "WARNING": "orange",
-                    "ERROR": "red",
-                    "CRITICAL": "darkred",
-                    "TRACE": "gray",
-                    "SUCCESS": "green",
-                }
-                # Default color is black
-                color_name = color_map.get(level, "black")
-                if color_name == "black":
-                    self.text_edit.setTextColor(
-                        self.text_edit.palette().color(QPalette.ColorRole.Text)
-                    )
-                else:
-                    self.text_edit.setTextColor(QColor(color_name))
-                self.text_edit.append(message)
-                # Reset the text color to whatever qt uses by default
-                self.text_edit.setTextColor(
-                    self.text_edit.palette().color(QPalette.ColorRole.Text)
-                )
-
-            def trim_lines(self):
-                cursor = self.text_edit.textCursor()
-                # Move the cursor to the start of the document
-                cursor.movePosition(QTextCursor.MoveOperation.Start)
-                # If the number of lines exceeds the maximum, remove the oldest lines
-                while self.text_edit.document().blockCount() > self.max_lines:
-                    cursor.select(QTextCursor.SelectionType.BlockUnderCursor)
-                    cursor.removeSelectedText()
-                    cursor.deleteChar()
-
         text_edit = QTextEdit()
         # Set the text edit to read-only and always show the vertical scroll bar
         text_edit.setReadOnly(True)
+        text_edit.setUndoRedoEnabled(False)
         text_edit.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
 
-        handler = QTextEditHandler(text_edit)
+        handler = QTextEditHandler(text_edit, max_lines, flush_interval_ms)
         self.setup_handler(handler)
+
+        # Stop logging to the widget once it is deleted
+        def remove_handler():
+            self.logger.removeHandler(handler)
+            if handler in self.handlers:
+                self.handlers.remove(handler)
+
+        text_edit.destroyed.connect(remove_handler)
         return text_edit
 
 
+class QTextEditHandler(Handler):
+    """
+    Logging handler writing to a QTextEdit widget, in batches.
+
+    `emit` only queues the formatted record, so it can be called from any thread
+    and costs the same whatever the widget. A timer of the GUI thread then writes
+    the queued lines at a fixed rate, in a single edit of the document, and the
+    document drops its oldest lines by itself (maximum block count).
+
+    Lines that would be trimmed right away are not written: when more than
+    `max_lines` records arrive between two flushes, only the last ones are kept,
+    and the others are counted as dropped. Consecutive identical messages are
+    coalesced into one line with a repeat count.
+    """
+
+    COLOR_MAP = {
+        "DEBUG": "blue",
+        "INFO": "black",
+        "WARNING": "orange",
+        "ERROR": "red",
+        "CRITICAL": "darkred",
+        "TRACE": "gray",
+        "SUCCESS": "green",
+    }
+
+    def __init__(
+        self, text_edit: QTextEdit, max_lines: int = 200, flush_interval_ms: int = 100
+    ):
+        """Initialize the handler with a QTextEdit widget and a maximum number of lines."""
+        super().__init__()
+        self.text_edit = text_edit
+        self.max_lines = max_lines
+        self.text_edit.document().setMaximumBlockCount(max_lines)
+
+        # Pending [level, message, repeats] entries, and counters (shared with emit)
+        self._pending = deque()
+        self._pending_lock = threading.Lock()
+        self.coalesced = 0
+        self.dropped = 0
+        self._dropped_shown = 0
+
+        self._formats = {}
+        for level, color_name in self.COLOR_MAP.items():
+            text_format = QTextCharFormat()
+            # Black is the default color of qt, whatever the palette
+            if color_name != "black":
+                text_format.setForeground(QColor(color_name))
+            self._formats[level] = text_format
+        self._default_format = QTextCharFormat()
+
+        self.timer = QTimer(text_edit)
+        self.timer.timeout.connect(self._write_pending)
+        self.timer.start(flush_interval_ms)
+
+    def emit(self, record: LogRecord):
+        """Queue a log record, it is written to the widget on the next flush."""
+        try:
+            msg = self.format(record)
+            with self._pending_lock:
+                pending = self._pending
+                last = pending[-1] if pending else None
+                # Coalesce the repeated messages
+                if last is not None and last[0] == record.levelname and last[1] == msg:
+                    last[2] += 1
+                    self.coalesced += 1
+                    return
+                pending.append([record.levelname, msg, 1])
+                # Lines beyond the maximum would be trimmed right away
+                if len(pending) > self.max_lines:
+                    pending.popleft()
+                    self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def _write_pending(self):
+        """
+        Write the queued records to the widget (in the GUI thread).
+
+        This is not `flush`, which logging calls from any thread, e.g. on close.
+        """
+        with self._pending_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, deque()
+            dropped = self.dropped - self._dropped_shown
+            self._dropped_shown = self.dropped
+
+        scroll_bar = self.text_edit.verticalScrollBar()
+        at_bottom = scroll_bar.value() >= scroll_bar.maximum()
+
+        document = self.text_edit.document()
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        first = document.isEmpty()
+        if dropped:
+            pending.appendleft(["TRACE", f"... {dropped} lines not shown ...", 1])
+        for level, msg, repeats in pending:
+            if not first:
+                cursor.insertBlock()
+            first = False
+            if repeats > 1:
+                msg = f"{msg} (x{repeats})"
+            cursor.insertText(msg, self._formats.get(level, self._default_format))
+        cursor.endEditBlock()
+
+        # Follow the new lines, unless the user scrolled up
+        if at_bottom:
+            scroll_bar.setValue(scroll_bar.maximum())
+
+
 # Example usage (main guard)
 if __name__ == "__main__":
     import sys
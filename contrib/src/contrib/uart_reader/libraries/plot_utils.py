@@ -0,0 +1,138 @@
+import time
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt6.QtCore import QRectF
+from PyQt6.QtWidgets import QGraphicsRectItem
+
+from .history_utils import RingHistory
+
+
+class RenderStats:
+    """
+    Measure the render rate of a plot, and the frames it dropped because
+    rendering did not keep up with the target framerate.
+    """
+
+    def __init__(self, target_fps: float):
+        self.target_fps = target_fps
+        self.fps = 0.0
+        self.dropped_frames = 0
+        self.rendered_frames = 0
+        self._last_tick = None
+
+    def tick(self):
+        """Register a render timer tick."""
+        now = time.perf_counter()
+        if self._last_tick is not None:
+            elapsed = max(now - self._last_tick, 1e-9)
+            # Exponential moving average, to get a readable value
+            self.fps = 0.9 * self.fps + 0.1 / elapsed if self.fps else 1 / elapsed
+            self.dropped_frames += max(int(elapsed * self.target_fps + 0.5) - 1, 0)
+        self._last_tick = now
+
+    def __str__(self) -> str:
+        return (
+            f"FPS: {self.fps:.2f} (target {self.target_fps}), "
+            f"rendered: {self.rendered_frames}, dropped: {self.dropped_frames}"
+        )
+
+
+class ScrollingMelImage:
+    """
+    Mel spectrograms of a RingHistory, side by side, the most recent on the right.
+
+    Each history slot has its own image item, placed according to the age of
+    its entry. When new data arrives, only the images of the new entries are
+    uploaded, the others are only moved.
+    """
+
+    SPACING = 1.1  # Horizontal distance between two spectrograms
+
+    def __init__(
+        self,
+        plot: pg.PlotItem,
+        mel_length: int,
+        mel_number: int,
+        number_of_bins: int,
+        colormap: str = "viridis",
+        levels=(0, 2**16),
+    ):
+        self.plot = plot
+        self.mel_length = mel_length
+        self.mel_number = mel_number
+        self.levels = levels
+        self.lut = pg.colormap.get(colormap).getLookupTable(nPts=256)
+        self.images = []
+        self._rendered_count = None  # Value of history.count at the last render
+        self._n_images = None
+
+        self.latest_rect = QGraphicsRectItem(-0.6 - 0.025, -0.025, 1.05, 1.05)
+        self.latest_rect.setPen(pg.mkPen("r"))
+        self.plot.addItem(self.latest_rect)
+
+        self.setup(number_of_bins)
+
+    def setup(self, number_of_bins: int):
+        """(Re)create the image items, e.g., when the history length changes."""
+        for image in self.images:
+            self.plot.removeItem(image)
+        self.images = []
+        for _ in range(number_of_bins):
+            image = pg.ImageItem()
+            image.setLookupTable(self.lut)
+            self.plot.addItem(image)
+            self.images.append(image)
+
+        self.plot.setXRange(-number_of_bins * self.SPACING + 0.4, 0.6, padding=0)
+        self.plot.setYRange(-0.05, 1.05, padding=0)
+        self._rendered_count = None
+        self._n_images = None
+
+    def _slice(self, entry: np.ndarray) -> np.ndarray:
+        # Image items are indexed as [x, y], i.e., [time frame, mel bin]
+        return entry.reshape(self.mel_length, self.mel_number).T
+
+    def render(self, history: RingHistory) -> bool:
+        """
+        Update the images with the entries added since the last render.
+
+        If the history is shorter than the number of images, the extra
+        images are hidden.
+
+        :return: Whether something changed.
+        """
+        count = history.count
+        n_images = min(len(self.images), history.capacity)
+        if count == self._rendered_count and n_images == self._n_images:
+            return False
+
+        if (
+            self._rendered_count is None
+            or count < self._rendered_count
+            or n_images != self._n_images
+        ):
+            first = count - n_images  # Full redraw
+            for i, image in enumerate(self.images):
+                image.setVisible(i < n_images)
+        else:
+            first = max(self._rendered_count, count - n_images)
+
+        data = history.data
+        for k in range(first, count):
+            image = self.images[k % n_images]
+            if k < 0:
+                entry = np.zeros((self.mel_number, self.mel_length))
+            else:
+                entry = self._slice(data[k - count])
+            image.setImage(entry, levels=self.levels, autoLevels=False)
+
+        # Move the images, the upload is not done again
+        for k in range(count - n_images, count):
+            age = count - 1 - k
+            rect = QRectF(-age * self.SPACING - 0.6, 0, 1, 1)
+            self.images[k % n_images].setRect(rect)
+
+        self._rendered_count = count
+        self._n_images = n_images
+        return True
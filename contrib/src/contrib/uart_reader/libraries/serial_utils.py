@@ -1,5 +1,6 @@
 # Standard Library
 import logging
+import os
 import sys
 import time
 from queue import Queue
@@ -23,6 +24,8 @@ from PyQt6.QtWidgets import (
 from serial import STOPBITS_ONE, Serial, SerialException
 from serial.tools import list_ports
 
+from .framing_utils import StreamDecoder
+
 
 class SerialController(QThread):
     """
@@ -31,19 +34,30 @@ class SerialController(QThread):
 
     If a prefix is registered, the data_received_prefix signal is emitted with the prefix and the data, and it won't be emitted by data_received_normal.
     If no prefix is registered, the data_received_normal signal is emitted with the data.
+    The *_batch signals carry all the lines of one read at once, prefer them at high data rates:
+    the per-line signals are only emitted if something is connected to them.
+    Binary frames (see framing_utils) of a registered type are emitted like the lines with the
+    prefix registered for that type, with the payload as bytes instead of a hex string.
     If a error or sudden disconnection occurs, the error_occurred signal is emitted with the error message, and the data_received_normal signal is emitted with a TERMINATE string.
 
     Signals:
         data_received_prefix: Emitted when data is received from serial port, with the registered prefix
         data_received_normal: Emitted when data is received from serial port
+        data_received_prefix_batch: Emitted once per read, with the list of (prefix, data) pairs
+        data_received_normal_batch: Emitted once per read, with the list of lines without prefix
         connection_state: Emitted when connection state changes
         error_occurred: Emitted when an error occurs
     """
 
     # Emitted when data is received from serial port, with the registered prefix
-    data_received_prefix = pyqtSignal(str, str)
+    # (the data is a str for text lines, and bytes for binary frames)
+    data_received_prefix = pyqtSignal(str, object)
     # Emitted when data is received from serial port
     data_received_normal = pyqtSignal(str)
+    # Emitted once per read, with all the (prefix, data) pairs received
+    data_received_prefix_batch = pyqtSignal(list)
+    # Emitted once per read, with all the lines received without prefix
+    data_received_normal_batch = pyqtSignal(list)
     # Emitted when connection state changes
     connection_state = pyqtSignal(bool)
     # Emitted when an error occurs
@@ -52,6 +66,9 @@ class SerialController(QThread):
     # Registered prefixes
     _prefixes = set()
 
+    # Environment variable listing extra ports (e.g., pseudo-terminals), separated by os.pathsep
+    VIRTUAL_PORTS_ENV = "UART_READER_PORTS"
+
     # API
     def available_ports(self) -> dict:
         """
@@ -62,23 +79,35 @@ class SerialController(QThread):
                 'COM3': 'ST-Link Microcontroller',
             }
         """
-        return {port.device: port.description for port in list_ports.comports()}
+        ports = {port.device: port.description for port in list_ports.comports()}
+        for port in os.environ.get(self.VIRTUAL_PORTS_ENV, "").split(os.pathsep):
+            if port and os.path.exists(port):
+                ports.setdefault(port, "Virtual port")
+        return ports
 
     def register_prefix(self, prefix: str) -> None:
         """Register a prefix to be used for data_received_prefix signal."""
         self._prefixes.add(prefix)
+        self._framer.set_prefixes(self._prefixes)
         self.logger.debug(f"Registered prefix: {prefix}")
 
     def unregister_prefix(self, prefix: str) -> None:
         """Unregister a prefix."""
         self._prefixes.discard(prefix)
+        self._framer.set_prefixes(self._prefixes)
         self.logger.debug(f"Unregistered prefix: {prefix}")
 
     def unregister_all_prefixes(self) -> None:
         """Unregister all prefixes."""
         self._prefixes.clear()
+        self._framer.set_prefixes(self._prefixes)
         self.logger.debug("Unregistered all prefixes")
 
+    def register_frame_type(self, frame_type: int, prefix: str) -> None:
+        """Emit the binary frames of a given type as data received with a given prefix."""
+        self._framer.set_frame_prefix(frame_type, prefix)
+        self.logger.debug(f"Registered frame type {frame_type:#04x} as: {prefix}")
+
     def write_message(self, message: str) -> None:
         """Write a message to the serial port."""
         if self.is_connected and message:
@@ -117,6 +146,8 @@ class SerialController(QThread):
         self._write_queue = Queue()
         self._lock = Lock()
         self._buffer_size = 1024 * 8
+        self._read_timeout = 0.02  # Maximum time a read blocks waiting for data
+        self._framer = StreamDecoder(self._prefixes)
         self._thread_id = None
         self._serial_freeze = False
         self._serial_buffering = True
@@ -182,7 +213,7 @@ class SerialController(QThread):
                 self._serial = Serial(
                     port=self._port_request,
                     baudrate=self._baudrate,
-                    timeout=1.0,
+                    timeout=self._read_timeout,
                     write_timeout=1.0,
                     bytesize=8,
                     stopbits=STOPBITS_ONE,
@@ -212,7 +243,7 @@ class SerialController(QThread):
 
     def _read_loop(self) -> None:
         """Main reading loop with connection monitoring"""
-        accumulated_data = bytearray()
+        self._framer.clear()
 
         while self._running:
             try:
@@ -225,70 +256,56 @@ class SerialController(QThread):
                 if not self._write_queue.empty() and self._serial_write_allow:
                     self._process_write_queue()
 
-                # Read available data with timeout
-                try:
-                    # Read data if available and not frozen with buffering
-                    if self._serial.in_waiting > 0 and not (
-                        self._serial_freeze and self._serial_buffering
-                    ):
-                        # Read a chunk of data (not an entire line)
-                        data = self._serial.read(min(self._serial.in_waiting, 1024))
-
-                        # If frozen but not buffering, just discard the data
-                        if self._serial_freeze and not self._serial_buffering:
-                            continue
-
-                        # If we have data to process
-                        if data:
-                            # Add to our accumulated data
-                            accumulated_data.extend(data)
-
-                            # Check if we have complete messages (separated by newlines)
-                            while b"\n" in accumulated_data:
-                                # Split at the first newline
-                                line, accumulated_data = accumulated_data.split(
-                                    b"\n", 1
-                                )
-
-                                try:
-                                    # Decode and emit signals
-                                    decoded = line.decode("ascii").strip()
-
-                                    # Process prefixes
-                                    if self._prefixes:
-                                        # Check for prefixes
-                                        for prefix in self._prefixes:
-                                            if decoded.startswith(prefix):
-                                                self.data_received_prefix.emit(
-                                                    prefix, decoded[len(prefix) :]
-                                                )
-                                                break
-                                        else:
-                                            self.data_received_normal.emit(decoded)
-                                    else:
-                                        self.data_received_normal.emit(decoded)
-
-                                except UnicodeDecodeError as e:
-                                    self.logger.warning(f"Decode error: {e}")
-                    else:
-                        # Small sleep to prevent CPU hogging (1ms)
-                        time.sleep(0.001)
+                # If frozen with buffering, leave the data in the port buffer
+                if self._serial_freeze and self._serial_buffering:
+                    time.sleep(self._read_timeout)
+                    continue
 
+                try:
+                    # Block until some data arrives (or the timeout expires),
+                    # then take everything that is already waiting
+                    data = self._serial.read(max(self._serial.in_waiting, 1))
+                    if data and self._serial.in_waiting:
+                        data += self._serial.read(self._serial.in_waiting)
                 except (SerialException, OSError) as e:
                     # Handle serial port errors
                     self._handle_error(f"Serial port error: {e}")
                     break
-                except Exception as e:
-                    self.logger.warning(f"Processing error: {e}")
+
+                # If frozen but not buffering, just discard the data
+                if not data or self._serial_freeze:
                     continue
 
-                # Small sleep to prevent CPU hogging (1ms)
-                time.sleep(0.001)
+                try:
+                    self._emit_lines(data)
+                except Exception as e:
+                    self.logger.warning(f"Processing error: {e}")
 
             except Exception as e:
                 self._handle_error(f"Unexpected error in read loop: {e}")
                 break
 
+    def _emit_lines(self, data: bytes) -> None:
+        """Split received data into lines and frames, and emit them in batches"""
+        decode_errors = self._framer.decode_errors
+        prefixed, normal = self._framer.feed(data)
+        if self._framer.decode_errors != decode_errors:
+            self.logger.warning(
+                f"Decode error: {self._framer.decode_errors - decode_errors} "
+                "non-ASCII line(s) or corrupted frame(s) dropped"
+            )
+
+        if prefixed:
+            self.data_received_prefix_batch.emit(prefixed)
+            if self.receivers(self.data_received_prefix):
+                for prefix, line in prefixed:
+                    self.data_received_prefix.emit(prefix, line)
+        if normal:
+            self.data_received_normal_batch.emit(normal)
+            if self.receivers(self.data_received_normal):
+                for line in normal:
+                    self.data_received_normal.emit(line)
+
     def _process_write_queue(self) -> None:
         """Process pending write operations"""
         try:
@@ -0,0 +1,166 @@
+import pytest
+
+from . import framing_utils as fu
+from .framing_utils import LineFramer, StreamDecoder
+
+
+def test_line_framer():
+    framer = LineFramer(["DF:HEX:", "DF:"])
+
+    assert framer.feed(b"hello\nDF:HEX:00") == ([], ["hello"])
+    assert framer.feed(b"FF") == ([], [])
+    assert framer.feed(b"\nDF:12\n\xff\nbye") == (
+        [("DF:HEX:", "00FF"), ("DF:", "12")],
+        [],
+    )
+    assert framer.decode_errors == 1
+
+    framer.clear()
+    assert framer.feed(b"\n") == ([], [""])
+
+
+def test_line_framer_partial_line_not_rescanned():
+    framer = LineFramer()
+    for _ in range(100):
+        framer.feed(b"x" * 10)
+
+    assert framer._scan == 1000  # The next feed starts scanning here
+    assert framer.feed(b"\nab") == ([], ["x" * 1000])
+    assert framer._scan == 2
+
+
+def test_crc16():
+    assert fu.crc16(b"123456789") == 0x29B1  # CRC-16/CCITT-FALSE check value
+    assert fu.crc16(b"") == 0xFFFF
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"\x00",
+        b"\x00\x00",
+        b"\x11\x22\x00\x33",
+        bytes(range(1, 255)),  # 254 non-zero bytes
+        bytes(range(1, 256)),
+        bytes(range(256)) * 3,
+    ],
+)
+def test_cobs_round_trip(data):
+    encoded = fu.cobs_encode(data)
+    assert b"\x00" not in encoded
+    assert fu.cobs_decode(encoded) == data
+
+
+def test_cobs_decode_errors():
+    with pytest.raises(fu.FrameError, match="Zero byte"):
+        fu.cobs_decode(b"\x01\x00")
+    with pytest.raises(fu.FrameError, match="Truncated"):
+        fu.cobs_decode(b"\x05\x01")
+
+
+def test_frame_round_trip():
+    payload = bytes(range(256)) * 2
+    frame = fu.encode_frame(fu.FRAME_TYPE_MEL, payload)
+
+    assert frame[0] == frame[-1] == 0
+    assert b"\x00" not in frame[1:-1]
+    assert fu.decode_frame(frame[1:-1]) == (fu.FRAME_TYPE_MEL, payload)
+
+
+def test_corrupted_frames():
+    body = fu.cobs_decode(fu.encode_frame(fu.FRAME_TYPE_MEL, b"\x01\x02\x03")[1:-1])
+
+    corrupted = bytearray(body)
+    corrupted[3] ^= 0xFF  # In the payload
+    with pytest.raises(fu.FrameError, match="CRC"):
+        fu.decode_frame(fu.cobs_encode(bytes(corrupted)))
+
+    with pytest.raises(fu.FrameError, match="Length"):
+        fu.decode_frame(fu.cobs_encode(body[:-3] + body[-2:]))
+
+    with pytest.raises(fu.FrameError, match="too short"):
+        fu.decode_frame(fu.cobs_encode(body[:4]))
+
+    with pytest.raises(fu.FrameError, match="too long"):
+        fu.encode_frame(fu.FRAME_TYPE_MEL, bytes(fu.MAX_PAYLOAD_LENGTH + 1))
+
+
+def make_decoder():
+    return StreamDecoder(
+        ["DF:HEX:", "LOG:"],
+        {fu.FRAME_TYPE_MEL: "DF:HEX:", fu.FRAME_TYPE_AUDIO: "SND:HEX:"},
+    )
+
+
+def feed_all(decoder, chunks):
+    prefixed, normal = [], []
+    for chunk in chunks:
+        chunk_prefixed, chunk_normal = decoder.feed(chunk)
+        prefixed += chunk_prefixed
+        normal += chunk_normal
+    return prefixed, normal
+
+
+def test_stream_decoder_mixed():
+    stream = (
+        b"LOG:boot\n"
+        + fu.encode_frame(fu.FRAME_TYPE_MEL, b"\x00\x01")
+        + b"DF:HEX:0A0B\nhello\n"
+        + fu.encode_frame(fu.FRAME_TYPE_AUDIO, b"\xff" * 300)
+        + fu.encode_frame(fu.FRAME_TYPE_CONFIG, b"{}")
+        + b"bye\n"
+    )
+    expected = (
+        [
+            ("LOG:", "boot"),
+            ("DF:HEX:", b"\x00\x01"),
+            ("DF:HEX:", "0A0B"),
+            ("SND:HEX:", b"\xff" * 300),
+        ],
+        ["hello", "bye"],
+    )
+
+    # At once, and byte by byte
+    decoder = make_decoder()
+    assert decoder.feed(stream) == expected
+    decoder = make_decoder()
+    assert feed_all(decoder, [stream[i : i + 1] for i in range(len(stream))]) == (
+        expected
+    )
+    assert decoder.unknown_frames == 1
+    assert decoder.decode_errors == 0
+
+
+def test_stream_decoder_resync():
+    frame = fu.encode_frame(fu.FRAME_TYPE_MEL, b"\x01\x02\x03\x04")
+    corrupted = bytearray(frame)
+    corrupted[4] ^= 0x01
+
+    decoder = make_decoder()
+    prefixed, _ = feed_all(
+        decoder,
+        [
+            frame[3:],  # Joined in the middle of a frame
+            b"LOG:a\n",
+            bytes(corrupted),
+            b"LOG:b\n",
+            frame,
+        ],
+    )
+
+    # The text after the corrupted frame, and the next frame, are received
+    assert prefixed == [
+        ("LOG:", "a"),
+        ("LOG:", "b"),
+        ("DF:HEX:", b"\x01\x02\x03\x04"),
+    ]
+    assert decoder.frame_errors > 0
+
+
+def test_stream_decoder_lost_frame():
+    decoder = StreamDecoder(["LOG:"], {}, max_frame_size=16)
+
+    assert decoder.feed(b"\x00" + b"\x01" * 20) == ([], [])
+    assert decoder.frame_errors == 1
+    assert decoder.feed(b"\nLOG:ok\n") == ([("LOG:", "ok")], ["\x01" * 20])
@@ -0,0 +1,65 @@
+import numpy as np
+
+from .history_utils import RingHistory
+
+
+def test_ring_history_wrap_around():
+    history = RingHistory(3, 2, 4)
+    np.testing.assert_array_equal(history.data, np.zeros((3, 2)))
+
+    for i in range(5):
+        history.push(np.full(2, i), np.eye(4)[i % 4])
+
+    assert history.count == 5
+    np.testing.assert_array_equal(history.data[:, 0], [2, 3, 4])
+    np.testing.assert_array_equal(history.latest_data, [4, 4])
+    np.testing.assert_array_equal(history.latest_class_proba, np.eye(4)[0])
+
+    history.set_latest_class_proba(np.full(4, 0.25))
+    np.testing.assert_array_equal(history.class_proba[-1], np.full(4, 0.25))
+    np.testing.assert_array_equal(history.class_proba[0], np.eye(4)[2])
+
+
+def test_ring_history_resize():
+    history = RingHistory(4, 1, 2)
+    for i in range(6):
+        history.push([i])
+
+    history.resize(2)
+    np.testing.assert_array_equal(history.data[:, 0], [4, 5])
+    assert history.count == 2
+
+    history.resize(3)
+    np.testing.assert_array_equal(history.data[:, 0], [0, 4, 5])
+
+
+def test_ring_history_version():
+    history = RingHistory(2, 1, 2)
+    versions = [history.version]
+    for change in (
+        lambda: history.push([1]),
+        lambda: history.set_latest_class_proba([0.5, 0.5]),
+        history.reset,
+        lambda: history.resize(3),
+    ):
+        change()
+        versions.append(history.version)
+
+    # Each change gives a new version, even those that reallocate the arrays
+    assert versions == sorted(set(versions))
+
+
+def test_ring_history_save_load(tmp_path):
+    history = RingHistory(3, 2, 4)
+    for i in range(4):
+        history.push(np.full(2, i), np.eye(4)[i])
+
+    history.save(tmp_path / "history.npz")
+    loaded = RingHistory.load(tmp_path / "history.npz")
+    np.testing.assert_array_equal(loaded.data, history.data)
+    np.testing.assert_array_equal(loaded.class_proba, history.class_proba)
+
+    history.save(tmp_path / "latest.npz", single=True)
+    with np.load(tmp_path / "latest.npz") as latest:
+        np.testing.assert_array_equal(latest["data"], [[3, 3]])
+        np.testing.assert_array_equal(latest["class_proba"], [np.eye(4)[3]])
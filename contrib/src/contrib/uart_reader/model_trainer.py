@@ -2,7 +2,7 @@ import os
 import pickle
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 import numpy as np
 from sklearn.base import BaseEstimator
@@ -40,13 +40,53 @@ class AbstractModelWrapper(ABC):
         """
         pass
 
-    @abstractmethod
-    def predict_hist(self, X: List[np.ndarray[np.ndarray]]) -> np.ndarray:
+    def predict_hist(self, X: Union[np.ndarray, List[np.ndarray]]) -> np.ndarray:
         """
-        Predict the probabilities of the classes for the whole history.
-        The input X is a list of 2D arrays of shape (n_samples, n_features).
+        Predict the probabilities of the classes for the whole history,
+        averaged over the history.
+        The input X is a stacked array of shape (n_hist, n_features) or
+        (n_hist, n_samples, n_features), or a list of n_hist arrays
+        of shape (n_samples, n_features).
+        The whole history is predicted with a single call to `predict`.
         """
-        pass
+        X = np.asarray(X)
+        if X.ndim == 2:
+            X = X[:, np.newaxis, :]
+        n_hist, n_samples, n_features = X.shape
+        proba = self.predict(X.reshape(n_hist * n_samples, n_features))
+        return proba.reshape(n_hist, n_samples, -1).mean(axis=0)
+
+
+class HistoryPredictor:
+    """
+    Incremental version of `AbstractModelWrapper.predict_hist`.
+
+    The probabilities of the last `num_hist` entries are kept in a ring
+    buffer, so that only the newest entry is predicted on each update.
+    """
+
+    def __init__(self, model: AbstractModelWrapper, num_hist: int):
+        self.model = model
+        self.num_hist = max(num_hist, 1)
+        self.probas: Optional[np.ndarray] = None  # (num_hist, n_classes)
+        self.count = 0
+
+    def reset(self):
+        """Forget the history."""
+        self.probas = None
+        self.count = 0
+
+    def update(self, x: np.ndarray) -> np.ndarray:
+        """
+        Add a new entry (1D feature vector) to the history, and return the
+        probabilities of the classes averaged over the history.
+        """
+        proba = self.model.predict(np.reshape(x, (1, -1)))[0]
+        if self.probas is None:
+            self.probas = np.zeros((self.num_hist, len(proba)))
+        self.probas[self.count % self.num_hist] = proba
+        self.count += 1
+        return self.probas[: min(self.count, self.num_hist)].mean(axis=0)
 
 
 ####################################################################################################
@@ -73,11 +113,6 @@ class DecisionTreeWrapper(AbstractModelWrapper):
         """Predict class probabilities."""
         return self.model.predict_proba(X)
 
-    def predict_hist(self, X: List[np.ndarray[np.ndarray]]) -> np.ndarray:
-        """Predict class probabilities over a sequence and return the average."""
-        proba_list = [self.model.predict_proba(x) for x in X]
-        return np.mean(proba_list, axis=0)
-
 
 # USER CODE HERE
 
@@ -208,9 +243,15 @@ def example():
     print(loaded_model.model.predict(X_test))
 
     # Predict using the loaded model with history
-    X_hist = [(np.random.rand(400) * ADC_MAX_VALUE).reshape(1, -1) for _ in range(10)]
+    X_hist = np.random.rand(10, 400) * ADC_MAX_VALUE  # (num_hist, n_features)
     print(loaded_model.model.predict_hist(X_hist))
 
+    # Predict incrementally, as new data arrives
+    hist_predictor = HistoryPredictor(loaded_model.model, num_hist=10)
+    for x in X_hist:
+        proba = hist_predictor.update(x)
+    print(proba)
+
 
 # Run the Main Function (Example or user code)
 def main():
@@ -0,0 +1,136 @@
+"""
+Stand-in for the MCU: replay a captured UART session on a pseudo-terminal,
+at the pace of a real serial link.
+
+The session is either a log file written by the UART reader
+("[time stamp] PREFIX : payload" lines) or a raw capture of the serial
+output (e.g., "DF:HEX:..." lines). With --binary, the prefixed lines are
+sent as binary frames (see libraries/framing_utils.py) instead of text.
+
+Only available on POSIX systems (Linux, macOS).
+"""
+
+import os
+import re
+import time
+from typing import Dict, Iterable, List
+
+import click
+
+from .libraries import framing_utils as fu
+
+LOG_LINE = re.compile(r"^\[[^\]]*\] (\S+) : (.*)$")
+
+
+def read_session(file_name: str) -> List[str]:
+    """Read the lines sent by the MCU from a captured session."""
+    lines = []
+    with open(file_name) as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            match = LOG_LINE.match(line)
+            lines.append(match.group(1) + match.group(2) if match else line)
+    return lines
+
+
+def encode_session(
+    lines: Iterable[str], frame_types: Dict[str, int], binary: bool = False
+) -> List[bytes]:
+    """
+    Encode the lines of a session as sent on the serial link.
+
+    :param lines: The lines, see read_session.
+    :param frame_types: The frame type of each prefix.
+    :param binary: Whether to send the prefixed lines as binary frames.
+    """
+    chunks = []
+    for line in lines:
+        prefix = next((p for p in frame_types if line.startswith(p)), None)
+        if binary and prefix is not None:
+            payload = bytes.fromhex(line[len(prefix) :])
+            chunks.append(fu.encode_frame(frame_types[prefix], payload))
+        else:
+            chunks.append(line.encode("ascii") + b"\n")
+    return chunks
+
+
+def open_pty():
+    """
+    Open a pseudo-terminal in raw mode.
+
+    :return: The file descriptors of the master and slave sides,
+        and the path of the slave side (the port to connect to).
+    """
+    import tty
+
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    return master, slave, os.ttyname(slave)
+
+
+def replay(fd: int, chunks: List[bytes], baudrate: int) -> float:
+    """
+    Write the chunks at the pace of a serial link (10 bits per byte).
+
+    Sleeps are computed from the start of the replay, so that the delays
+    do not accumulate, and the rate stays the nominal one.
+
+    :return: The duration of the replay, in seconds.
+    """
+    bytes_per_second = baudrate / 10
+    start = time.perf_counter()
+    sent = 0
+    for chunk in chunks:
+        view = memoryview(chunk)
+        while view:
+            view = view[os.write(fd, view) :]
+        sent += len(chunk)
+        delay = start + sent / bytes_per_second - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    return time.perf_counter() - start
+
+
+@click.command()
+@click.argument("session", type=click.Path(exists=True, dir_okay=False))
+@click.option("--baudrate", default=115200, help="Baud rate of the emulated link")
+@click.option(
+    "--binary", is_flag=True, help="Send the MEL and audio data as binary frames"
+)
+@click.option("--loop", is_flag=True, help="Replay the session until interrupted")
+@click.option("--mel_prefix", default="DF:HEX:", help="Prefix of the MEL data")
+@click.option("--audio_prefix", default="SND:HEX:", help="Prefix of the audio data")
+def main(
+    session: str,
+    baudrate: int,
+    binary: bool,
+    loop: bool,
+    mel_prefix: str,
+    audio_prefix: str,
+):
+    """Replay a captured UART session on a pseudo-terminal."""
+    frame_types = {mel_prefix: fu.FRAME_TYPE_MEL, audio_prefix: fu.FRAME_TYPE_AUDIO}
+    chunks = encode_session(read_session(session), frame_types, binary)
+    n_bytes = sum(len(chunk) for chunk in chunks)
+
+    master, slave, port = open_pty()
+    click.echo(f"Replaying {len(chunks)} lines ({n_bytes} bytes) on {port}")
+    click.echo(f"Connect with: UART_READER_PORTS={port} uart-reader")
+    input("Press Enter to start ...")
+    try:
+        while True:
+            duration = replay(master, chunks, baudrate)
+            click.echo(f"Replayed in {duration:.2f} s ({n_bytes / duration:.0f} B/s)")
+            if not loop:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        os.close(master)
+        os.close(slave)
+
+
+if __name__ == "__main__":
+    main()
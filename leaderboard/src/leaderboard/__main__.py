@@ -11,12 +11,14 @@ import requests
 from flask import Flask
 from flask.cli import FlaskGroup, load_dotenv
 from flask_apscheduler import APScheduler
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, emit
 
 from common.click import verbosity
 from common.logging import logger
 
-from .backend.models import DEFAULT_CONFIG_PATH, Config
+from .backend.journal import Journal
+from .backend.models import DEFAULT_CONFIG_PATH, Config, LeaderboardBroadcast
+from .benchmark import benchmark
 from .cli.config import config
 from .play_sound import play_sound
 from .routes.index import index
@@ -83,6 +85,11 @@ def create_app() -> Flask:
     with app.app_context():
         app.config["CONFIG"].rounds_config.restart()
 
+    journal = app.config["JOURNAL"] = open_journal(
+        app.config["CONFIG"],
+        app.config.get("JOURNAL_PATH", Path(config_path).with_suffix(".journal")),
+    )
+
     scheduler = APScheduler()
     scheduler.init_app(app)
     limiter.init_app(app)
@@ -117,14 +124,25 @@ def create_app() -> Flask:
             **socketio_kwargs,
         )
 
+    broadcast = LeaderboardBroadcast()
+
     @socketio.on("connect")
+    @socketio.on("request_leaderboard")
+    def send_leaderboard():
+        """Sends the whole leaderboard to a new (or out of sync) client."""
+        with app.app_context():
+            emit(
+                "update_leaderboard",
+                broadcast.full_message(app.config["CONFIG"].get_leaderboard_status()),
+            )
+
     @scheduler.task("interval", id="update_client", seconds=1.0)
     def update_leaderboard():
-        """Updates periodically the leaderboard by fetching data from the submissions."""
+        """Updates periodically the leaderboard, only sending the rows that changed."""
         with app.app_context():
             socketio.emit(
                 "update_leaderboard",
-                app.config["CONFIG"].get_leaderboard_status().dict(),
+                broadcast.delta_message(app.config["CONFIG"].get_leaderboard_status()),
             )
 
     @scheduler.task("interval", id="save_config", seconds=5.0)
@@ -135,9 +153,42 @@ def create_app() -> Flask:
                 app.config["CONFIG"].save_to(app.config["CONFIG_PATH"])
                 app.config["CONFIG_NEEDS_SAVE"] = False
 
+    schedule_journal(scheduler, app, journal)
+
     return app
 
 
+def open_journal(config: Config, path: Path) -> Journal:
+    """
+    Restore the submissions and the state of the rounds from the journal,
+    then compact it.
+    """
+    journal = Journal(path)
+    applied = journal.replay(config)
+    if applied:
+        logger.info(f"Restored {applied} records from the journal at '{journal.path}'.")
+    journal.compact(config)
+    return journal
+
+
+def schedule_journal(scheduler: APScheduler, app: Flask, journal: Journal):
+    """Schedule the periodic syncs and compactions of the journal."""
+
+    @scheduler.task("interval", id="sync_journal", seconds=1.0)
+    def sync_journal():
+        """Flushes the journal to disk, and records the round transitions."""
+        with app.app_context():
+            journal.record_state_if_changed(app.config["CONFIG"])
+            journal.sync()
+
+    @scheduler.task("interval", id="compact_journal", seconds=60.0)
+    def compact_journal():
+        """Rewrites the journal when most of its records are outdated."""
+        with app.app_context():
+            if journal.needs_compaction(app.config["CONFIG"]):
+                journal.compact(app.config["CONFIG"])
+
+
 @click.group(cls=FlaskGroup, create_app=create_app)
 @verbosity
 def main():
@@ -195,6 +246,7 @@ def serve(_open: bool = False, _open_doc: bool = False):
     app.extensions["socketio"].run(app, host=host, port=port)
 
 
+main.add_command(benchmark)
 main.add_command(config)
 main.add_command(play_sound)
 main.add_command(submit)
@@ -0,0 +1,217 @@
+import json
+import os
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+
+from common.logging import logger
+
+from .models import Config, RoundsConfig, SecurityGuess, Submission
+
+
+class Journal:
+    """
+    Append-only journal of the submissions and admin actions, so that a server
+    restart does not lose the current contest.
+
+    Each record is one compact JSON line, with a type `t`:
+
+    - "state": the answers and timing of the rounds, after play or pause;
+    - "restart": same, after a restart (submissions are cleared), including
+      the automatic ones (see :meth:`RoundsConfig.get_generation`);
+    - "sub": a submission;
+    - "del": the deletion of submissions (key, and optional round and lap);
+    - "sec": a security round submission.
+
+    Records are written to the OS when appended, and fsync'ed at most every
+    `sync_interval` seconds (see :meth:`sync`). The journal is compacted
+    (rewritten with only the current state) on :meth:`compact`.
+    """
+
+    def __init__(self, path: Path, sync_interval: float = 1.0):
+        self.path = Path(path)
+        self.sync_interval = sync_interval
+        self.records = 0  # Number of records in the file
+        self._lock = Lock()
+        self._state_lock = Lock()
+        self._file = None
+        self._dirty = False
+        self._last_sync = time.monotonic()
+        self._last_state = None
+
+    def open(self):
+        """Open the journal for appending."""
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        """Sync and close the journal."""
+        self.sync(force=True)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def append(self, record: dict):
+        """Append a record."""
+        line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            self._file.flush()
+            self.records += 1
+            self._dirty = True
+        if time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def sync(self, force: bool = False):
+        """Flush the appended records to disk, if not done recently."""
+        with self._lock:
+            if self._file is None or not self._dirty:
+                return
+            if not force and time.monotonic() - self._last_sync < self.sync_interval:
+                return
+            os.fsync(self._file.fileno())
+            self._dirty = False
+            self._last_sync = time.monotonic()
+
+    # Records
+
+    def record_submission(self, submission: Submission):
+        self.append({"t": "sub", **json.loads(submission.json())})
+
+    def record_delete(self, key: str, round: Optional[int], lap: Optional[int]):
+        self.append({"t": "del", "key": key, "round": round, "lap": lap})
+
+    def record_security(self, key: str, security_guess: SecurityGuess):
+        self.append({"t": "sec", "key": key, **security_guess.dict()})
+
+    def _record_state(self, state: dict, restart: bool):
+        # A restart not recorded yet, e.g., done by get_current_lap
+        last_state = self._last_state
+        if last_state is not None and state["generation"] != last_state["generation"]:
+            restart = True
+        self._last_state = state
+        self.append({"t": "restart" if restart else "state", "state": state})
+
+    def record_state(self, config: Config, restart: bool = False):
+        with self._state_lock:
+            self._record_state(config.rounds_config.get_state(), restart)
+
+    def record_state_if_changed(self, config: Config):
+        """
+        Record the state if it changed, e.g., when a new round started.
+
+        The state is recorded as a restart if the rounds restarted since
+        the last recorded state.
+        """
+        with self._state_lock:
+            state = config.rounds_config.get_state()
+            if state != self._last_state:
+                self._record_state(state, restart=False)
+
+    def record_restart_if_needed(self, config: Config):
+        """
+        Record the state if the rounds restarted since the last recorded state.
+
+        Call it before recording a submission, so that a restart done when
+        the contest is finished does not clear that submission on replay.
+        """
+        last_state = self._last_state
+        if (
+            last_state is not None
+            and config.rounds_config.get_generation() != last_state["generation"]
+        ):
+            self.record_state_if_changed(config)
+
+    # Replay and compaction
+
+    def replay(self, config: Config) -> int:
+        """
+        Apply the records of the journal to a config.
+
+        A truncated last record (e.g., after a crash) is ignored.
+
+        :return: The number of records applied.
+        """
+        if not self.path.exists():
+            return 0
+
+        rounds_config = config.rounds_config
+        applied = 0
+        with open(self.path, encoding="utf-8") as f:
+            for number, line in enumerate(f, start=1):
+                try:
+                    self._apply(rounds_config, json.loads(line))
+                    applied += 1
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.warning(f"Ignoring journal record at line {number}: {e}")
+
+        self.records = applied
+        return applied
+
+    @staticmethod
+    def _apply(rounds_config: RoundsConfig, record: dict):
+        kind = record.pop("t")
+        if kind == "sub":
+            rounds_config.add_submission(Submission(**record))
+        elif kind == "del":
+            rounds_config.delete_submissions(**record)
+        elif kind == "sec":
+            key = record.pop("key")
+            rounds_config.set_security_round_submission(key, SecurityGuess(**record))
+        elif kind in ("state", "restart"):
+            if kind == "restart":
+                rounds_config.clear_submissions()
+            rounds_config.set_state(record["state"])
+        else:
+            raise ValueError(f"unknown record type `{kind}`")
+
+    def needs_compaction(self, config: Config) -> bool:
+        """Whether most of the records are not needed to restore the state anymore."""
+        rounds_config = config.rounds_config
+        needed = (
+            1
+            + len(rounds_config.get_all_submissions())
+            + len(rounds_config.get_security_round_submissions())
+        )
+        return self.records > 2 * needed
+
+    def compact(self, config: Config):
+        """
+        Rewrite the journal with only the records needed to restore the
+        current state of a config.
+        """
+        rounds_config = config.rounds_config
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with self._lock:
+            self._last_state = rounds_config.get_state()
+            records = [
+                {"t": "restart", "state": self._last_state},
+                *(
+                    {"t": "sub", **json.loads(submission.json())}
+                    for submission in rounds_config.get_all_submissions()
+                ),
+                *(
+                    {"t": "sec", "key": key, **security_guess.dict()}
+                    for key, security_guess in (
+                        rounds_config.get_security_round_submissions().items()
+                    )
+                ),
+            ]
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+            if self._file is not None:
+                self._file.close()
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, "a", encoding="utf-8")
+            self.records = len(records)
+            self._dirty = False
+            self._last_sync = time.monotonic()
@@ -5,7 +5,8 @@ from datetime import datetime
 from enum import Enum
 from pathlib import Path
 from secrets import token_bytes
-from typing import Any, Callable, Dict, List, Optional
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 from pydantic import (
     BaseModel,
@@ -76,6 +77,14 @@ class Submission(BaseModel):
     penalized: bool = False
 
 
+def lap_gain(lap: int, reduce_level: bool) -> float:
+    """
+    Returns the gain (dBFS) of the sound played at a given lap:
+    if the level is reduced, 5 dB less every 4 laps.
+    """
+    return -(lap // 4) * 5.0 if reduce_level else 0.0
+
+
 class RoundConfig(BaseModel):
     name: str = ""
     lap_count: PositiveInt = 16
@@ -83,6 +92,12 @@ class RoundConfig(BaseModel):
     only_check_for_presence: bool = False
     reduce_level: bool = False
 
+    def get_gain(self, lap: int) -> float:
+        """
+        Returns the gain (dBFS) of the sound played at a given lap.
+        """
+        return lap_gain(lap, self.reduce_level)
+
 
 def hex_bytes_validator(val: Any) -> bytes:
     if isinstance(val, bytes):
@@ -135,8 +150,16 @@ class RoundsConfig(BaseModel):
     __current_round: conint(ge=0) = PrivateAttr()
     __finished: bool = PrivateAttr()
     __submissions: List[Submission] = PrivateAttr([])
+    # Index of the submissions by (key, round, lap), in submission order,
+    # and the set of (key, round, lap) that were penalized
+    __lap_submissions: Dict[Tuple[str, int, int], List[Submission]] = PrivateAttr({})
+    __penalized: Set[Tuple[str, int, int]] = PrivateAttr(set())
     __security_round_submissions: Dict[str, SecurityGuess] = PrivateAttr({})
     __await_next_round: bool = PrivateAttr(False)
+    # Incremented whenever a submission is added or removed
+    __submissions_version: int = PrivateAttr(0)
+    # Incremented on each restart
+    __generation: int = PrivateAttr(0)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -179,6 +202,7 @@ class RoundsConfig(BaseModel):
         self.__security_round_submissions[key] = SecurityGuess(
             score=score, traces=traces, time=time.strftime("%H:%M:%S")
         )
+        self.__submissions_version += 1
 
     def get_security_round_submission(self, key: str) -> Optional[SecurityGuess]:
         """
@@ -186,11 +210,45 @@ class RoundsConfig(BaseModel):
         """
         return self.__security_round_submissions.get(key, None)
 
+    def get_security_round_submissions(self) -> Dict[str, SecurityGuess]:
+        """
+        Returns the security round submissions of all groups.
+        """
+        return dict(self.__security_round_submissions)
+
+    def set_security_round_submission(self, key: str, security_guess: SecurityGuess):
+        """
+        Sets the security round submission of a group, e.g., when restoring it.
+        """
+        self.__security_round_submissions[key] = security_guess
+        self.__submissions_version += 1
+
     def add_submission(self, submission: Submission):
         """
         Adds a new submissions to the list.
         """
         self.__submissions.append(submission)
+        self.__index_submission(submission)
+        self.__submissions_version += 1
+
+    def __index_submission(self, submission: Submission):
+        lap_key = (submission.key, submission.round, submission.lap)
+        self.__lap_submissions.setdefault(lap_key, []).append(submission)
+        if submission.penalized:
+            self.__penalized.add(lap_key)
+
+    def __rebuild_index(self):
+        self.__lap_submissions = {}
+        self.__penalized = set()
+        for submission in self.__submissions:
+            self.__index_submission(submission)
+        self.__submissions_version += 1
+
+    def get_submissions_version(self) -> int:
+        """
+        Returns a number that changes whenever submissions are added or removed.
+        """
+        return self.__submissions_version
 
     def get_submissions(
         self, key: str, round: Optional[int], lap: Optional[int]
@@ -202,6 +260,12 @@ class RoundsConfig(BaseModel):
 
         Guesses are sorted with earliest first, oldest last.
         """
+        if round is not None and lap is not None:
+            submissions = self.__lap_submissions.get((key, round, lap), [])
+            return [submission.guess for submission in reversed(submissions)] or [
+                Guess.nothing
+            ]
+
         guesses = (
             submissions.guess
             for submissions in self.__submissions[::-1]
@@ -212,6 +276,12 @@ class RoundsConfig(BaseModel):
 
         return list(guesses) or [Guess.nothing]
 
+    def get_all_submissions(self) -> List[Submission]:
+        """
+        Returns all the submissions, oldest first.
+        """
+        return list(self.__submissions)
+
     def get_submissions_as_dict(
         self, key: str, round: Optional[int], lap: Optional[int]
     ) -> List[dict]:
@@ -233,10 +303,13 @@ class RoundsConfig(BaseModel):
         self.__submissions = [
             submissions
             for submissions in self.__submissions
-            if submissions.key != key
-            and submissions.round != round
-            and submissions.lap != lap
+            if not (
+                submissions.key == key
+                and (submissions.round == round or round is None)
+                and (submissions.lap == lap or lap is None)
+            )
         ]
+        self.__rebuild_index()
 
     def get_last_submission(self, key: str, round: int, lap: int) -> Guess:
         """
@@ -244,30 +317,67 @@ class RoundsConfig(BaseModel):
 
         If no guesses were submitted, Guess.nothing is returned.
         """
-        guesses = (
-            submissions.guess
-            for submissions in self.__submissions[::-1]
-            if submissions.key == key
-            and submissions.round == round
-            and submissions.lap == lap
-        )
-
-        return next(guesses, Guess.nothing)
+        submissions = self.__lap_submissions.get((key, round, lap))
+        return submissions[-1].guess if submissions else Guess.nothing
 
     def is_penalized(self, key: str, round: int, lap: int) -> bool:
         """
         Returns true if a group was penalized for a given round and lap.
         """
-        return any(
-            submissions.penalized
-            for submissions in self.__submissions
-            if submissions.key == key
-            and submissions.round == round
-            and submissions.lap == lap
-        )
+        return (key, round, lap) in self.__penalized
 
-    def restart(self):
+    def clear_submissions(self):
+        """
+        Deletes all the submissions (but not the security round ones).
+        """
         self.__submissions.clear()
+        self.__rebuild_index()
+
+    def get_state(self) -> dict:
+        """
+        Returns the state of the rounds (answers and timing), JSON serializable.
+        """
+        return {
+            "answers": [
+                [guess.value for guess in answers] for answers in self.__answers
+            ],
+            "play_delays": self.__play_delays,
+            "round_start_time": self.__round_start_time,
+            "time_when_paused": self.__time_when_paused,
+            "paused": self.__paused,
+            "current_round": self.__current_round,
+            "finished": self.__finished,
+            "await_next_round": self.__await_next_round,
+            "generation": self.__generation,
+        }
+
+    def set_state(self, state: dict):
+        """
+        Restores the state of the rounds, as returned by get_state.
+        """
+        self.__answers = [
+            [Guess(guess) for guess in answers] for answers in state["answers"]
+        ]
+        self.__play_delays = state["play_delays"]
+        self.__round_start_time = state["round_start_time"]
+        self.__time_when_paused = state["time_when_paused"]
+        self.__paused = state["paused"]
+        self.__current_round = state["current_round"]
+        self.__finished = state["finished"]
+        self.__await_next_round = state["await_next_round"]
+        self.__generation = state.get("generation", 0)
+        self.__submissions_version += 1
+
+    def get_generation(self) -> int:
+        """
+        Returns the number of restarts, including those done when the
+        contest is finished and `restart_when_finished` is set.
+        """
+        return self.__generation
+
+    def restart(self):
+        self.clear_submissions()
+        self.__generation += 1
 
         possibles_answers = Guess.possible_values()
 
@@ -428,6 +538,7 @@ class LeaderboardRow(BaseModel):
 
 
 class LeaderboardStatus(BaseModel):
+    version: conint(ge=0)
     round_name: str
     current_correct_guess: Guess
     current_gain: float
@@ -445,9 +556,63 @@ class LeaderboardStatus(BaseModel):
         extra = Extra.forbid
 
 
+class LeaderboardBroadcast:
+    """
+    Builds the messages sent to the leaderboard clients, so that the rows of
+    the leaderboard are only sent when they changed.
+
+    Every message contains the status without the rows, and its version.
+    Then, either `leaderboard` holds all the rows (full message), or
+    `leaderboard_changes` maps the indices of the rows that changed since
+    version `base_version` to their new value (delta message).
+
+    Messages can be built from several threads.
+    """
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self.rows: List[dict] = []
+        self.__lock = Lock()
+
+    def __rows(self, status: LeaderboardStatus) -> List[dict]:
+        if status.version == self.version:
+            return self.rows
+        return [row.dict() for row in status.leaderboard]
+
+    def full_message(self, status: LeaderboardStatus) -> dict:
+        """Returns a message with all the rows, e.g., for new clients."""
+        message = status.dict(exclude={"leaderboard"})
+        with self.__lock:
+            message["leaderboard"] = self.__rows(status)
+        return message
+
+    def delta_message(self, status: LeaderboardStatus) -> dict:
+        """Returns a message with the rows that changed since the last one."""
+        message = status.dict(exclude={"leaderboard"})
+        with self.__lock:
+            rows = self.__rows(status)
+            if self.version is None or len(rows) != len(self.rows):
+                message["leaderboard"] = rows
+            else:
+                message["base_version"] = self.version
+                message["leaderboard_changes"] = {
+                    i: row
+                    for i, (row, last) in enumerate(zip(rows, self.rows))
+                    if row != last
+                }
+            self.version = status.version
+            self.rows = rows
+        return message
+
+
 class Config(BaseModel):
     group_configs: List[GroupConfig] = []
     rounds_config: RoundsConfig = RoundsConfig()
+    __groups_by_key: Dict[str, GroupConfig] = PrivateAttr({})
+    # Leaderboard rows, with what they were computed from, and their version
+    __rows_cache_key: Optional[tuple] = PrivateAttr(None)
+    __rows_cache: List[LeaderboardRow] = PrivateAttr([])
+    __status_version: int = PrivateAttr(0)
 
     class Config:
         extra = Extra.forbid
@@ -490,30 +655,47 @@ class Config(BaseModel):
             raise IndexError(f"name `{name}` not found")
 
     def get_group_by_key(self, key: str) -> GroupConfig:
-        try:
-            return next(
-                filter(lambda group_config: group_config.key == key, self.group_configs)
-            )
-        except StopIteration:
+        group_config = self.__groups_by_key.get(key)
+        # Groups can be added, and keys changed: check that the map is up to date
+        if (
+            group_config is None
+            or group_config.key != key
+            or len(self.__groups_by_key) != len(self.group_configs)
+        ):
+            self.__groups_by_key = {
+                group_config.key: group_config for group_config in self.group_configs
+            }
+            group_config = self.__groups_by_key.get(key)
+
+        if group_config is None:
             raise IndexError(f"key `{key}` not found")
+        return group_config
 
-    def get_leaderboard_status(self) -> LeaderboardStatus:
-        current_correct_guess = self.rounds_config.get_current_correct_guess()
-        current_round = self.rounds_config.get_current_round()
-        current_lap = self.rounds_config.get_current_lap()
-        current_gain = (
-            -(current_lap // 4) * 5.0
-            if self.rounds_config.get_current_round_config().reduce_level
-            else 0.0
+    def get_leaderboard_rows(
+        self, current_round: int, current_lap: int
+    ) -> List[LeaderboardRow]:
+        """
+        Returns the leaderboard rows of the current round.
+
+        Rows are only recomputed when submissions, the current round or lap,
+        or the groups changed; the status version is then incremented.
+        """
+        cache_key = (
+            self.rounds_config.get_submissions_version(),
+            current_round,
+            current_lap,
+            tuple(
+                (group_config.key, group_config.name, group_config.hidden)
+                for group_config in self.group_configs
+            ),
         )
-        number_of_rounds = self.rounds_config.get_number_of_rounds()
-        number_of_laps = self.rounds_config.get_current_number_of_laps()
-        paused = self.rounds_config.is_paused()
-        time_before_next_lap = self.rounds_config.time_before_next_lap()
-        time_before_playing = self.rounds_config.time_before_playing()
-        finished = self.rounds_config.is_finished()
+        if cache_key == self.__rows_cache_key:
+            return self.__rows_cache
 
         correct_answers = self.rounds_config.get_current_round_answers()
+        only_check_for_presence = (
+            self.rounds_config.get_current_round_config().only_check_for_presence
+        )
 
         rows = []
         for group_config in self.group_configs:
@@ -529,7 +711,7 @@ class Config(BaseModel):
                 )
 
                 if guess != Guess.nothing:
-                    if self.rounds_config.get_current_round_config().only_check_for_presence:
+                    if only_check_for_presence:
                         guess = Guess.received
                         status = Status.correct
                         score += 1
@@ -573,7 +755,29 @@ class Config(BaseModel):
         for row in rows:
             CONTEST_RESULTS[current_round_name][row.name] = row.score
 
+        self.__rows_cache_key = cache_key
+        self.__rows_cache = rows
+        self.__status_version += 1
+        return rows
+
+    def get_leaderboard_status(self) -> LeaderboardStatus:
+        current_correct_guess = self.rounds_config.get_current_correct_guess()
+        current_round = self.rounds_config.get_current_round()
+        current_lap = self.rounds_config.get_current_lap()
+        current_gain = self.rounds_config.get_current_round_config().get_gain(
+            current_lap
+        )
+        number_of_rounds = self.rounds_config.get_number_of_rounds()
+        number_of_laps = self.rounds_config.get_current_number_of_laps()
+        paused = self.rounds_config.is_paused()
+        time_before_next_lap = self.rounds_config.time_before_next_lap()
+        time_before_playing = self.rounds_config.time_before_playing()
+        finished = self.rounds_config.is_finished()
+
+        rows = self.get_leaderboard_rows(current_round, current_lap)
+
         return LeaderboardStatus(
+            version=self.__status_version,
             round_name=self.rounds_config.get_current_round_config().name,
             current_correct_guess=current_correct_guess,
             current_gain=current_gain,
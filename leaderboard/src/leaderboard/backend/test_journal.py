@@ -0,0 +1,134 @@
+import time
+
+from .journal import Journal
+from .models import Config, Guess, RoundsConfig, SecurityGuess, Submission
+
+
+def make_config(**kwargs) -> Config:
+    config = Config(rounds_config=RoundsConfig(**kwargs))
+    config.rounds_config.restart()
+    return config
+
+
+def submit(journal: Journal, config: Config, key: str, guess: Guess, lap: int = 0):
+    submission = Submission(round=0, lap=lap, key=key, guess=guess, penalized=False)
+    config.rounds_config.add_submission(submission)
+    journal.record_restart_if_needed(config)
+    journal.record_submission(submission)
+
+
+def replayed(journal: Journal) -> Config:
+    config = make_config()
+    Journal(journal.path).replay(config)
+    return config
+
+
+def test_journal_replay(tmp_path):
+    config = make_config()
+    journal = Journal(tmp_path / "journal")
+    journal.open()
+    journal.record_state(config, restart=True)
+    submit(journal, config, "a", Guess.fire)
+    submit(journal, config, "a", Guess.gunshot, lap=1)
+    submit(journal, config, "b", Guess.chainsaw)
+    config.rounds_config.delete_submissions("a", 0, 1)
+    journal.record_delete("a", 0, 1)
+    security_guess = SecurityGuess(score=50, traces=10, time="12:00:00")
+    journal.record_security("a", security_guess)
+    config.rounds_config.play()
+    journal.record_state(config)
+    journal.close()
+
+    restored = replayed(journal)
+    rounds_config = restored.rounds_config
+    assert rounds_config.get_state() == config.rounds_config.get_state()
+    assert rounds_config.get_all_submissions() == (
+        config.rounds_config.get_all_submissions()
+    )
+    assert rounds_config.get_security_round_submission("a") == security_guess
+    assert journal.records == 7
+
+
+def test_journal_truncated_record(tmp_path):
+    config = make_config()
+    journal = Journal(tmp_path / "journal")
+    journal.open()
+    journal.record_state(config, restart=True)
+    submit(journal, config, "a", Guess.fire)
+    journal.close()
+    with open(journal.path, "a") as f:
+        f.write('{"t":"sub","ro')
+
+    restored = make_config()
+    assert Journal(journal.path).replay(restored) == 2
+    assert len(restored.rounds_config.get_all_submissions()) == 1
+
+
+def test_journal_compaction(tmp_path):
+    config = make_config()
+    journal = Journal(tmp_path / "journal")
+    journal.open()
+    journal.record_state(config, restart=True)
+    for lap in range(5):
+        submit(journal, config, "a", Guess.fire, lap=lap)
+        config.rounds_config.delete_submissions("a", 0, lap)
+        journal.record_delete("a", 0, lap)
+    submit(journal, config, "b", Guess.gunshot)
+
+    assert journal.needs_compaction(config)
+    journal.compact(config)
+    assert journal.records == 2
+    assert not journal.needs_compaction(config)
+
+    # Records are still appended after the compaction
+    submit(journal, config, "c", Guess.chainsaw)
+    journal.close()
+
+    restored = replayed(journal)
+    assert restored.rounds_config.get_state() == config.rounds_config.get_state()
+    assert [s.key for s in restored.rounds_config.get_all_submissions()] == ["b", "c"]
+
+
+def test_journal_automatic_restart(tmp_path):
+    config = make_config(restart_when_finished=True)
+    rounds_config = config.rounds_config
+    journal = Journal(tmp_path / "journal")
+    journal.open()
+    journal.record_state(config, restart=True)
+    submit(journal, config, "a", Guess.fire)
+
+    # Last lap of the last round is over
+    state = rounds_config.get_state()
+    state["current_round"] = rounds_config.get_number_of_rounds() - 1
+    state["paused"] = False
+    state["round_start_time"] = time.time() - 10**6
+    rounds_config.set_state(state)
+    journal.record_state(config)
+
+    generation = rounds_config.get_generation()
+    assert rounds_config.get_current_lap() == 0  # Restarts the contest
+    assert rounds_config.get_generation() == generation + 1
+    assert rounds_config.get_all_submissions() == []
+
+    submit(journal, config, "b", Guess.gunshot)
+    journal.record_state_if_changed(config)
+    journal.close()
+
+    restored = replayed(journal)
+    assert restored.rounds_config.get_state() == rounds_config.get_state()
+    assert [s.key for s in restored.rounds_config.get_all_submissions()] == ["b"]
+
+
+def test_journal_automatic_restart_recorded_by_sync(tmp_path):
+    config = make_config(restart_when_finished=True)
+    journal = Journal(tmp_path / "journal")
+    journal.open()
+    journal.record_state(config, restart=True)
+    submit(journal, config, "a", Guess.fire)
+
+    config.rounds_config.restart()  # As done by get_current_lap
+    journal.record_state_if_changed(config)
+    journal.close()
+
+    assert journal.path.read_text().splitlines()[-1].startswith('{"t":"restart"')
+    assert replayed(journal).rounds_config.get_all_submissions() == []
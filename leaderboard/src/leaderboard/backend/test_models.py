@@ -0,0 +1,125 @@
+import itertools
+import random
+
+from .models import (
+    Guess,
+    LeaderboardBroadcast,
+    LeaderboardRow,
+    LeaderboardStatus,
+    RoundsConfig,
+    Submission,
+)
+
+KEYS = ["a", "b", "c"]
+ROUNDS = [0, 1]
+LAPS = [0, 1, 2]
+
+
+def matching(submissions, key, round, lap):
+    return [
+        submission
+        for submission in submissions
+        if submission.key == key
+        and (submission.round == round or round is None)
+        and (submission.lap == lap or lap is None)
+    ]
+
+
+def assert_same_as_scan(rounds_config: RoundsConfig):
+    """Compare the indexed lookups to a linear scan of all the submissions."""
+    submissions = rounds_config.get_all_submissions()
+    for key, round, lap in itertools.product(KEYS, ROUNDS, LAPS):
+        lap_submissions = matching(submissions, key, round, lap)
+        guesses = [submission.guess for submission in reversed(lap_submissions)]
+        assert rounds_config.get_last_submission(key, round, lap) == (
+            lap_submissions[-1].guess if lap_submissions else Guess.nothing
+        )
+        assert rounds_config.is_penalized(key, round, lap) == any(
+            submission.penalized for submission in lap_submissions
+        )
+        assert rounds_config.get_submissions(key, round, lap) == (
+            guesses or [Guess.nothing]
+        )
+
+
+def test_submission_index():
+    rng = random.Random(0)
+    rounds_config = RoundsConfig()
+    rounds_config.restart()
+    guesses = [Guess.chainsaw, Guess.fire, Guess.fireworks, Guess.gunshot]
+    submissions = [
+        Submission(
+            key=rng.choice(KEYS),
+            round=rng.choice(ROUNDS),
+            lap=rng.choice(LAPS),
+            guess=rng.choice(guesses),
+            penalized=rng.random() < 0.2,
+        )
+        for _ in range(100)
+    ]
+    for submission in submissions:
+        rounds_config.add_submission(submission)
+    assert_same_as_scan(rounds_config)
+
+    for key, round, lap in [("a", None, 1), ("b", 0, None), ("c", None, None)]:
+        version = rounds_config.get_submissions_version()
+        deleted = matching(submissions, key, round, lap)
+        submissions = [
+            submission for submission in submissions if submission not in deleted
+        ]
+        rounds_config.delete_submissions(key, round, lap)
+        assert rounds_config.get_all_submissions() == submissions
+        assert rounds_config.get_submissions_version() != version
+        assert_same_as_scan(rounds_config)
+
+    assert rounds_config.get_submissions("c", None, None) == [Guess.nothing]
+
+
+def make_status(version: int, scores) -> LeaderboardStatus:
+    return LeaderboardStatus(
+        version=version,
+        round_name="Round",
+        current_correct_guess=Guess.fire,
+        current_gain=1.0,
+        current_round=0,
+        current_lap=0,
+        number_of_rounds=1,
+        number_of_laps=1,
+        paused=False,
+        time_before_next_lap=1.0,
+        time_before_playing=0.5,
+        finished=False,
+        leaderboard=[
+            LeaderboardRow(name=name, answers=[], score=score, security_round=None)
+            for name, score in scores.items()
+        ],
+    )
+
+
+def test_leaderboard_broadcast():
+    broadcast = LeaderboardBroadcast()
+    first = make_status(1, {"a": 0.0, "b": 0.0, "c": 0.0})
+    # The first delta has nothing to be based on
+    message = broadcast.delta_message(first)
+    assert "base_version" not in message
+    assert message["leaderboard"] == [row.dict() for row in first.leaderboard]
+    rows = list(message["leaderboard"])
+
+    second = make_status(2, {"a": 0.0, "b": 1.0, "c": 0.0})
+    message = broadcast.delta_message(second)
+    assert message["version"] == 2
+    assert message["base_version"] == 1
+    assert "leaderboard" not in message
+    assert list(message["leaderboard_changes"]) == [1]
+    for i, row in message["leaderboard_changes"].items():
+        rows[i] = row
+    assert rows == [row.dict() for row in second.leaderboard]
+
+    # Same version: no changes, and the full message has all the rows
+    message = broadcast.delta_message(make_status(2, {"a": 0.0, "b": 1.0, "c": 0.0}))
+    assert message["base_version"] == 2
+    assert message["leaderboard_changes"] == {}
+    message = broadcast.full_message(second)
+    assert "base_version" not in message
+    assert message["leaderboard"] == rows
+    assert message == {**second.dict(exclude={"leaderboard"}), "leaderboard": rows}
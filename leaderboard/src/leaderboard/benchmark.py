@@ -0,0 +1,249 @@
+import random
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import click
+import eventlet
+import requests
+import socketio
+
+from common.logging import logger
+
+from .backend.models import DEFAULT_CONFIG_PATH, Config, Guess
+from .utils import get_url, percentile
+
+
+class Recorder:
+    """Latencies and status codes of the requests, per endpoint."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.codes: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, endpoint: str, latency: float, code: str):
+        self.latencies[endpoint].append(latency)
+        self.codes[endpoint][code] += 1
+
+    def report(self, duration: float) -> str:
+        lines = [
+            f"{'endpoint':<16}{'count':>8}{'req/s':>9}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}  codes"
+        ]
+        for endpoint in sorted(self.latencies):
+            values = sorted(1000 * latency for latency in self.latencies[endpoint])
+            codes = ", ".join(
+                f"{code}: {count}"
+                for code, count in sorted(self.codes[endpoint].items())
+            )
+            lines.append(
+                f"{endpoint:<16}{len(values):>8}{len(values) / duration:>9.1f}"
+                f"{percentile(values, 50):>9.1f}{percentile(values, 95):>9.1f}"
+                f"{percentile(values, 99):>9.1f}{values[-1]:>9.1f}  {codes}"
+            )
+        return "\n".join(lines)
+
+
+def run_at_rate(rate: float, deadline: float, task):
+    """Call task at a fixed rate (with a random phase) until the deadline."""
+    period = 1 / rate
+    next_time = time.perf_counter() + random.random() * period
+    while True:
+        delay = next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        if time.perf_counter() >= deadline:
+            return
+        task()
+        next_time += period
+
+
+def timed_request(
+    recorder: Recorder, endpoint: str, session: requests.Session, method: str, url: str
+):
+    start = time.perf_counter()
+    try:
+        code = str(session.request(method, url, timeout=10).status_code)
+    except requests.RequestException as e:
+        code = type(e).__name__
+    recorder.record(endpoint, time.perf_counter() - start, code)
+
+
+def submitter(recorder: Recorder, url: str, key: str, rate: float, deadline: float):
+    session = requests.Session()
+    guesses = Guess.possible_values()
+
+    def submit():
+        guess = random.choice(guesses).value
+        timed_request(
+            recorder,
+            "POST /submit",
+            session,
+            "POST",
+            f"{url}/lelec210x/leaderboard/submit/{key}/{guess}",
+        )
+
+    run_at_rate(rate, deadline, submit)
+
+
+def poller(recorder: Recorder, url: str, rate: float, deadline: float):
+    session = requests.Session()
+    run_at_rate(
+        rate,
+        deadline,
+        lambda: timed_request(
+            recorder,
+            "GET /status",
+            session,
+            "GET",
+            f"{url}/lelec210x/leaderboard/status",
+        ),
+    )
+
+
+def listener(recorder: Recorder, url: str, socketio_path: str, deadline: float):
+    """Socket.IO client, recording the time between two leaderboard updates."""
+    client = socketio.Client(reconnection=False)
+    last = [None]
+
+    @client.on("update_leaderboard")
+    def on_update(message):
+        now = time.perf_counter()
+        if last[0] is not None:
+            kind = "full" if message.get("leaderboard") is not None else "delta"
+            recorder.record("socket interval", now - last[0], kind)
+        last[0] = now
+
+    start = time.perf_counter()
+    try:
+        client.connect(url, socketio_path=socketio_path, wait_timeout=10)
+    except socketio.exceptions.ConnectionError as e:
+        latency = time.perf_counter() - start
+        recorder.record("socket connect", latency, type(e).__name__)
+        return
+    recorder.record("socket connect", time.perf_counter() - start, "connected")
+    time.sleep(max(deadline - time.perf_counter(), 0))
+    client.disconnect()
+
+
+@click.command()
+@click.option(
+    "-u",
+    "--url",
+    default=None,
+    envvar="LEADERBOARD_URL",
+    show_default=True,
+    show_envvar=True,
+    help="Base API url. If not specified, will use FLASK_RUN_HOST and FLASK_RUN_PORT.",
+)
+@click.option(
+    "-c",
+    "--config",
+    "config_path",
+    default=DEFAULT_CONFIG_PATH,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Config of the server, to read the keys of the groups.",
+    show_default=True,
+)
+@click.option(
+    "-g",
+    "--groups",
+    default=10,
+    type=click.IntRange(min=1),
+    help="Number of groups submitting guesses (keys are reused if needed).",
+    show_default=True,
+)
+@click.option(
+    "-r",
+    "--rate",
+    default=1.0,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Submissions per second, per group.",
+    show_default=True,
+)
+@click.option(
+    "-p",
+    "--pollers",
+    default=5,
+    type=click.IntRange(min=0),
+    help="Number of clients polling the status.",
+    show_default=True,
+)
+@click.option(
+    "--poll-rate",
+    default=2.0,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Status requests per second, per poller.",
+    show_default=True,
+)
+@click.option(
+    "-l",
+    "--listeners",
+    default=10,
+    type=click.IntRange(min=0),
+    help="Number of Socket.IO clients (leaderboard pages).",
+    show_default=True,
+)
+@click.option(
+    "--socketio-path",
+    default="socket.io",
+    help="Socket.IO path of the server.",
+    show_default=True,
+)
+@click.option(
+    "-d",
+    "--duration",
+    default=30.0,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Duration of the benchmark, in seconds.",
+    show_default=True,
+)
+def benchmark(
+    url: Optional[str],
+    config_path: Path,
+    groups: int,
+    rate: float,
+    pollers: int,
+    poll_rate: float,
+    listeners: int,
+    socketio_path: str,
+    duration: float,
+):
+    """
+    Load a leaderboard server with submissions, status requests and Socket.IO
+    clients, and report the throughput and latencies of each endpoint.
+
+    Submissions are refused while the server is paused (code 400),
+    so start the rounds first.
+    """
+    # Make the sockets cooperative, so that all clients run concurrently
+    eventlet.monkey_patch()
+
+    url = url or get_url()
+    config = Config.parse_file(config_path)
+    keys = [group_config.key for group_config in config.group_configs]
+    if not keys:
+        raise click.UsageError(f"No group found in `{config_path}`.")
+    if len(keys) < groups:
+        logger.warning(f"Only {len(keys)} groups in the config, keys are reused.")
+
+    recorder = Recorder()
+    pool = eventlet.GreenPool(groups + pollers + listeners)
+    start = time.perf_counter()
+    deadline = start + duration
+
+    for _ in range(listeners):
+        pool.spawn(listener, recorder, url, socketio_path, deadline)
+    for i in range(groups):
+        pool.spawn(submitter, recorder, url, keys[i % len(keys)], rate, deadline)
+    for _ in range(pollers):
+        pool.spawn(poller, recorder, url, poll_rate, deadline)
+
+    logger.info(
+        f"Running for {duration:.0f} s: {groups} groups submitting at {rate} Hz, "
+        f"{pollers} pollers at {poll_rate} Hz, {listeners} listeners."
+    )
+    pool.waitall()
+
+    click.echo(recorder.report(time.perf_counter() - start))
@@ -0,0 +1,343 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+
+from common.logging import logger
+
+from .utils import get_url, percentile
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# A guess may have been accepted by the server on other errors,
+# and sending it again could be penalized
+POST_RETRY_STATUS_CODES = {429, 503}
+
+
+def is_not_sent(error: requests.RequestException) -> bool:
+    """Whether a request failed before it was sent, e.g., connection refused."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError) or isinstance(
+        error, requests.ReadTimeout
+    ):
+        return False
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, "reason", reason)  # Unwrap urllib3's MaxRetryError
+    # Also raised when the connection cannot be opened at all
+    return isinstance(reason, ConnectTimeoutError)
+
+
+class _SupersededError(Exception):
+    """Raised when a newer guess was queued before a guess could be sent."""
+
+
+class ClientMetrics:
+    """Counters and latencies (in seconds) of the requests sent by a client."""
+
+    def __init__(self, maxlen: int = 1000):
+        self.latencies: Deque[float] = deque(maxlen=maxlen)
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.superseded = 0
+
+    def summary(self) -> Dict[str, float]:
+        """Return the counters, and the percentiles of the last latencies (in ms)."""
+        # Copied at once, as latencies can be appended from other threads
+        values = sorted(1000 * latency for latency in list(self.latencies))
+        return {
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "coalesced": self.coalesced,
+            "superseded": self.superseded,
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "max_ms": values[-1] if values else float("nan"),
+        }
+
+
+class SubmissionClient:
+    """
+    Client submitting guesses to the leaderboard.
+
+    All requests go through one session, so the connections are kept alive
+    and reused instead of being opened for each guess.
+
+    Failed requests are retried, with an exponential backoff, until the
+    deadline of the guess. Status requests are retried on any connection
+    error, timeout, or server error. Guesses are only retried if they could
+    not be sent, or if the server refused them without processing them
+    (429 and 503), as the server may have accepted them otherwise.
+
+    Guesses submitted in the background are sent one at a time, in order, so
+    that the server (which keeps the last guess of each lap) never receives
+    an older guess after a newer one. A queued guess is dropped, and a failed
+    one is not retried, once a newer guess is queued: it would be replaced
+    anyway.
+
+    If `coalesce` is set, a guess identical to the last one accepted
+    (and not penalized) during the current lap is not sent again. The end
+    of the current lap is read from the status of the leaderboard,
+    once per lap.
+
+    :param url: Base API url. If not specified,
+        uses FLASK_RUN_HOST and FLASK_RUN_PORT.
+    :param key: The key of the group.
+    :param timeout: The timeout of each request, in seconds.
+    :param retries: The maximum number of retries of a guess.
+    :param backoff: The delay before the first retry, in seconds.
+    :param deadline: The time to submit a guess, in seconds,
+        including the retries.
+    :param coalesce: Whether to skip repeated guesses in the same lap.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        key: str = "",
+        timeout: float = 1.0,
+        retries: int = 2,
+        backoff: float = 0.05,
+        deadline: float = 2.0,
+        coalesce: bool = False,
+    ):
+        self.url = url or get_url()
+        self.key = key
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.deadline = deadline
+        self.coalesce = coalesce
+        self.metrics = ClientMetrics()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # A single worker, so that the guesses are sent in order
+        self._executor = ThreadPoolExecutor(1, "submission-client")
+        self._lock = Lock()
+        # Number of the last guess queued by submit_background or submit_async
+        self._queued = 0
+        # (round, lap, guess) of the last submission accepted and not penalized
+        self._last_accepted: Optional[Tuple[int, int, str]] = None
+        # (round, lap) and end (time.monotonic) of the current lap
+        self._lap: Optional[Tuple[int, int]] = None
+        self._lap_end = 0.0
+
+    def close(self):
+        """Wait for the pending guesses, and close the connections."""
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def __enter__(self) -> "SubmissionClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        deadline: Optional[float] = None,
+        superseded: Optional[Callable[[], bool]] = None,
+    ) -> requests.Response:
+        """
+        Send a request, retrying on failures until the deadline.
+
+        POST requests are not idempotent, so they are only retried if they
+        were not sent, or on :data:`POST_RETRY_STATUS_CODES`.
+
+        :param deadline: The deadline, as a time of :func:`time.monotonic`.
+        :param superseded: Checked before each attempt, the request is
+            abandoned as soon as it returns True.
+        :return: The last response.
+        :raise requests.RequestException: If the last attempt failed.
+        :raise _SupersededError: If the request was abandoned.
+        """
+        url = f"{self.url}/lelec210x/leaderboard/{path}"
+        if deadline is None:
+            deadline = time.monotonic() + self.deadline
+        idempotent = method != "POST"
+        retry_status_codes = (
+            RETRY_STATUS_CODES if idempotent else POST_RETRY_STATUS_CODES
+        )
+
+        attempt = 0
+        while True:
+            if superseded is not None and superseded():
+                raise _SupersededError()
+            remaining = deadline - time.monotonic()
+            start = time.monotonic()
+            try:
+                response = self.session.request(
+                    method, url, timeout=max(min(self.timeout, remaining), 0.01)
+                )
+                error = None
+            except (requests.ConnectionError, requests.Timeout) as e:
+                response, error = None, e
+            with self._lock:
+                self.metrics.latencies.append(time.monotonic() - start)
+                self.metrics.sent += 1
+
+            if error is not None:
+                retry = idempotent or is_not_sent(error)
+            else:
+                retry = response.status_code in retry_status_codes
+            delay = self.backoff * 2**attempt
+            if not retry or attempt >= self.retries:
+                break
+            if time.monotonic() + delay >= deadline:
+                break
+
+            attempt += 1
+            with self._lock:
+                self.metrics.retried += 1
+            reason = error if error is not None else response.status_code
+            logger.debug(f"Retrying {method} {path} in {delay:.3f}s: {reason}")
+            time.sleep(delay)
+
+        if error is not None or response.status_code >= 400:
+            with self._lock:
+                self.metrics.failed += 1
+        if error is not None:
+            raise error
+        return response
+
+    def _refresh_lap(self):
+        """Read the current lap and its end from the leaderboard status."""
+        try:
+            status = self._request("GET", "status").json()
+        except (requests.RequestException, ValueError) as e:
+            logger.debug(f"Could not read the leaderboard status: {e}")
+            return
+        with self._lock:
+            self._lap = (status["current_round"], status["current_lap"])
+            self._lap_end = time.monotonic() + status["time_before_next_lap"]
+
+    def _is_repeated(self, guess: str) -> bool:
+        with self._lock:
+            return (
+                self._last_accepted is not None
+                and self._last_accepted[:2] == self._lap
+                and self._last_accepted[2] == guess
+                # Leave a margin, as the lap may end before our request arrives
+                and time.monotonic() < self._lap_end - self.timeout
+            )
+
+    def submit(
+        self, guess: str, deadline: Optional[float] = None
+    ) -> Optional[requests.Response]:
+        """
+        Submit a guess.
+
+        :param guess: The guess.
+        :param deadline: The deadline, as a time of :func:`time.monotonic`.
+            Defaults to now plus the `deadline` of the client.
+        :return: The response of the server, or None if the guess was coalesced.
+        :raise requests.RequestException: If the guess could not be sent.
+        """
+        return self._submit(guess, deadline)
+
+    def _queue(self) -> int:
+        """Return the number of a new queued guess."""
+        with self._lock:
+            self._queued += 1
+            return self._queued
+
+    def _is_superseded(self, number: int) -> bool:
+        with self._lock:
+            return number < self._queued
+
+    def _submit(
+        self, guess: str, deadline: Optional[float], number: Optional[int] = None
+    ) -> Optional[requests.Response]:
+        """
+        Submit a guess, see :meth:`submit`.
+
+        :param number: The number of the guess, if it was queued.
+            It is not sent (again) once a newer guess is queued.
+        :return: The response of the server, or None if the guess was coalesced
+            or superseded.
+        """
+        guess = guess.lower()
+        if self.coalesce and self._is_repeated(guess):
+            with self._lock:
+                self.metrics.coalesced += 1
+            return None
+
+        superseded = None
+        if number is not None:
+            superseded = partial(self._is_superseded, number)
+        try:
+            response = self._request(
+                "POST", f"submit/{self.key}/{guess}", deadline, superseded
+            )
+        except _SupersededError:
+            logger.debug(f"Guess {guess} was superseded by a newer one")
+            with self._lock:
+                self.metrics.superseded += 1
+            return None
+
+        if self.coalesce and response.status_code == 200:
+            result = response.json()
+            lap = (result["round"], result["lap"])
+            with self._lock:
+                if result["penalized"]:
+                    self._last_accepted = None
+                else:
+                    self._last_accepted = (*lap, guess)
+                new_lap = lap != self._lap or time.monotonic() >= self._lap_end
+            if new_lap:
+                self._refresh_lap()
+
+        return response
+
+    def _submit_logged(self, guess: str, deadline: float, number: int):
+        try:
+            response = self._submit(guess, deadline, number)
+        except requests.RequestException as e:
+            logger.error(f"Could not submit guess {guess}: {e}")
+            return None
+        if response is not None and response.status_code != 200:
+            logger.error(f"Guess {guess} was refused: {response.text}")
+        return response
+
+    def submit_background(self, guess: str) -> Future:
+        """
+        Submit a guess from the worker thread, without waiting for the response.
+
+        Errors are logged.
+
+        :return: A future of the response (see :meth:`submit`), which is also
+            None if a newer guess was queued before this one was sent.
+        """
+        # The deadline starts now, not when the worker is available
+        deadline = time.monotonic() + self.deadline
+        return self._executor.submit(
+            self._submit_logged, guess, deadline, self._queue()
+        )
+
+    async def submit_async(self, guess: str) -> Optional[requests.Response]:
+        """
+        Asynchronous version of :meth:`submit`, run in the worker thread.
+
+        :return: The response (see :meth:`submit`), or None if a newer guess
+            was queued before this one was sent.
+        """
+        deadline = time.monotonic() + self.deadline
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._submit, guess, deadline, self._queue()
+        )
@@ -3,7 +3,7 @@ import time
 from multiprocessing import Process
 from pathlib import Path
 from threading import Thread
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 import click
 import requests
@@ -15,6 +15,7 @@ from classification.datasets import Dataset
 from common.click import verbosity
 from common.logging import logger
 
+from .backend.models import lap_gain
 from .utils import get_url
 
 session = requests.Session()
@@ -36,6 +37,156 @@ def normalize_dBFS(  # noqa: N802
     return seg.apply_gain(gain)
 
 
+def lap_gains(number_of_laps: int) -> List[float]:
+    """
+    Return the gains at which sounds can be played during a round
+    of `number_of_laps` laps, with or without a reduced level.
+    """
+    return sorted(
+        {
+            lap_gain(lap, reduce_level)
+            for lap in range(number_of_laps)
+            for reduce_level in (False, True)
+        },
+        reverse=True,
+    )
+
+
+class SoundCache:
+    """
+    Sound files decoded once, then normalized and faded at each gain,
+    so that nothing is left to compute when a sound must be played.
+    """
+
+    def __init__(self, files: Iterable[Path], gains: Iterable[float], _format: str):
+        self._format = _format
+        self._files = list(files)
+        self._gains: Set[float] = set()
+        self._decoded: Dict[Path, AudioSegment] = {}
+        self._rendered: Dict[Tuple[Path, float], AudioSegment] = {}
+        self.add_gains(gains)
+
+    def add_gains(self, gains: Iterable[float]):
+        """Render all the sound files at the gains not rendered yet."""
+        gains = sorted(set(gains) - self._gains, reverse=True)
+        if not gains:
+            return
+        start = time.monotonic()
+        for file in self._files:
+            decoded = self.decode(file)
+            for gain in gains:
+                self._rendered[(file, gain)] = self.render(decoded, gain)
+        self._gains.update(gains)
+        logger.info(
+            f"Rendered {len(self._files)} sound files at gains {gains} "
+            f"in {time.monotonic() - start:.1f}s."
+        )
+
+    def decode(self, file: Path) -> AudioSegment:
+        decoded = self._decoded.get(file)
+        if decoded is None:
+            decoded = AudioSegment.from_file(file, format=self._format)
+            decoded = self._decoded[file] = decoded.set_channels(1)
+        return decoded
+
+    @staticmethod
+    def render(sound: AudioSegment, gain: float) -> AudioSegment:
+        return sound.normalize_dBFS(gain).fade_in(250).fade_out(250)
+
+    def get(self, file: Path, gain: float) -> AudioSegment:
+        """Return the rendered sound, rendering it now if not in the cache."""
+        rendered = self._rendered.get((file, gain))
+        if rendered is None:
+            logger.warning(f"Sound {file} was not rendered in advance at gain {gain}.")
+            rendered = self.render(self.decode(file), gain)
+            self._rendered[(file, gain)] = rendered
+        return rendered
+
+
+def sleep_until(deadline: float, spin: float = 0.002):
+    """
+    Sleep until a time of :func:`time.monotonic`.
+
+    The last `spin` seconds are busy-waited, as sleeping is not
+    accurate to the millisecond on every OS.
+    """
+    delay = deadline - time.monotonic() - spin
+    if delay > 0:
+        time.sleep(delay)
+    while time.monotonic() < deadline:
+        pass
+
+
+def start_bg_noise(bg_noise: Optional[Path]) -> Process:
+    """
+    Play background noise in a loop, in another process.
+
+    :param bg_noise: The sound file to play, or None for white noise.
+    """
+    from pydub.playback import play
+
+    bg_noise_sound = (
+        AudioSegment.from_file(bg_noise)
+        if bg_noise
+        else WhiteNoise().to_audio_segment(duration=10_000)
+    )
+    bg_noise_sound = bg_noise_sound.set_channels(1).normalize_dBFS(-20)
+
+    def play_bg_noise(sound):
+        while True:
+            play(sound)
+
+    process = Process(target=play_bg_noise, args=(bg_noise_sound,), daemon=True)
+    process.start()
+    logger.info("Playing background noise...")
+    return process
+
+
+def wait_for_server(url: str, key: str, random_key: Optional[str]):
+    """Wait for the server to be up, and check that the keys are valid."""
+    while True:
+        logger.debug("Checking if the server is up and the admin key is valid.")
+        # Timeout issue?
+        # https://stackoverflow.com/questions/70917108/python-requests-get-only-responds-if-adding-a-time-out
+        response = session.get(f"{url}/lelec210x/leaderboard/check/{key}", timeout=1)
+
+        code = response.status_code
+
+        if code == 200:
+            assert response.json()["admin"], "key must belong to an admin!"
+
+            if random_key:
+                logger.debug("Checking if the server is up and the 'random' is valid.")
+                response = session.get(
+                    f"{url}/lelec210x/leaderboard/check/{random_key}",
+                    timeout=1,
+                )
+
+                if response.status_code != 200:
+                    raise ValueError(response.json())
+
+            return
+        elif code == 401:
+            raise ValueError(response.json())
+        else:
+            logger.info("Waiting server to be ready...")
+            time.sleep(0.2)
+
+
+def submit_guesses(
+    url: str, key: str, random_key: Optional[str], category: str, classes: List[str]
+):
+    """Submit the correct guess as admin, and a random one as the random group."""
+    # Admins are always correct :-)
+    session.post(f"{url}/lelec210x/leaderboard/submit/{key}/{category}", timeout=1)
+
+    if random_key:  # Random player
+        guess = random.choice(classes)
+        session.post(
+            f"{url}/lelec210x/leaderboard/submit/{random_key}/{guess}", timeout=1
+        )
+
+
 @click.command()
 @click.option(
     "-u",
@@ -89,6 +240,15 @@ def normalize_dBFS(  # noqa: N802
     help="An optional path to an MP3 sound file playing background noise during the contest. "
     "If not set, a white noise will be played.",
 )
+@click.option(
+    "--gain",
+    "gains",
+    multiple=True,
+    type=float,
+    help="Additional gain (dBFS) at which sounds are rendered at startup. "
+    "The gains of a round are rendered as soon as its number of laps "
+    "is read from the status, e.g., while the contest is paused.",
+)
 @verbosity
 def play_sound(
     url: Optional[str],
@@ -97,6 +257,7 @@ def play_sound(
     soundfiles: Optional[Path],
     _format=Optional[str],
     bg_noise: Optional[Path] = None,
+    gains: Tuple[float, ...] = (),
 ):
     """
     Play "correct" sound according to the leaderboard status.
@@ -107,8 +268,11 @@ def play_sound(
 
     Both groups always submit guesses during the valid timing window,
     so they never have any penalty on that regard.
+
+    All sounds are decoded and rendered at each gain in advance,
+    and played at the time given by the status, measured with a
+    monotonic clock.
     """
-    from pydub import AudioSegment
     from pydub.playback import play
 
     url = url or get_url()
@@ -122,63 +286,30 @@ def play_sound(
         dataset_kwargs["format"] = _format
 
     dataset = Dataset(**dataset_kwargs)
+    files = [
+        file for cls in dataset.list_classes() for file in dataset.get_class_files(cls)
+    ]
+    sounds = SoundCache(files, (0.0, *gains), _format)
 
-    bg_noise_sound = (
-        AudioSegment.from_file(bg_noise)
-        if bg_noise
-        else WhiteNoise().to_audio_segment(duration=10_000)
-    )
-    bg_noise_sound = bg_noise_sound.set_channels(1).normalize_dBFS(-20)
-
-    def play_bg_noise(sound):
-        while True:
-            play(sound)
-
-    bg_noise = Process(target=play_bg_noise, args=(bg_noise_sound,), daemon=True)
-    bg_noise.start()
-    logger.info("Playing background noise...")
-
-    # Wait for server to be up
-    # and checks if admin rights
-    while True:
-        logger.debug("Checking if the server is up and the admin key is valid.")
-        # Timeout issue?
-        # https://stackoverflow.com/questions/70917108/python-requests-get-only-responds-if-adding-a-time-out
-        response = session.get(f"{url}/lelec210x/leaderboard/check/{key}", timeout=1)
-
-        code = response.status_code
-
-        if code == 200:
-            assert response.json()["admin"], "key must belong to an admin!"
-
-            if random_key:
-                logger.debug("Checking if the server is up and the 'random' is valid.")
-                response = session.get(
-                    f"{url}/lelec210x/leaderboard/check/{random_key}",
-                    timeout=1,
-                )
-
-                if response.status_code != 200:
-                    raise ValueError(response.json())
-
-            break
-        elif code == 401:
-            raise ValueError(response.json())
-        else:
-            logger.info("Waiting server to be ready...")
-            time.sleep(0.2)
+    start_bg_noise(bg_noise)
+    wait_for_server(url, key, random_key)
 
     played_sounds = set()
 
     logger.info("Server is ready, starting to play sounds...")
 
     while True:
-        start = time.time()
+        start = time.monotonic()
         json = session.get(
             f"{url}/lelec210x/leaderboard/status/{key}", timeout=1
         ).json()
-        delay = time.time() - start
-        logger.info(f"Took {delay:.4f}s for the status request.")
+        end = time.monotonic()
+        logger.info(f"Took {end - start:.4f}s for the status request.")
+        # The status was computed by the server about halfway through the request
+        status_time = (start + end) / 2
+
+        # Rounds start paused, so this is usually done before the first lap
+        sounds.add_gains(lap_gains(json["number_of_laps"]))
 
         if json["paused"]:
             logger.info("Leaderboard is paused...")
@@ -212,28 +343,15 @@ def play_sound(
 
         logger.info(f"Playing sound in {time_before_playing}.")
 
-        start = time.time()
-        sound = (
-            AudioSegment.from_file(sound_file, format=_format)
-            .set_channels(1)
-            .normalize_dBFS(sound_gain)
-            .fade_in(250)
-            .fade_out(250)
-        )
-
-        time.sleep(time_before_playing - max(0, time.time() - start))
+        sound = sounds.get(sound_file, sound_gain)
 
+        play_time = status_time + time_before_playing
+        sleep_until(play_time)
         thread = Thread(target=play, args=(sound,))
         thread.start()
-        logger.info(f"Playing sound now: {sound_file}.")
-
-        # Admins are always correct :-)
-        session.post(f"{url}/lelec210x/leaderboard/submit/{key}/{category}", timeout=1)
+        skew = time.monotonic() - play_time
+        logger.info(f"Playing sound now ({1000 * skew:+.1f}ms late): {sound_file}.")
 
-        if random_key:  # Random player
-            guess = random.choice(dataset.list_classes())
-            session.post(
-                f"{url}/lelec210x/leaderboard/submit/{random_key}/{guess}", timeout=1
-            )
+        submit_guesses(url, key, random_key, category, dataset.list_classes())
 
         thread.join()
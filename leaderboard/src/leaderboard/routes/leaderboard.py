@@ -43,8 +43,10 @@ class Security(Resource):
             guess_bytes = urllib.parse.unquote_to_bytes(guess)
             traces_int = int(traces)
 
-            app.config["CONFIG"].rounds_config.add_security_round_submission(
-                key, guess_bytes, traces_int
+            rounds_config = app.config["CONFIG"].rounds_config
+            rounds_config.add_security_round_submission(key, guess_bytes, traces_int)
+            app.config["JOURNAL"].record_security(
+                key, rounds_config.get_security_round_submission(key)
             )
             return make_response(
                 jsonify(
@@ -106,15 +108,16 @@ class Submit(Resource):
             penalized = not rounds_config.accepts_submissions()
 
             if not rounds_config.is_paused():
-                rounds_config.add_submission(
-                    Submission(
-                        round=current_round,
-                        lap=current_lap,
-                        key=key,
-                        guess=guess,
-                        penalized=penalized,
-                    )
+                submission = Submission(
+                    round=current_round,
+                    lap=current_lap,
+                    key=key,
+                    guess=guess,
+                    penalized=penalized,
                 )
+                rounds_config.add_submission(submission)
+                app.config["JOURNAL"].record_restart_if_needed(app.config["CONFIG"])
+                app.config["JOURNAL"].record_submission(submission)
                 return make_response(
                     jsonify(
                         {
@@ -221,6 +224,7 @@ class Submissions(Resource):
                 )
             elif flask.request.method == "DELETE":
                 rounds_config.delete_submissions(key=key, round=round, lap=lap)
+                app.config["JOURNAL"].record_delete(key=key, round=round, lap=lap)
                 return make_response(
                     jsonify(
                         {"method": flask.request.method, "round": round, "lap": lap}
@@ -291,8 +295,12 @@ class Status(Resource):
         Returns the current status of the leaderboard.
         """
         try:
-            leaderboard_status = app.config["CONFIG"].get_leaderboard_status().dict()
-            del leaderboard_status["leaderboard"]
+            # The rows are not needed, do not serialize them
+            leaderboard_status = (
+                app.config["CONFIG"]
+                .get_leaderboard_status()
+                .dict(exclude={"leaderboard"})
+            )
 
             if key:
                 if not app.config["CONFIG"].get_group_by_key(key).admin:
@@ -339,6 +347,7 @@ class Play(Resource):
                 )
 
             app.config["CONFIG"].rounds_config.play()
+            app.config["JOURNAL"].record_state(app.config["CONFIG"])
 
             return make_response(
                 jsonify({"status": "playing"}),
@@ -376,6 +385,7 @@ class Pause(Resource):
                 )
 
             app.config["CONFIG"].rounds_config.pause()
+            app.config["JOURNAL"].record_state(app.config["CONFIG"])
 
             return make_response(
                 jsonify({"status": "paused"}),
@@ -413,6 +423,7 @@ class Restart(Resource):
                 )
 
             app.config["CONFIG"].rounds_config.restart()
+            app.config["JOURNAL"].record_state(app.config["CONFIG"], restart=True)
 
             return make_response(
                 jsonify({"status": "restarted"}),
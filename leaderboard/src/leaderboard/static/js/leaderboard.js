@@ -37,6 +37,25 @@ socket.on("update_leaderboard", (message) => {
     };
   }
 
+  // Only the rows that changed are sent, apply them to the previous ones
+  if (message.leaderboard == null) {
+    let previous = state.client;
+    if (previous != null && previous.version == message.version) {
+      message.leaderboard = previous.leaderboard;
+    } else if (previous != null && previous.version == message.base_version) {
+      message.leaderboard = previous.leaderboard.slice();
+      for (const [index, row] of Object.entries(message.leaderboard_changes)) {
+        message.leaderboard[parseInt(index)] = row;
+      }
+    } else {
+      // Out of sync, ask for the whole leaderboard
+      socket.emit("request_leaderboard");
+      return;
+    }
+  }
+  delete message.base_version;
+  delete message.leaderboard_changes;
+
   if (
     state.client != null &&
     message.current_lap != null &&
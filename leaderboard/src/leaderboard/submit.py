@@ -2,11 +2,10 @@ import json
 from typing import Optional
 
 import click
-import requests
 
 from common.logging import logger
 
-from .utils import get_url
+from .client import SubmissionClient
 
 
 @click.command()
@@ -38,9 +37,8 @@ def submit(
     """
     Submit a guess to the leaderboard.
     """
-    url = url or get_url()
-
-    response = requests.post(f"{url}/lelec210x/leaderboard/submit/{key}/{guess}")
+    with SubmissionClient(url, key) as client:
+        response = client.submit(guess)
 
     response_as_dict = json.loads(response.text)
 
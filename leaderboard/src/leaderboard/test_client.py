@@ -0,0 +1,134 @@
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from .client import SubmissionClient
+
+
+class Handler(BaseHTTPRequestHandler):
+    # Status codes of the next responses, the last one is repeated
+    statuses = [200]
+    delay = 0.0
+    received = []
+
+    def respond(self):
+        Handler.received.append((self.command, self.path))
+        status = Handler.statuses[0]
+        if len(Handler.statuses) > 1:
+            Handler.statuses.pop(0)
+        time.sleep(Handler.delay)
+        if self.command == "GET":
+            body = b'{"current_round":0,"current_lap":0,"time_before_next_lap":10}'
+        else:
+            body = b'{"round":0,"lap":0,"penalized":false}'
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = respond  # noqa: N815
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.statuses, Handler.delay, Handler.received = [200], 0.0, []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(
+        target=httpd.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_client(url):
+    return SubmissionClient(url, "key", timeout=0.2, retries=2, backoff=0.01)
+
+
+@pytest.mark.parametrize(
+    ("statuses", "n_requests", "status"),
+    [
+        ([200], 1, 200),
+        ([500, 200], 1, 500),  # May have been accepted, not sent again
+        ([503, 429, 200], 3, 200),
+        ([503], 3, 503),
+    ],
+)
+def test_submit_retries(server, statuses, n_requests, status):
+    Handler.statuses = statuses
+    with make_client(server) as client:
+        assert client.submit("fire").status_code == status
+
+    assert len(Handler.received) == n_requests
+    assert client.metrics.sent == n_requests
+    assert client.metrics.retried == n_requests - 1
+    assert client.metrics.failed == (status != 200)
+
+
+def test_status_retries_server_errors(server):
+    Handler.statuses = [500, 502, 200]
+    with make_client(server) as client:
+        assert client._request("GET", "status").status_code == 200
+
+    assert len(Handler.received) == 3
+
+
+def test_submit_read_timeout_not_retried(server):
+    Handler.delay = 0.5
+    with make_client(server) as client, pytest.raises(requests.ReadTimeout):
+        client.submit("fire")
+
+    assert len(Handler.received) == 1
+    assert client.metrics.failed == 1
+
+
+def test_submit_connection_refused_retried():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]  # Nothing listens on this port
+
+    with make_client(f"http://127.0.0.1:{port}") as client:
+        with pytest.raises(requests.ConnectionError):
+            client.submit("fire")
+
+    assert client.metrics.sent == 3
+    assert client.metrics.retried == 2
+
+
+def test_submit_background_in_order(server):
+    # The first guess is refused until the second one is queued
+    Handler.statuses, Handler.delay = [503, 200], 0.05
+    with make_client(server) as client:
+        fire = client.submit_background("fire")
+        gunshot = client.submit_background("gunshot")
+        assert fire.result() is None
+        assert gunshot.result().status_code == 200
+
+    # Fire is not retried after gunshot, which would replace it
+    assert Handler.received == [
+        ("POST", "/lelec210x/leaderboard/submit/key/fire"),
+        ("POST", "/lelec210x/leaderboard/submit/key/gunshot"),
+    ]
+    assert client.metrics.superseded == 1
+
+
+def test_submit_coalesce(server):
+    with SubmissionClient(server, "key", timeout=0.2, coalesce=True) as client:
+        assert client.submit("fire").status_code == 200
+        assert client.submit("FIRE") is None
+        assert client.submit("gunshot").status_code == 200
+
+    assert [path.rsplit("/", 1)[-1] for _, path in Handler.received] == [
+        "fire",
+        "status",
+        "gunshot",
+    ]
+    assert client.metrics.coalesced == 1
@@ -0,0 +1,16 @@
+import math
+
+from .utils import percentile
+
+
+def test_percentile():
+    values = list(range(1, 21))
+
+    assert percentile(values, 0) == 1
+    assert percentile(values, 5) == 1
+    assert percentile(values, 50) == 10
+    assert percentile(values, 95) == 19
+    assert percentile(values, 100) == 20
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([7.0], 99) == 7.0
+    assert math.isnan(percentile([], 50))
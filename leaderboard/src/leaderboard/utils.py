@@ -1,4 +1,6 @@
+import math
 import os
+from typing import List
 
 
 def get_url() -> str:
@@ -10,3 +12,11 @@ def get_url() -> str:
         return f"http://{host}:{port}"
 
     return f"https://{host}"
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Return the q-th percentile (nearest rank) of sorted values."""
+    if not sorted_values:
+        return float("nan")
+    index = max(math.ceil(q * len(sorted_values) / 100) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]